@@ -0,0 +1,72 @@
+"""Compara dois resultados de `benchmarks.run` e aponta regressões.
+
+Uso:
+    python -m benchmarks.compare base.json novo.json [--threshold 0.10] [--memory-threshold 0.25]
+
+Sai com código 1 se algum benchmark ficou mais lento (p50) ou usou mais
+memória (pico) do que o limite relativo permitido.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Tuple
+
+
+def _load(path: str) -> Tuple[Dict, Dict[str, Dict]]:
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("meta", {}), {f"{r['name']}[{r['size']}]": r for r in data["results"]}
+
+
+def _delta(old: float, new: float) -> float:
+    return (new - old) / old if old else 0.0
+
+
+def compare(base_path: str, new_path: str, threshold: float, memory_threshold: float) -> int:
+    base_meta, base = _load(base_path)
+    new_meta, new = _load(new_path)
+    print(f"base: {base_meta.get('commit') or base_path}   novo: {new_meta.get('commit') or new_path}")
+    if base_meta.get("platform") != new_meta.get("platform") or base_meta.get("python") != new_meta.get("python"):
+        print("aviso: ambientes diferentes (plataforma/Python); compare com cautela")
+    print()
+    print(f"{'benchmark':<32} {'p50 base':>12} {'p50 novo':>12} {'Δ p50':>8} {'Δ pico':>8}")
+
+    regressions = []
+    for key in sorted(set(base) & set(new)):
+        old, cur = base[key], new[key]
+        d_lat = _delta(old["latency_ms"]["p50"], cur["latency_ms"]["p50"])
+        d_mem = _delta(old["peak_memory_kb"], cur["peak_memory_kb"])
+        flag = ""
+        if d_lat > threshold:
+            flag += " LENTO"
+        if d_mem > memory_threshold:
+            flag += " MEMÓRIA"
+        if flag:
+            regressions.append(key)
+        print(f"{key:<32} {old['latency_ms']['p50']:>10.3f}ms {cur['latency_ms']['p50']:>10.3f}ms "
+              f"{d_lat:>+8.1%} {d_mem:>+8.1%}{flag}")
+
+    for key in sorted(set(base) - set(new)):
+        print(f"{key:<32} ausente no novo resultado")
+    for key in sorted(set(new) - set(base)):
+        print(f"{key:<32} novo (sem base)")
+
+    if regressions:
+        print(f"\n{len(regressions)} regressão(ões): {', '.join(regressions)}")
+        return 1
+    print("\nSem regressões.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara resultados de benchmark entre commits")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="piora relativa aceita no p50 (0.10 = 10%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="piora relativa aceita no pico de memória")
+    args = parser.parse_args()
+    sys.exit(compare(args.base, args.new, args.threshold, args.memory_threshold))
+
+
+if __name__ == "__main__":
+    main()
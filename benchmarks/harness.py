@@ -0,0 +1,131 @@
+"""Medição: latência por iteração, throughput e pico de memória."""
+import gc
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class BenchResult:
+    name: str
+    size: int
+    items: int  # itens processados por iteração (pares, sinais, ordens...)
+    iterations: int
+    latency_ms: Dict[str, float]  # p50 / p95 / p99 / mean / min / max por iteração
+    throughput_per_s: float  # itens por segundo, pela latência mediana
+    peak_memory_kb: float  # pico alocado em uma iteração (tracemalloc)
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}[{self.size}]"
+
+    def summary(self) -> str:
+        lat = self.latency_ms
+        return (
+            f"{self.key:<32} p50={lat['p50']:>10.3f}ms p95={lat['p95']:>10.3f}ms "
+            f"p99={lat['p99']:>10.3f}ms {self.throughput_per_s:>14,.0f} it/s "
+            f"peak={self.peak_memory_kb:>10,.0f}KB"
+        )
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil com interpolação linear (valores já ordenados)."""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * pct / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def measure(name: str, size: int, fn: Callable[[Any], Any], setup: Optional[Callable[[], Any]] = None,
+            items: Optional[int] = None, min_time: float = 1.0, min_iterations: int = 5,
+            max_iterations: int = 1000) -> BenchResult:
+    """
+    Roda `fn(setup())` repetidamente. `setup` não entra na medição; o tempo de
+    cada chamada a `fn` vira uma amostra de latência. Para quando passar de
+    `min_time` segundos (e `min_iterations`) ou chegar em `max_iterations`.
+    """
+    setup = setup or (lambda: None)
+    fn(setup())  # aquecimento
+
+    latencies = []
+    total = 0.0
+    gc_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        while len(latencies) < max_iterations and (total < min_time or len(latencies) < min_iterations):
+            arg = setup()
+            t0 = time.perf_counter()
+            fn(arg)
+            elapsed = time.perf_counter() - t0
+            latencies.append(elapsed)
+            total += elapsed
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    arg = setup()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        fn(arg)
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    p50 = percentile(latencies, 50)
+    items = size if items is None else items
+    return BenchResult(
+        name=name,
+        size=size,
+        items=items,
+        iterations=len(latencies),
+        latency_ms={
+            "p50": percentile(ms, 50),
+            "p95": percentile(ms, 95),
+            "p99": percentile(ms, 99),
+            "mean": sum(ms) / len(ms),
+            "min": ms[0],
+            "max": ms[-1],
+        },
+        throughput_per_s=items / p50 if p50 > 0 else float("inf"),
+        peak_memory_kb=peak / 1024,
+    )
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(("git",) + args, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment() -> Dict[str, Any]:
+    """Metadados para comparar resultados entre commits e máquinas."""
+    try:
+        import numpy
+
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": sys.version.split()[0],
+        "numpy": numpy_version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": time.time(),
+    }
+
+
+def to_json(results: List[BenchResult], meta: Dict[str, Any]) -> Dict[str, Any]:
+    return {"meta": meta, "results": [asdict(r) for r in results]}
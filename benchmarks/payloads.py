@@ -0,0 +1,78 @@
+"""Payloads da DexScreener para os benchmarks (offline).
+
+`fixtures/dexscreener_search_sol.json` é uma resposta de `/latest/dex/search`
+com 100 pares (inclui pares de outras chains, que o agente descarta).
+`scaled(n)` reamostra esses pares para qualquer tamanho, com endereços únicos
+e valores perturbados de forma determinística, para medir 100 / 10k / 100k.
+
+Para regravar a amostra a partir da API:
+    python -m benchmarks.payloads --record sol
+"""
+import argparse
+import copy
+import json
+import os
+import random
+from typing import Any, Dict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SAMPLE_PATH = os.path.join(FIXTURES_DIR, "dexscreener_search_sol.json")
+
+
+def load_sample(path: str = SAMPLE_PATH) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def scaled(n: int, seed: int = 0, sample: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Resposta com `n` pares reamostrados da amostra gravada."""
+    sample = sample or load_sample()
+    pairs = sample["pairs"]
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        pair = copy.deepcopy(pairs[i % len(pairs)])
+        if i >= len(pairs):
+            # token novo a cada volta na amostra, senão a tabela deduplica
+            base = pair["baseToken"]
+            base["address"] = f"{base['address'][:36]}{i:08d}"
+            pair["pairAddress"] = f"{pair['pairAddress'][:36]}{i:08d}"
+            factor = rnd.lognormvariate(0, 0.5)
+            pair["priceUsd"] = f"{float(pair['priceUsd']) * factor:.9g}"
+            pair["liquidity"]["usd"] = round(pair["liquidity"]["usd"] * rnd.lognormvariate(0, 0.5), 2)
+            pair["volume"]["h24"] = round(pair["volume"]["h24"] * rnd.lognormvariate(0, 0.5), 2)
+            pair["priceChange"]["h24"] = round(pair["priceChange"]["h24"] + rnd.gauss(0, 10), 2)
+        out.append(pair)
+    return {"schemaVersion": sample.get("schemaVersion", "1.0.0"), "pairs": out}
+
+
+def scaled_bytes(n: int, seed: int = 0) -> bytes:
+    """Corpo HTTP (JSON compacto) de `scaled(n)`, como vem da API."""
+    return json.dumps(scaled(n, seed), separators=(",", ":")).encode()
+
+
+def record(query: str, path: str = SAMPLE_PATH):
+    """Grava uma resposta real de `/latest/dex/search?q=<query>` como amostra."""
+    import requests
+
+    r = requests.get("https://api.dexscreener.com/latest/dex/search", params={"q": query}, timeout=15)
+    r.raise_for_status()
+    data = r.json()
+    with open(path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    print(f"{len(data.get('pairs') or [])} pares gravados em {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Amostras da DexScreener para os benchmarks")
+    parser.add_argument("--record", metavar="QUERY", help="grava uma resposta real da busca como amostra")
+    args = parser.parse_args()
+    if args.record:
+        record(args.record)
+    else:
+        sample = load_sample()
+        print(f"{SAMPLE_PATH}: {len(sample['pairs'])} pares")
+
+
+if __name__ == "__main__":
+    main()
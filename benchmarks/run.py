@@ -0,0 +1,264 @@
+"""Benchmarks dos caminhos quentes, offline, sobre payloads gravados.
+
+Mede, para cada tamanho de universo (pares da DexScreener / ticks / ordens):
+
+- agent.fetch_tokens      parsing do JSON + TokenTable + views
+- agent.score_token       scoring escalar, token a token
+- agent.scan              refresh + scoring vetorizado + top-k
+- watcher.compose_send    _compose_signal_message + _send_text (chunking no outbox)
+- strategy.decide         Strategy.decide por snapshot
+- risk.check              RiskManager.check por ordem
+- risk.check_batch        RiskManager.check_batch, lotes de 100 ordens contra 500 posições
+- portfolio.apply_trade   Portfolio.apply_trade por fill
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.run                       # 100 / 10k / 100k
+    python -m benchmarks.run --sizes 100,10000 --only scan,fetch
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/novo.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.join(ROOT, "project-root")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_SIZES = (100, 10_000, 100_000)
+
+for path in (ROOT, PROJECT_ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from benchmarks import payloads  # noqa: E402
+from benchmarks.harness import BenchResult, environment, measure, to_json  # noqa: E402
+
+
+# ----------------------------------------------------------------------
+# project-root: agente, scoring e watcher
+# ----------------------------------------------------------------------
+
+def _fixture_agent(body: bytes):
+    """Agente cujo cache sempre serve `body` para a consulta configurada."""
+    from agent import SolanaTradingAgent
+    from cache import CacheEntry, ResponseCache
+
+    cache = ResponseCache(ttl=float("inf"), stale_ttl=0)
+    agent = SolanaTradingAgent(queries=["sol"], token_addresses=[], cache=cache)
+    url = agent._discovery_urls()[0]
+
+    def reload():
+        # entrada nova a cada iteração: o JSON volta a ser decodificado
+        cache.put(url, CacheEntry(body, None, None, time.time()))
+        return agent
+
+    return agent, reload
+
+
+def bench_fetch(size: int, body: bytes, **opts) -> BenchResult:
+    _, reload = _fixture_agent(body)
+    return measure("agent.fetch_tokens", size, lambda agent: agent.fetch_tokens(limit=None),
+                   setup=reload, **opts)
+
+
+def bench_score_token(size: int, body: bytes, **opts) -> BenchResult:
+    agent, reload = _fixture_agent(body)
+    tokens = reload().fetch_tokens(limit=None)
+    score = agent.score_token
+
+    def run(_):
+        for token in tokens:
+            score(token)
+
+    return measure("agent.score_token", size, run, items=len(tokens), **opts)
+
+
+def bench_scan(size: int, body: bytes, **opts) -> BenchResult:
+    _, reload = _fixture_agent(body)
+    return measure("agent.scan", size, lambda agent: agent.scan(limit=None, top_k=5), setup=reload, **opts)
+
+
+def _watcher():
+    # com BOT_TOKEN o setup() monta o outbox; ele nunca é iniciado aqui
+    os.environ.setdefault("BOT_TOKEN", "0:benchmark")
+    import watcher
+
+    watcher.setup()
+    return watcher
+
+
+def bench_compose_send(size: int, body: bytes, **opts) -> BenchResult:
+    watcher = _watcher()
+    agent, reload = _fixture_agent(body)
+    tokens = reload().fetch_tokens(limit=None)
+    # ações reais do agente (buy/sell/hold), como no scan
+    signals = [agent.score_token(t) for t in tokens]
+    outbox = watcher.outbox
+    loop = asyncio.new_event_loop()
+
+    def reset():
+        outbox._pending.clear()
+        outbox._ready.clear()
+
+    def run(_):
+        msg = watcher._compose_signal_message(signals)
+        loop.run_until_complete(watcher._send_text("1", msg))
+
+    try:
+        return measure("watcher.compose_send", size, run, setup=reset, items=len(signals), **opts)
+    finally:
+        reset()
+        loop.close()
+
+
+# ----------------------------------------------------------------------
+# solana_trader: Strategy, RiskManager, Portfolio
+# ----------------------------------------------------------------------
+
+SYMBOLS = ("SOL-USD", "BONK-USD", "JUP-USD", "WIF-USD")
+ENV = {"STRATEGY_THRESHOLD": "0.001", "MAX_POSITION_PCT": "0.05"}
+
+
+def _markets(size: int) -> List[Dict]:
+    from solana_trader.core.backtest import synthetic_snapshots
+
+    markets = []
+    for i, snap in enumerate(synthetic_snapshots(size)):
+        snap["symbol"] = SYMBOLS[i % len(SYMBOLS)]
+        markets.append(snap)
+    return markets
+
+
+def _portfolio_with_positions():
+    from solana_trader.core.portfolio import Portfolio
+
+    portfolio = Portfolio(starting_cash=1_000_000.0)
+    for sym in SYMBOLS[::2]:
+        portfolio.apply_trade({"type": "buy", "symbol": sym, "price": 20.0, "qty": 100})
+    return portfolio
+
+
+def bench_decide(size: int, body: bytes, **opts) -> BenchResult:
+    from solana_trader.core.strategy import Strategy
+
+    strategy = Strategy(ENV)
+    markets = _markets(size)
+    portfolio = _portfolio_with_positions()
+
+    def run(_):
+        decide = strategy.decide
+        for market in markets:
+            decide(market, portfolio)
+
+    return measure("strategy.decide", size, run, **opts)
+
+
+def _orders(size: int) -> List[Dict]:
+    orders = []
+    for i, market in enumerate(_markets(size)):
+        kind = "sell" if i % 3 == 2 else "buy"
+        orders.append({"type": kind, "symbol": market["symbol"], "price": market["price"], "qty": 1 + i % 7})
+    return orders
+
+
+def bench_risk(size: int, body: bytes, **opts) -> BenchResult:
+    from solana_trader.core.risk import RiskManager
+
+    risk = RiskManager(ENV)
+    orders = _orders(size)
+    portfolio = _portfolio_with_positions()
+
+    def run(batch):
+        check = risk.check
+        for order in batch:
+            check(order, portfolio)
+
+    # check redimensiona a ordem no lugar: cada iteração recebe cópias
+    return measure("risk.check", size, run, setup=lambda: [dict(o) for o in orders], **opts)
+
+
+def bench_risk_batch(size: int, body: bytes, **opts) -> BenchResult:
+    from solana_trader.core.portfolio import Portfolio
+    from solana_trader.core.risk import RiskManager
+
+    risk = RiskManager(ENV)
+    portfolio = Portfolio(starting_cash=1_000_000.0)
+    for i in range(500):
+        portfolio.apply_trade({"type": "buy", "symbol": f"TOK{i}", "price": 1.0, "qty": 100})
+    risk.observe({"symbol": f"TOK{i}", "liquidity": 1e6} for i in range(500))
+    orders = [{"type": "sell" if i % 3 == 2 else "buy", "symbol": f"TOK{i % 700}", "price": 1.0, "qty": 1 + i % 7}
+              for i in range(size)]
+
+    def run(batch):
+        check_batch = risk.check_batch
+        for start in range(0, len(batch), 100):
+            check_batch(batch[start:start + 100], portfolio)
+
+    return measure("risk.check_batch", size, run, setup=lambda: [dict(o) for o in orders], **opts)
+
+
+def bench_apply_trade(size: int, body: bytes, **opts) -> BenchResult:
+    orders = _orders(size)
+
+    def run(portfolio):
+        apply = portfolio.apply_trade
+        for order in orders:
+            apply(order)
+
+    return measure("portfolio.apply_trade", size, run, setup=_portfolio_with_positions, **opts)
+
+
+BENCHMARKS: Dict[str, Callable[..., BenchResult]] = {
+    "fetch": bench_fetch,
+    "score_token": bench_score_token,
+    "scan": bench_scan,
+    "compose_send": bench_compose_send,
+    "decide": bench_decide,
+    "risk": bench_risk,
+    "risk_batch": bench_risk_batch,
+    "apply_trade": bench_apply_trade,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks offline dos caminhos quentes")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="tamanhos separados por vírgula (padrão: 100,10000,100000)")
+    parser.add_argument("--only", default="", help=f"subconjunto de: {','.join(BENCHMARKS)}")
+    parser.add_argument("--min-time", type=float, default=1.0, help="segundos medidos por benchmark")
+    parser.add_argument("--max-iterations", type=int, default=1000)
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    names = [n.strip() for n in args.only.split(",") if n.strip()] or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"benchmark desconhecido: {', '.join(unknown)}")
+
+    logging.basicConfig(level=logging.WARNING)
+    meta = environment()
+    meta["sizes"] = sizes
+    opts = {"min_time": args.min_time, "max_iterations": args.max_iterations}
+
+    results = []
+    for size in sizes:
+        body = payloads.scaled_bytes(size)
+        for name in names:
+            result = BENCHMARKS[name](size, body, **opts)
+            print(result.summary(), flush=True)
+            results.append(result)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{meta['commit'] or 'local'}{'-dirty' if meta['dirty'] else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(to_json(results, meta), f, indent=2)
+    print(f"\nResultados salvos em {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,27 @@
-"""Agent core stub."""
-
-class Agent:
-    def __init__(self):
-        self.name = "agent"
-
-    def run(self):
-        print("Agent running...")
-
-    def check(self):
-        print("Agent health check...")
 # agent.py
-import requests
+import asyncio
+import functools
+import threading
+import time
+from urllib.parse import quote
+
+import numpy as np
 from dataclasses import dataclass
-from typing import List
+from typing import Callable, List, Optional, Tuple
 import logging
 
-logger = logging.getLogger("agent")
+import dexparse
+import scoring
+from cache import ResponseCache, default_cache
+from token_table import TokenInfo, TokenTable
+from utils import get_env, get_env_list
 
-@dataclass
-class TokenInfo:
-    address: str
-    symbol: str
-    name: str
-    price: float
-    liquidity: float
-    volume_24h: float
-    change_24h: float
+logger = logging.getLogger("agent")
 
+DEXSCREENER_SEARCH_URL = "https://api.dexscreener.com/latest/dex/search"
+DEXSCREENER_TOKENS_URL = "https://api.dexscreener.com/latest/dex/tokens/"
+# limite da DexScreener para endereços por chamada em /tokens
+TOKENS_PER_REQUEST = 30
 
 @dataclass
 class TradingSignal:
@@ -38,63 +33,300 @@ class TradingSignal:
 
 class SolanaTradingAgent:
 
+    def __init__(
+        self,
+        max_position_size: float = 100,
+        queries: Optional[List[str]] = None,
+        token_addresses: Optional[List[str]] = None,
+        max_concurrency: Optional[int] = None,
+        request_timeout: Optional[float] = None,
+        discovery_budget: Optional[float] = None,
+        cache: Optional[ResponseCache] = None,
+        on_stage: Optional[Callable[[str, float], None]] = None,
+        shards: Optional[int] = None,
+    ):
+        self.max_position_size = max_position_size
+        self.queries = queries if queries is not None else (get_env_list("DISCOVERY_QUERIES") or ["sol"])
+        self.token_addresses = (
+            token_addresses if token_addresses is not None else get_env_list("DISCOVERY_TOKENS")
+        )
+        self.max_concurrency = max_concurrency or int(get_env("DISCOVERY_CONCURRENCY", 8))
+        self.request_timeout = request_timeout or float(get_env("DISCOVERY_TIMEOUT", 15))
+        self.discovery_budget = discovery_budget or float(get_env("DISCOVERY_BUDGET", 30))
+        self.cache = cache or default_cache()
+        self.table = TokenTable()
+        self._lock = threading.Lock()
+        # on_stage(etapa, segundos) para "fetch" (por requisição), "parse"
+        # (por resposta) e "score" (por rodada de scoring)
+        self.on_stage = on_stage
+        # "selective" (padrão) lê só os campos usados direto dos bytes; "full" usa json/orjson
+        # shards > 1: scan() divide consultas/endereços entre processos (ver sharding.py)
+        self.shards = shards or int(get_env("SCAN_SHARDS", 1))
+        self._sharded = None
+        self._parse = functools.partial(dexparse.parse_pairs, mode=get_env("DEX_PARSER", dexparse.SELECTIVE))
+
+    def _observe(self, stage: str, t0: float):
+        if self.on_stage is not None:
+            self.on_stage(stage, time.perf_counter() - t0)
+
+    # ------------------------------------------------------------------
+    # Descoberta de tokens
+    # ------------------------------------------------------------------
+
+    def _discovery_urls(self) -> List[str]:
+        urls = [f"{DEXSCREENER_SEARCH_URL}?q={quote(q)}" for q in self.queries]
+        addrs = list(dict.fromkeys(self.token_addresses))
+        for i in range(0, len(addrs), TOKENS_PER_REQUEST):
+            urls.append(DEXSCREENER_TOKENS_URL + ",".join(addrs[i:i + TOKENS_PER_REQUEST]))
+        return urls
+
+    @property
+    def calls_per_scan(self) -> int:
+        """Requisições à DexScreener por scan: uma por consulta e uma por lote de endereços."""
+        return len(self.queries) + -(-len(dict.fromkeys(self.token_addresses)) // TOKENS_PER_REQUEST)
+
+    def _ingest(self, entry) -> List[int]:
+        """Grava os pares Solana de uma resposta (`CacheEntry`) direto na `TokenTable`."""
+        upsert = self.table.upsert
+        return [upsert(*pair) for pair in entry.parse(self._parse)]
+
+    def _refresh(self, on_rows=None):
+        """
+        Atualiza a tabela com uma rodada de descoberta. Tokens repetidos entre
+        consultas viram uma linha só (fica o par de maior liquidez).
+        `on_rows(rows)` é chamado a cada resposta processada.
+        """
+        self.table.begin_cycle()
+        urls = self._discovery_urls()
+        if len(urls) == 1:
+            t0 = time.perf_counter()
+            entry = self.cache.fetch(urls[0], self.request_timeout)
+            self._observe("fetch", t0)
+            t0 = time.perf_counter()
+            rows = self._ingest(entry)
+            self._observe("parse", t0)
+            if on_rows:
+                on_rows(rows)
+        else:
+            _run_sync(self._refresh_async(urls, on_rows))
+
+    async def _refresh_async(self, urls: List[str], on_rows=None):
+        """
+        Descoberta concorrente: dispara todas as consultas/endereços configurados
+        em paralelo (no máximo `max_concurrency` por vez), cada uma com seu
+        timeout, e descarta o que não voltar dentro de `discovery_budget`.
+        Falhas parciais só vão para o log; se nenhuma consulta der certo, levanta
+        o primeiro erro (ou TimeoutError), como o caminho de uma consulta só.
+        """
+        import aiohttp  # só o caminho concorrente precisa dele
+
+        sem = asyncio.Semaphore(self.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+
+        async def _get(session, url):
+            async with sem:
+                t0 = time.perf_counter()
+                entry = await self.cache.fetch_async(session, url)
+                self._observe("fetch", t0)
+            t0 = time.perf_counter()
+            rows = self._ingest(entry)
+            self._observe("parse", t0)
+            if on_rows:
+                on_rows(rows)
+
+        deadline = time.monotonic() + self.discovery_budget
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            tasks = [asyncio.ensure_future(_get(session, url)) for url in urls]
+            done, pending = await asyncio.wait(tasks, timeout=self.discovery_budget)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning("%d consultas estouraram o orçamento de %.1fs", len(pending), self.discovery_budget)
+            # revalidações de entradas velhas usam esta sessão: terminam (no orçamento) antes de fechá-la
+            await self.cache.drain_async(max(0.0, deadline - time.monotonic()))
+
+        errors = []
+        for url, task in zip(urls, tasks):
+            if task in done and task.exception() is not None:
+                logger.warning("Falha ao consultar %s: %s", url, task.exception())
+                errors.append(task.exception())
+        # nenhuma consulta voltou: o scan falhou (não é um mercado vazio)
+        if urls and len(errors) + len(pending) == len(urls):
+            if errors:
+                raise errors[0]
+            raise TimeoutError(f"Nenhuma consulta respondeu em {self.discovery_budget:.1f}s")
+
     def fetch_tokens(self, limit=30) -> List[TokenInfo]:
         """
         Busca tokens da DexScreener (Solana only)
         """
-        url = "https://api.dexscreener.com/latest/dex/search?q=sol"
-        r = requests.get(url, timeout=15)
-        data = r.json()
-
-        tokens = []
-        for pair in data.get("pairs", []):
-            if pair.get("chainId") != "solana":
-                continue
-
-            base = pair["baseToken"]
-            tokens.append(TokenInfo(
-                address=base["address"],
-                symbol=base["symbol"],
-                name=base.get("name", "Unknown"),
-                price=float(pair.get("priceUsd", 0)),
-                liquidity=float(pair.get("liquidity", {}).get("usd", 0)),
-                volume_24h=float(pair.get("volume", {}).get("h24", 0)),
-                change_24h=float(pair.get("priceChange", {}).get("h24", 0))
-            ))
-
-        return tokens[:limit]
+        with self._lock:
+            self._refresh()
+            return self.table.views(self.table.active_rows(limit))
+
+    async def fetch_tokens_async(self, limit=None) -> List[TokenInfo]:
+        """
+        Versão assíncrona de `fetch_tokens` (sempre usa o caminho concorrente).
+        Pega o mesmo lock do `fetch_tokens`/`scan` numa thread auxiliar, sem
+        bloquear o event loop (cancelável a qualquer momento).
+        """
+        await _acquire_async(self._lock)
+        try:
+            self.table.begin_cycle()
+            await self._refresh_async(self._discovery_urls())
+            return self.table.views(self.table.active_rows(limit))
+        finally:
+            self._lock.release()
 
     def score_token(self, token: TokenInfo) -> TradingSignal:
-        score = 0
-        reasons = []
+        score, action, reasons = scoring.score_one(token.liquidity, token.volume_24h, token.change_24h)
+        return TradingSignal(token, score, action, reasons)
+
+    def score_tokens(self, tokens: List[TokenInfo], top_k=5) -> List[TradingSignal]:
+        """
+        Versão em lote de `score_token`: pontua o universo inteiro em colunas
+        NumPy e só monta `TradingSignal` (com motivos) para os top_k.
+        """
+        if not tokens:
+            return []
+        liquidity = np.fromiter((t.liquidity for t in tokens), np.float64, len(tokens))
+        volume_24h = np.fromiter((t.volume_24h for t in tokens), np.float64, len(tokens))
+        change_24h = np.fromiter((t.change_24h for t in tokens), np.float64, len(tokens))
+        return self._select(liquidity, volume_24h, change_24h, tokens.__getitem__, top_k)
 
-        if token.liquidity > 50_000:
-            score += 10
-            reasons.append("Liquidez saudável")
+    def _score_rows(self, rows: np.ndarray, top_k=5) -> List[TradingSignal]:
+        """Igual a `score_tokens`, mas lendo as colunas direto da `TokenTable`."""
+        t0 = time.perf_counter()
+        table = self.table
+        signals = self._select(
+            table.liquidity[rows], table.volume_24h[rows], table.change_24h[rows],
+            lambda i: table.view(int(rows[i])), top_k,
+        )
+        self._observe("score", t0)
+        return signals
 
-        if token.volume_24h > 100_000:
-            score += 20
-            reasons.append("Volume 24h forte")
+    @staticmethod
+    def _select(liquidity, volume_24h, change_24h, token_at, top_k) -> List[TradingSignal]:
+        """Scoring vetorizado + top-k; `token_at(i)` dá o `TokenInfo` da i-ésima linha."""
+        scores, actions = scoring.score_columns(liquidity, volume_24h, change_24h)
+        return [
+            TradingSignal(
+                token_at(i),
+                int(scores[i]),
+                scoring.ACTION_NAMES[int(actions[i])],
+                scoring.reasons_for(liquidity[i], volume_24h[i], change_24h[i]),
+            )
+            for i in scoring.top_k_indices(scores, top_k)
+        ]
 
-        if token.change_24h > 20:
-            score += 15
-            reasons.append("Momentum positivo")
+    def scan(self, limit=30, top_k=5):
+        if self.shards > 1 and len(self.queries) + len(self.token_addresses) > 1:
+            return self._scan_sharded(limit, top_k)
+        with self._lock:
+            self._refresh()
+            return self._score_rows(self.table.active_rows(limit), top_k)
 
-        if token.change_24h < -20:
-            score -= 20
-            reasons.append("Queda acentuada")
+    def _scan_sharded(self, limit, top_k) -> List[TradingSignal]:
+        """
+        Cada worker faz fetch + parse + scoring do seu shard e devolve o top-k
+        local (ou, com `limit`, os primeiros `limit` tokens); aqui só o merge,
+        onde `limit` vale para o scan inteiro. A `TokenTable` deste processo
+        não é preenchida nesse modo.
+        """
+        if self._sharded is None:
+            from sharding import ShardedScanner
 
-        action = "hold"
-        if score >= 40:
-            action = "buy"
-        elif score <= -20:
-            action = "sell"
+            self._sharded = ShardedScanner(self.shards)
+        t0 = time.perf_counter()
+        signals = self._sharded.scan(self.queries, self.token_addresses, limit, top_k)
+        self._observe("sharded_scan", t0)
+        return signals
 
-        return TradingSignal(token, score, action, reasons)
+    def close(self):
+        """Encerra o pool de processos do modo particionado, se existir."""
+        if self._sharded is not None:
+            self._sharded.close()
+            self._sharded = None
 
-    def scan(self, limit=30, top_k=5):
-        tokens = self.fetch_tokens(limit)
-        signals = [self.score_token(t) for t in tokens]
-        signals.sort(key=lambda s: s.score, reverse=True)
-        return signals[:top_k]
+    def scan_sides(self, top_k=5) -> Tuple[List[TradingSignal], List[TradingSignal]]:
+        """
+        Seleção em streaming: pontua cada resposta assim que ela chega e mantém
+        só os top_k de cada lado em heaps. Retorna (longs, shorts): os maiores
+        scores em ordem decrescente e os menores em ordem crescente.
+        """
+        selector = scoring.StreamingTopK(top_k)
+        table = self.table
+
+        def _on_rows(rows):
+            t0 = time.perf_counter()
+            rows = np.asarray(rows, dtype=np.intp)
+            scores, _ = scoring.score_columns(table.liquidity[rows], table.volume_24h[rows], table.change_24h[rows])
+            selector.push(rows, scores)
+            self._observe("score", t0)
+
+        with self._lock:
+            self._refresh(_on_rows)
+            return (
+                [self._signal_for_row(row, score) for row, score in selector.longs()],
+                [self._signal_for_row(row, score) for row, score in selector.shorts()],
+            )
+
+    def _signal_for_row(self, row: int, score: int) -> TradingSignal:
+        table = self.table
+        return TradingSignal(
+            table.view(row),
+            score,
+            scoring.action_name(score),
+            scoring.reasons_for(table.liquidity[row], table.volume_24h[row], table.change_24h[row]),
+        )
+
+async def _acquire_async(lock: threading.Lock):
+    """
+    `lock.acquire()` numa thread auxiliar. Se quem espera for cancelado, o lock
+    é devolvido assim que a thread conseguir (ou na hora, se já tinha conseguido).
+    """
+    guard = threading.Lock()
+    state = {"cancelled": False, "held": False}
+
+    def _acquire():
+        lock.acquire()
+        with guard:
+            if state["cancelled"]:
+                lock.release()
+            else:
+                state["held"] = True
+
+    try:
+        await asyncio.to_thread(_acquire)
+    except asyncio.CancelledError:
+        with guard:
+            state["cancelled"] = True
+            if state["held"]:
+                lock.release()
+        raise
+
+
+def _run_sync(coro):
+    """
+    Executa uma corrotina a partir de código síncrono. Se já houver um event
+    loop rodando nesta thread (ex.: handler do Telegram), usa uma thread auxiliar.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result = {}
+
+    def _target():
+        try:
+            result["value"] = asyncio.run(coro)
+        except BaseException as e:  # propaga para quem chamou
+            result["error"] = e
 
+    t = threading.Thread(target=_target, daemon=True)
+    t.start()
+    t.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
@@ -1,5 +1,8 @@
 # bot.py
+import asyncio
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from telegram import Update
 from telegram.ext import (
@@ -7,24 +10,67 @@ from telegram.ext import (
     CommandHandler,
     ContextTypes,
 )
-from utils import get_env
-from agent import SolanaTradingAgent
-from trader import get_trader
+from utils import SingleFlight, get_env
 
 # ------------------------- CONFIG -------------------------
 load_dotenv()
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 BOT_TOKEN = get_env("TELEGRAM_BOT_TOKEN")
 CHAT_ID = get_env("TELEGRAM_CHAT_ID")
+SCAN_WORKERS = int(get_env("SCAN_WORKERS", 2))
+STATE_DIR = get_env("STATE_DIR")  # vazio = ledger só em memória
 
-if not BOT_TOKEN:
-    raise RuntimeError("ERRO: TELEGRAM_BOT_TOKEN não definido no .env")
+# ------------------------- OBJETOS (criados no primeiro uso) -------------------------
+_agent = None
+_trader = None
+_scan_pool = None
+_ledger = None
+_ledger_lock = threading.Lock()  # /trade e /status podem criar o ledger em threads diferentes
 
-# ------------------------- OBJETOS -------------------------
-agent = SolanaTradingAgent(max_position_size=100)
-trader = get_trader()
+# /scan simultâneos compartilham o mesmo scan
+scan_flight = SingleFlight()
+
+
+def get_agent():
+    global _agent
+    if _agent is None:
+        from agent import SolanaTradingAgent
+
+        _agent = SolanaTradingAgent(max_position_size=100)
+    return _agent
+
+
+def get_bot_trader():
+    global _trader
+    if _trader is None:
+        from trader import get_trader
+
+        _trader = get_trader()
+    return _trader
+
+
+def get_ledger():
+    """Trades executados pelo /trade (persistidos em STATE_DIR, se definido)."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            from ledger import TradeLedger
+
+            _ledger = TradeLedger(STATE_DIR)
+    return _ledger
+
+
+def _record_trade(result) -> bool:
+    return get_ledger().record(result)
+
+
+def get_scan_pool() -> ThreadPoolExecutor:
+    """Scans rodam fora do event loop, nesta pool."""
+    global _scan_pool
+    if _scan_pool is None:
+        _scan_pool = ThreadPoolExecutor(max_workers=SCAN_WORKERS, thread_name_prefix="scan")
+    return _scan_pool
 
 # ------------------------- HANDLERS -------------------------
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -38,10 +84,12 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # a primeira chamada recupera o ledger do disco: fora do event loop
+    ledger, trader = await asyncio.to_thread(get_ledger), get_bot_trader()
     text = (
         f"📊 STATUS DO BOT\n\n"
-        f"Posições abertas: {len(agent.positions)}\n"
-        f"Total trades: {len(agent.trade_history)}\n"
+        f"Posições abertas: {len(ledger.open_positions)}\n"
+        f"Total trades: {ledger.trades_total}\n"
         f"Módulo trader: {type(trader).__name__}"
     )
     await update.message.reply_text(text)
@@ -49,12 +97,20 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def scan_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("🔍 Escaneando oportunidades…")
 
-    signals = agent.scan(limit=20, top_k=3)
+    agent, trader = get_agent(), get_bot_trader()
+    try:
+        signals = await scan_flight.run(("scan", 20, 3), agent.scan, 20, 3, executor=get_scan_pool())
+    except Exception as e:
+        logger.exception("Falha no scan: %s", e)
+        await update.message.reply_text(f"Erro no scan: {e}")
+        return
 
     if not signals:
         await update.message.reply_text("Nenhuma oportunidade encontrada.")
         return
 
+    trader.prefetch([s.token.address for s in signals])
+
     for s in signals:
         msg = (
             f"📌 Token: {s.token.symbol}\n"
@@ -89,15 +145,19 @@ async def trade_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         side, token_addr, value = args[0], args[1], float(args[2])
+        trader = get_bot_trader()
 
+        # execução real espera pela rede: roda fora do event loop do bot
         if side == "buy":
-            res = trader.buy(token_addr, value)
+            res = await asyncio.to_thread(trader.buy, token_addr, value)
         elif side == "sell":
-            res = trader.sell(token_addr, value)
+            res = await asyncio.to_thread(trader.sell, token_addr, value)
         else:
             await update.message.reply_text("Opção inválida: use buy ou sell.")
             return
 
+        # o ledger faz fsync no snapshot (e recupera do disco no primeiro uso): fora do event loop
+        await asyncio.to_thread(_record_trade, res)
         await update.message.reply_text(f"Resultado:\n{res}")
 
     except Exception as e:
@@ -105,7 +165,12 @@ async def trade_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # ------------------------- MAIN -------------------------
 def main():
+    logging.basicConfig(level=logging.INFO)
+    if not BOT_TOKEN:
+        raise RuntimeError("ERRO: TELEGRAM_BOT_TOKEN não definido no .env")
+
     logger.info("Iniciando bot…")
+    get_ledger()  # replay do log antes de atender comandos
 
     app = (
         ApplicationBuilder()
@@ -120,7 +185,11 @@ def main():
     app.add_handler(CommandHandler("trade", trade_cmd))
 
     logger.info("Bot rodando! Aguarde mensagens no Telegram.")
-    app.run_polling()
+    try:
+        app.run_polling()
+    finally:
+        if _ledger is not None:
+            _ledger.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,324 @@
+"""Cache de respostas HTTP (DexScreener) com TTL e requisições condicionais.
+
+Duas camadas: LRU em memória (por processo) e, opcionalmente, um diretório
+em disco compartilhado entre processos (bot + watcher). Uma entrada é:
+
+- fresca (idade < ttl): servida direto do cache;
+- velha (idade < ttl + stale_ttl): servida na hora e revalidada em background
+  (stale-while-revalidate);
+- expirada: refeita na hora, com If-None-Match / If-Modified-Since quando o
+  servidor mandou ETag / Last-Modified (um 304 só renova o timestamp).
+
+Misses simultâneos da mesma URL viram uma requisição só (single-flight): por
+processo no `fetch` síncrono, por event loop no `fetch_async`. No caminho
+assíncrono a revalidação roda como task na mesma `aiohttp.ClientSession`;
+quem é dono da sessão chama `drain_async` antes de fechá-la.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Set
+
+from utils import get_env
+
+logger = logging.getLogger("cache")
+
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    _data: Any = field(default=None, repr=False, compare=False)
+    _parsed: Any = field(default=None, repr=False, compare=False)  # (parser, resultado)
+
+    def json(self):
+        """JSON decodificado (uma vez por entrada em memória)."""
+        if self._data is None:
+            self._data = json.loads(self.body)
+        return self._data
+
+    def parse(self, parser: Callable[[bytes], Any]):
+        """`parser(body)`, calculado uma vez por entrada em memória e parser."""
+        parsed = self._parsed
+        if parsed is None or parsed[0] is not parser:
+            parsed = self._parsed = (parser, parser(self.body))
+        return parsed[1]
+
+
+class _Flight:
+    """Requisição síncrona em andamento; quem chega depois espera o mesmo resultado."""
+    __slots__ = ("done", "entry", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry: Optional[CacheEntry] = None
+        self.error: Optional[BaseException] = None
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = 30, stale_ttl: float = 120, max_entries: int = 256,
+                 disk_dir: Optional[str] = None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._revalidating = set()
+        self._inflight: Dict[str, _Flight] = {}
+        self._inflight_async: Dict[tuple, "asyncio.Future"] = {}  # (loop, url) -> requisição
+        self._background: Set["asyncio.Task"] = set()  # revalidações assíncronas
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Armazenamento
+    # ------------------------------------------------------------------
+
+    def state(self, entry: CacheEntry, now: Optional[float] = None) -> str:
+        age = (now or time.time()) - entry.fetched_at
+        if age < self.ttl:
+            return FRESH
+        if age < self.ttl + self.stale_ttl:
+            return STALE
+        return EXPIRED
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is not None:
+                self._memory.move_to_end(url)
+                return entry
+        entry = self._read_disk(url)
+        if entry is not None:
+            self._put_memory(url, entry)
+        return entry
+
+    def put(self, url: str, entry: CacheEntry):
+        self._put_memory(url, entry)
+        self._write_disk(url, entry)
+
+    def _put_memory(self, url: str, entry: CacheEntry):
+        with self._lock:
+            self._memory[url] = entry
+            self._memory.move_to_end(url)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _disk_path(self, url: str) -> str:
+        return os.path.join(self.disk_dir, hashlib.sha1(url.encode()).hexdigest())
+
+    def _read_disk(self, url: str) -> Optional[CacheEntry]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(url)
+        try:
+            with open(path + ".meta") as f:
+                meta = json.load(f)
+            with open(path + ".body", "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+        return CacheEntry(body, meta.get("etag"), meta.get("last_modified"), meta["fetched_at"])
+
+    def _write_disk(self, url: str, entry: CacheEntry):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(url)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        meta = {"url": url, "etag": entry.etag, "last_modified": entry.last_modified,
+                "fetched_at": entry.fetched_at}
+        try:
+            # body antes do meta: quem lê o meta novo sempre encontra o body novo
+            with open(tmp, "wb") as f:
+                f.write(entry.body)
+            os.replace(tmp, path + ".body")
+            with open(tmp, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp, path + ".meta")
+        except OSError as e:
+            logger.warning("Falha ao gravar cache em disco: %s", e)
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def _store_response(self, url, status, headers, body, previous) -> CacheEntry:
+        if status == 304 and previous is not None:
+            entry = CacheEntry(previous.body, previous.etag, previous.last_modified, time.time(),
+                               previous._data, previous._parsed)
+        else:
+            entry = CacheEntry(body, headers.get("ETag"), headers.get("Last-Modified"), time.time())
+        self.put(url, entry)
+        return entry
+
+    def fetch(self, url: str, timeout: float = 15) -> CacheEntry:
+        """Busca `url` respeitando o cache (síncrono, via requests)."""
+        entry = self.get(url)
+        if entry is not None:
+            state = self.state(entry)
+            if state == FRESH:
+                return entry
+            if state == STALE:
+                self._revalidate_in_background(url, timeout)
+                return entry
+        return self._single_flight(url, timeout, entry)
+
+    def _single_flight(self, url: str, timeout: float, entry: Optional[CacheEntry]) -> CacheEntry:
+        with self._lock:
+            flight = self._inflight.get(url)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[url] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.entry
+        try:
+            flight.entry = self._fetch_now(url, timeout, entry)
+            return flight.entry
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[url]
+            flight.done.set()
+
+    async def fetch_async(self, session, url: str) -> CacheEntry:
+        """Igual a `fetch`, usando uma `aiohttp.ClientSession` já aberta."""
+        entry = self.get(url)
+        if entry is not None:
+            state = self.state(entry)
+            if state == FRESH:
+                return entry
+            if state == STALE:
+                self._revalidate_async(session, url)
+                return entry
+        key = (asyncio.get_running_loop(), url)
+        fut = self._inflight_async.get(key)
+        if fut is None:
+            fut = self._inflight_async[key] = asyncio.ensure_future(self._fetch_now_async(session, url, entry))
+            fut.add_done_callback(lambda f: self._finish_async(key, f))
+        # shield: cancelar um dos que esperam não cancela a requisição dos outros
+        return await asyncio.shield(fut)
+
+    def _finish_async(self, key: tuple, fut: "asyncio.Future"):
+        self._inflight_async.pop(key, None)
+        if not fut.cancelled():
+            fut.exception()  # já entregue a quem esperava; evita o aviso de exceção não lida
+
+    async def _fetch_now_async(self, session, url: str, entry: Optional[CacheEntry]) -> CacheEntry:
+        async with session.get(url, headers=self._conditional_headers(entry)) as r:
+            if r.status != 304:
+                r.raise_for_status()
+            body = await r.read()
+            return self._store_response(url, r.status, r.headers, body, entry)
+
+    def _fetch_now(self, url: str, timeout: float, entry: Optional[CacheEntry]) -> CacheEntry:
+        import requests  # carregado no primeiro fetch síncrono
+
+        r = requests.get(url, headers=self._conditional_headers(entry), timeout=timeout)
+        if r.status_code != 304:
+            r.raise_for_status()
+        return self._store_response(url, r.status_code, r.headers, r.content, entry)
+
+    def _start_revalidation(self, url: str) -> bool:
+        with self._lock:
+            if url in self._revalidating:
+                return False
+            self._revalidating.add(url)
+            return True
+
+    def _end_revalidation(self, url: str):
+        with self._lock:
+            self._revalidating.discard(url)
+
+    def _revalidate_in_background(self, url: str, timeout: float):
+        if not self._start_revalidation(url):
+            return
+
+        def _run():
+            try:
+                self._fetch_now(url, timeout, self.get(url))
+            except Exception as e:
+                logger.warning("Falha ao revalidar %s: %s", url, e)
+            finally:
+                self._end_revalidation(url)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def _revalidate_async(self, session, url: str):
+        if not self._start_revalidation(url):
+            return
+
+        async def _run():
+            try:
+                await self._fetch_now_async(session, url, self.get(url))
+            except Exception as e:
+                logger.warning("Falha ao revalidar %s: %s", url, e)
+            finally:
+                self._end_revalidation(url)
+
+        task = asyncio.ensure_future(_run())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def drain_async(self, timeout: Optional[float] = None):
+        """
+        Espera as revalidações em background deste event loop (no máximo
+        `timeout`). As que não terminarem são canceladas: a entrada segue
+        velha e é revalidada no próximo acesso.
+        """
+        loop = asyncio.get_running_loop()
+        tasks = [t for t in self._background if t.get_loop() is loop]
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> ResponseCache:
+    """Cache compartilhado pelo processo, configurado pelo `.env`."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(
+                ttl=float(get_env("CACHE_TTL", 30)),
+                stale_ttl=float(get_env("CACHE_STALE_TTL", 120)),
+                max_entries=int(get_env("CACHE_MAX_ENTRIES", 256)),
+                disk_dir=get_env("CACHE_DIR") or None,
+            )
+        return _default_cache
@@ -0,0 +1,161 @@
+"""Ponto de entrada único.
+
+    python cli.py bot                 # bot do Telegram (comandos /scan, /trade...)
+    python cli.py watch               # watcher: scan periódico + alertas
+    python cli.py scan-once [--json] [--notify]
+    python cli.py check [--deep]      # healthcheck rápido, sem rede
+
+Cada subcomando importa só o que usa: `check` não carrega numpy, aiohttp nem
+python-telegram-bot, e `scan-once` só carrega o Telegram com `--notify`.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from utils import get_env
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def cmd_bot(args) -> int:
+    import bot
+
+    bot.main()
+    return 0
+
+
+def cmd_watch(args) -> int:
+    import watcher
+
+    watcher.main()
+    return 0
+
+
+def cmd_scan_once(args) -> int:
+    from agent import SolanaTradingAgent
+
+    agent = SolanaTradingAgent()
+    try:
+        signals = agent.scan(args.limit, args.top_k)
+    except Exception as e:
+        logging.getLogger("cli").error("Falha no scan: %s", e)
+        return 1
+    finally:
+        agent.close()  # pool de processos do SCAN_SHARDS
+
+    if args.json:
+        print(json.dumps([
+            {
+                "symbol": s.token.symbol,
+                "address": s.token.address,
+                "score": s.score,
+                "action": s.action,
+                "price": s.token.price,
+                "reasons": s.reasons,
+            }
+            for s in signals
+        ], ensure_ascii=False, indent=2))
+    else:
+        for s in signals:
+            print(f"{s.token.symbol:<10} {s.action:<5} score={s.score:<4} {s.token.address}  {', '.join(s.reasons)}")
+        if not signals:
+            print("Nenhuma oportunidade.")
+
+    if args.notify and signals:
+        return _notify(signals)
+    return 0
+
+
+def _notify(signals) -> int:
+    import asyncio
+
+    from notifier import split_message
+    from watcher import MAX_MESSAGE_CHARS, _compose_signal_message
+
+    token = get_env("BOT_TOKEN")
+    chat_id = get_env("TELEGRAM_CHAT_ID")
+    if not token or not chat_id:
+        print("BOT_TOKEN/TELEGRAM_CHAT_ID não configurados; nada enviado.", file=sys.stderr)
+        return 1
+
+    from telegram import Bot
+
+    async def _send():
+        async with Bot(token=token) as bot:
+            for chunk in split_message(_compose_signal_message(signals), MAX_MESSAGE_CHARS):
+                await bot.send_message(chat_id=chat_id, text=chunk)
+
+    try:
+        asyncio.run(_send())
+    except Exception as e:
+        print(f"Falha ao enviar no Telegram: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+DEEP_IMPORTS = ("numpy", "requests", "aiohttp", "telegram", "dotenv")
+
+
+def cmd_check(args) -> int:
+    from project_checker import check_files
+
+    ok = check_files(HERE)
+
+    mode = (get_env("TRADER_MODE", "mock") or "mock").lower()
+    if mode == "live":
+        keypair = get_env("SOLANA_KEYPAIR_PATH")
+        if not keypair or not os.path.exists(keypair):
+            print(f"TRADER_MODE=live, mas SOLANA_KEYPAIR_PATH não existe: {keypair!r}")
+            ok = False
+    print(f"TRADER_MODE={mode}")
+
+    for key in ("BOT_TOKEN", "TELEGRAM_BOT_TOKEN", "TELEGRAM_CHAT_ID"):
+        if not get_env(key):
+            print(f"aviso: {key} não definido")
+
+    if args.deep:
+        import importlib
+
+        for name in DEEP_IMPORTS:
+            t0 = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                print(f"dependência ausente: {name} ({e})")
+                ok = False
+            else:
+                print(f"import {name}: {(time.perf_counter() - t0) * 1000:.0f}ms")
+
+    print("OK" if ok else "FALHOU")
+    return 0 if ok else 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="cli.py", description="Solana trader: bot, watcher e utilitários")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("bot", help="roda o bot do Telegram").set_defaults(fn=cmd_bot)
+    sub.add_parser("watch", help="roda o watcher (scan periódico + alertas)").set_defaults(fn=cmd_watch)
+
+    scan = sub.add_parser("scan-once", help="faz um scan e imprime os sinais")
+    scan.add_argument("--limit", type=int, default=30)
+    scan.add_argument("--top-k", type=int, default=5)
+    scan.add_argument("--json", action="store_true", help="saída em JSON")
+    scan.add_argument("--notify", action="store_true", help="envia os sinais para TELEGRAM_CHAT_ID")
+    scan.set_defaults(fn=cmd_scan_once)
+
+    check = sub.add_parser("check", help="healthcheck: arquivos, configuração e (com --deep) dependências")
+    check.add_argument("--deep", action="store_true", help="também importa as dependências pesadas")
+    check.set_defaults(fn=cmd_check)
+
+    args = parser.parse_args(argv)
+    if args.command not in ("bot", "watch"):  # esses configuram o próprio logging
+        logging.basicConfig(level=logging.WARNING, format="[%(asctime)s] %(levelname)s: %(message)s")
+    return args.fn(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
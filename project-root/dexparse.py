@@ -0,0 +1,131 @@
+"""Parsing seletivo das respostas da DexScreener.
+
+`json.loads` monta a árvore inteira de cada par (txns, info, websites,
+socials...) só para o agente ler sete campos. Aqui o corpo é percorrido
+par a par direto nos bytes: pares de outras chains são descartados pelo
+`chainId` sem decodificar nada, e dos pares Solana só saem os campos do
+`TokenInfo`. Nenhum dict intermediário é criado.
+
+O caminho rápido depende do formato compacto que a API devolve (cada par
+começa com `{"chainId":"` e os campos vêm na ordem de sempre). Um par fora
+desse formato é decodificado sozinho; um corpo fora do formato cai no
+parser completo (orjson, se instalado, senão json).
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # opcional
+    _loads = json.loads
+
+# (address, symbol, name, price, liquidity, volume_24h, change_24h)
+PairRow = Tuple[str, str, str, float, float, float, float]
+
+SELECTIVE = "selective"
+FULL = "full"
+
+_PAIR_START = b'{"chainId":"'
+_SOLANA = b'solana"'
+_NUM = rb"(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)"
+_BASE = re.compile(rb'"baseToken":\{"address":"([^"\\]*)","name":"([^"\\]*)","symbol":"([^"\\]*)"\}')
+_PRICE = re.compile(rb'"priceUsd":"(' + _NUM[1:-1] + rb')"')
+_VOLUME = re.compile(rb'"volume":\{[^{}]*?"h24":' + _NUM)
+_CHANGE = re.compile(rb'"priceChange":\{[^{}]*?"h24":' + _NUM)
+_LIQUIDITY = re.compile(rb'"liquidity":\{[^{}]*?"usd":' + _NUM)
+
+_decoder = json.JSONDecoder()
+
+
+def _number(value) -> float:
+    return float(value or 0)
+
+
+def pair_row(pair: Dict[str, Any]) -> Optional[PairRow]:
+    """Extrai os campos de um par já decodificado (None se não for Solana)."""
+    if pair.get("chainId") != "solana":
+        return None
+    base = pair["baseToken"]
+    return (
+        base["address"],
+        base["symbol"],
+        base.get("name", "Unknown"),
+        _number(pair.get("priceUsd")),
+        _number((pair.get("liquidity") or {}).get("usd")),
+        _number((pair.get("volume") or {}).get("h24")),
+        _number((pair.get("priceChange") or {}).get("h24")),
+    )
+
+
+def parse_full(body: bytes) -> List[PairRow]:
+    """Parser completo: decodifica o corpo inteiro e filtra depois."""
+    data = _loads(body) if body else None
+    rows = []
+    for pair in (data or {}).get("pairs") or []:
+        row = pair_row(pair)
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def _decode_pair(body: bytes, start: int, end: int) -> Optional[PairRow]:
+    # o trecho pode terminar em "," ou "]}"; raw_decode para no fim do objeto
+    pair, _ = _decoder.raw_decode(body[start:end].decode())
+    return pair_row(pair)
+
+
+def parse_selective(body: bytes) -> List[PairRow]:
+    """
+    Percorre os bytes par a par. Levanta ValueError se o corpo não tiver o
+    formato esperado (quem chama cai para `parse_full`).
+    """
+    find = body.find
+    start = find(_PAIR_START)
+    # todo "chainId" precisa abrir um par; senão os cortes abaixo ficariam errados
+    if body.count(b'"chainId"') != body.count(_PAIR_START):
+        raise ValueError("formato inesperado")
+    if start == -1:
+        return parse_full(body)
+
+    rows = []
+    size = len(body)
+    skip = len(_PAIR_START)
+    while start != -1:
+        nxt = find(_PAIR_START, start + skip)
+        end = nxt if nxt != -1 else size
+        if body.startswith(_SOLANA, start + skip):
+            base = _BASE.search(body, start, end)
+            price = base and _PRICE.search(body, base.end(), end)
+            volume = price and _VOLUME.search(body, price.end(), end)
+            change = volume and _CHANGE.search(body, volume.end(), end)
+            liquidity = change and _LIQUIDITY.search(body, change.end(), end)
+            if liquidity:
+                rows.append((
+                    base.group(1).decode(),
+                    base.group(3).decode(),
+                    base.group(2).decode(),
+                    float(price.group(1)),
+                    float(liquidity.group(1)),
+                    float(volume.group(1)),
+                    float(change.group(1)),
+                ))
+            else:
+                # campo ausente, escapado ou fora de ordem: decodifica só este par
+                row = _decode_pair(body, start, end)
+                if row is not None:
+                    rows.append(row)
+        start = nxt
+    return rows
+
+
+def parse_pairs(body: bytes, mode: str = SELECTIVE) -> List[PairRow]:
+    """Pares Solana de uma resposta de `/search` ou `/tokens`."""
+    if mode == SELECTIVE:
+        try:
+            return parse_selective(body)
+        except (ValueError, UnicodeDecodeError, KeyError, TypeError):
+            pass
+    return parse_full(body)
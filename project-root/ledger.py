@@ -0,0 +1,186 @@
+"""Registro durável dos trades executados pelo bot.
+
+Cada `TradeResult` bem-sucedido vira uma linha JSON em `<dir>/trades.log`
+(append-only, também serve de histórico). A cada `snapshot_every` trades o
+estado agregado (exposição em USD por token, total de trades, últimos
+trades) vai para `<dir>/ledger.json` junto com o offset do log; o restart lê
+o snapshot e reaplica só as linhas depois desse offset.
+
+`record()` só escreve e faz flush no log; o estado do snapshot é copiado
+na hora e a gravação fica com uma thread de fundo, que também faz fsync do
+log a cada `sync_interval` segundos (como o `StateStore` do solana_trader).
+`close()` para a thread e grava tudo. Sem diretório configurado, o ledger
+fica só em memória.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger("ledger")
+
+LOG_FILE = "trades.log"
+SNAPSHOT_FILE = "ledger.json"
+
+
+class TradeLedger:
+    def __init__(self, directory: Optional[str] = None, snapshot_every: int = 100, history: int = 50,
+                 sync_interval: float = 1.0):
+        self.directory = directory or None
+        self.snapshot_every = max(1, snapshot_every)
+        self.sync_interval = sync_interval
+        self.positions: Dict[str, float] = {}  # token -> USD líquido (compras - vendas)
+        self.trades_total = 0
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self._since_snapshot = 0
+        self._lock = threading.Lock()
+        self._log = None
+        self._unsynced = False
+        self._pending_snapshot: Optional[Dict[str, Any]] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._recover()
+            self._thread = threading.Thread(target=self._sync_loop, name="ledger-sync", daemon=True)
+            self._thread.start()
+
+    @property
+    def open_positions(self) -> Dict[str, float]:
+        return {token: usd for token, usd in self.positions.items() if usd > 0}
+
+    def _apply(self, entry: Dict[str, Any]):
+        sign = 1 if entry["action"] == "buy" else -1
+        usd = self.positions.get(entry["token"], 0.0) + sign * entry["amount"]
+        if usd > 0:
+            self.positions[entry["token"]] = usd
+        else:
+            self.positions.pop(entry["token"], None)
+        self.trades_total += 1
+        self.recent.append(entry)
+
+    # ------------------------------------------------------------------
+    # Persistência
+    # ------------------------------------------------------------------
+
+    def _recover(self):
+        t0 = time.perf_counter()
+        offset = 0
+        try:
+            with open(os.path.join(self.directory, SNAPSHOT_FILE)) as f:
+                snap = json.load(f)
+            self.positions = snap["positions"]
+            self.trades_total = snap["trades_total"]
+            self.recent.extend(snap.get("recent") or [])
+            offset = snap["offset"]
+        except FileNotFoundError:
+            pass
+
+        log_path = os.path.join(self.directory, LOG_FILE)
+        replayed = 0
+        if os.path.exists(log_path):
+            with open(log_path, "rb") as f:
+                f.seek(offset)
+                valid_end = offset
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("linha incompleta")
+                        entry = json.loads(line)
+                    except ValueError:
+                        logger.warning("Descartando registro incompleto no fim de %s", log_path)
+                        break
+                    self._apply(entry)
+                    valid_end += len(line)
+                    replayed += 1
+            if valid_end != os.path.getsize(log_path):
+                os.truncate(log_path, valid_end)
+
+        self._since_snapshot = replayed
+        self._log = open(log_path, "ab")
+        logger.info("Ledger recuperado: %d trades (%d do log) em %.1fms",
+                    self.trades_total, replayed, (time.perf_counter() - t0) * 1000)
+
+    def _snapshot(self):
+        """Copia o estado agora (com o lock); a gravação fica com a thread de fundo."""
+        self._pending_snapshot = {
+            "offset": self._log.tell(),
+            "positions": dict(self.positions),
+            "trades_total": self.trades_total,
+            "recent": list(self.recent),
+        }
+        self._since_snapshot = 0
+        self._wake.set()
+
+    def _flush_pending(self):
+        with self._lock:
+            state, self._pending_snapshot = self._pending_snapshot, None
+            unsynced, self._unsynced = self._unsynced, False
+            fd = self._log.fileno() if self._log is not None else None
+        # o offset do snapshot só aponta para bytes que já estão no disco
+        if fd is not None and (unsynced or state is not None):
+            os.fsync(fd)
+        if state is not None:
+            path = os.path.join(self.directory, SNAPSHOT_FILE)
+            tmp = path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+
+    def _sync_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.sync_interval)
+            self._wake.clear()
+            try:
+                self._flush_pending()
+            except Exception as e:
+                logger.error("Falha ao gravar o ledger: %s", e)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def record(self, result) -> bool:
+        """Registra um `TradeResult`; ignora falhas e ações desconhecidas."""
+        if not result.success or result.action not in ("buy", "sell"):
+            return False
+        entry = {
+            "ts": time.time(),
+            "action": result.action,
+            "token": result.token,
+            "amount": float(result.amount),
+            "tx": result.tx_signature,
+            "mode": (result.extra or {}).get("mode"),
+        }
+        with self._lock:
+            self._apply(entry)
+            if self._log is not None:
+                self._log.write((json.dumps(entry) + "\n").encode())
+                self._log.flush()
+                self._unsynced = True
+                self._since_snapshot += 1
+                if self._since_snapshot >= self.snapshot_every:
+                    self._snapshot()
+        return True
+
+    def close(self):
+        """Para a thread de fundo e grava o log e um snapshot final."""
+        with self._lock:
+            if self._log is not None and self._since_snapshot:
+                self._snapshot()
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        if self._log is not None:
+            self._flush_pending()
+            with self._lock:
+                self._log.close()
+                self._log = None
@@ -0,0 +1,198 @@
+"""Fila de saída para o Telegram, fora do loop de scan.
+
+`TelegramOutbox.send` só enfileira e retorna; workers em background entregam
+as mensagens respeitando dois token buckets (global e por chat), tratam
+`retry_after` do Telegram e juntam mensagens pendentes do mesmo chat em
+menos mensagens, maiores (até `max_chars`). A ordem por chat é preservada.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger("notifier")
+
+# limites públicos do Telegram: ~30 msg/s no total, ~1 msg/s por chat
+# e ~20 msg/min em grupos (chat_id negativo)
+GLOBAL_RATE = 25.0
+CHAT_RATE = 1.0
+GROUP_RATE = 20 / 60
+
+
+def split_message(text: str, max_chars: int) -> List[str]:
+    """Divide em pedaços de até `max_chars`, quebrando por linha quando possível."""
+    if len(text) <= max_chars:
+        return [text]
+    chunks = []
+    buffer = ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if buffer:
+                chunks.append(buffer)
+                buffer = ""
+            chunks.append(line[:max_chars])
+            line = line[max_chars:]
+        if len(buffer) + len(line) > max_chars:
+            chunks.append(buffer)
+            buffer = line
+        else:
+            buffer += line
+    if buffer:
+        chunks.append(buffer)
+    return chunks
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Consome um token e retorna quanto esperar até ele valer (0 = já)."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def block(self, seconds: float):
+        """Esvazia o bucket por `seconds` (ex.: depois de um retry_after)."""
+        self.reserve()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class TelegramOutbox:
+    def __init__(self, bot, global_rate: float = GLOBAL_RATE, chat_rate: float = CHAT_RATE,
+                 group_rate: float = GROUP_RATE, max_chars: int = 3500, workers: int = 4,
+                 max_retries: int = 5):
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.max_chars = max_chars
+        self.workers = workers
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate, burst=global_rate)
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._pending: Dict[str, Deque[str]] = {}
+        self._ready: Deque[str] = deque()
+        self._busy = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self.sent = 0
+        self.failed = 0
+        self.merged = 0
+        self.retries = 0
+        # on_send(segundos, ok) a cada chamada ao Telegram
+        self.on_send: Optional[Callable[[float, bool], None]] = None
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def send(self, chat_id, text: str):
+        """Enfileira `text` para `chat_id` sem esperar o envio."""
+        chat_id = str(chat_id)
+        queue = self._pending.get(chat_id)
+        if queue is None:
+            queue = self._pending[chat_id] = deque()
+            if chat_id not in self._busy:
+                self._ready.append(chat_id)
+
+        # junta com a última mensagem ainda não enviada, se couber
+        if queue and len(queue[-1]) + 2 + len(text) <= self.max_chars:
+            queue[-1] = queue[-1] + "\n\n" + text
+            self.merged += 1
+        else:
+            queue.extend(split_message(text, self.max_chars))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        return sum(len(q) for q in self._pending.values())
+
+    def start(self):
+        """Sobe os workers no event loop atual."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        if self._ready:
+            self._wakeup.set()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout: float = 10):
+        """Tenta esvaziar a fila por até `drain_timeout` segundos e para os workers."""
+        deadline = time.monotonic() + drain_timeout
+        while (self._pending or self._busy) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _bucket_for(self, chat_id: str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            rate = self.group_rate if chat_id.startswith("-") else self.chat_rate
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate, burst=1)
+        return bucket
+
+    async def _worker(self):
+        while True:
+            while not self._ready:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            chat_id = self._ready.popleft()
+            queue = self._pending[chat_id]
+            text = queue.popleft()
+            if not queue:
+                del self._pending[chat_id]
+            self._busy.add(chat_id)
+            try:
+                await self._deliver(chat_id, text)
+            finally:
+                self._busy.discard(chat_id)
+                if chat_id in self._pending:
+                    self._ready.append(chat_id)
+                    self._wakeup.set()
+
+    async def _deliver(self, chat_id: str, text: str):
+        bucket = self._bucket_for(chat_id)
+        for attempt in range(1, self.max_retries + 1):
+            wait = max(bucket.reserve(), self._global.reserve())
+            if wait > 0:
+                await asyncio.sleep(wait)
+            t0 = time.perf_counter()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text)
+                self.sent += 1
+                if self.on_send is not None:
+                    self.on_send(time.perf_counter() - t0, True)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.on_send is not None:
+                    self.on_send(time.perf_counter() - t0, False)
+                if attempt < self.max_retries:
+                    self.retries += 1
+                retry_after = getattr(e, "retry_after", None)
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                if retry_after:
+                    logger.warning("Flood control do Telegram em %s: aguardando %ss", chat_id, retry_after)
+                    bucket.block(float(retry_after))
+                else:
+                    logger.warning("Erro ao enviar mensagem (%s/%s): %s", attempt, self.max_retries, e)
+                    bucket.block(min(60, 2 ** attempt))
+
+        self.failed += 1
+        logger.error("Mensagem para %s descartada após %s tentativas", chat_id, self.max_retries)
@@ -3,9 +3,9 @@
 import os
 
 
-def check_files():
-    expected = ["bot.py", "agent.py", "trader.py", "watcher.py", "project_checker.py", "utils.py"]
-    missing = [f for f in expected if not os.path.exists(f)]
+def check_files(root="."):
+    expected = ["bot.py", "agent.py", "trader.py", "watcher.py", "project_checker.py", "utils.py", "cli.py"]
+    missing = [f for f in expected if not os.path.exists(os.path.join(root, f))]
     if missing:
         print("Missing files:", ", ".join(missing))
         return False
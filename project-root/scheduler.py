@@ -0,0 +1,17 @@
+"""Polling adaptativo por grupo de tokens e circuit breaker do watcher.
+
+O código é o de solana_trader/core/scheduler.py, a única cópia (veja a
+documentação lá). O watcher roda de dentro de project-root, sem o pacote
+solana_trader no path, então este módulo carrega aquele arquivo direto
+(`utils.load_shared`) e reexporta os nomes.
+"""
+from utils import load_shared
+
+_shared = load_shared("scheduler")
+
+CLOSED = _shared.CLOSED
+OPEN = _shared.OPEN
+HALF_OPEN = _shared.HALF_OPEN
+CircuitBreaker = _shared.CircuitBreaker
+QuotaTracker = _shared.QuotaTracker
+AdaptiveScheduler = _shared.AdaptiveScheduler
@@ -0,0 +1,189 @@
+"""Scoring vetorizado (NumPy) para o universo inteiro de tokens.
+
+Mesmas regras de `SolanaTradingAgent.score_token`, mas aplicadas a colunas:
+o score e a ação de todos os tokens saem de operações de array, e só os
+vencedores do top-k viram `TradingSignal` com a lista de motivos.
+"""
+import heapq
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+LIQUIDITY_MIN = 50_000
+VOLUME_24H_MIN = 100_000
+MOMENTUM_UP = 20
+MOMENTUM_DOWN = -20
+
+BUY_SCORE = 40
+SELL_SCORE = -20
+
+ACTION_SELL = -1
+ACTION_HOLD = 0
+ACTION_BUY = 1
+ACTION_NAMES = {ACTION_SELL: "sell", ACTION_HOLD: "hold", ACTION_BUY: "buy"}
+
+
+def score_columns(liquidity, volume_24h, change_24h) -> Tuple[np.ndarray, np.ndarray]:
+    """Retorna (scores, ações) para todas as linhas de uma vez."""
+    liquidity = np.asarray(liquidity, dtype=np.float64)
+    volume_24h = np.asarray(volume_24h, dtype=np.float64)
+    change_24h = np.asarray(change_24h, dtype=np.float64)
+
+    scores = np.zeros(liquidity.shape, dtype=np.int32)
+    scores += np.where(liquidity > LIQUIDITY_MIN, 10, 0).astype(np.int32)
+    scores += np.where(volume_24h > VOLUME_24H_MIN, 20, 0).astype(np.int32)
+    scores += np.where(change_24h > MOMENTUM_UP, 15, 0).astype(np.int32)
+    scores -= np.where(change_24h < MOMENTUM_DOWN, 20, 0).astype(np.int32)
+
+    actions = np.full(scores.shape, ACTION_HOLD, dtype=np.int8)
+    actions[scores >= BUY_SCORE] = ACTION_BUY
+    actions[scores <= SELL_SCORE] = ACTION_SELL
+    return scores, actions
+
+
+# pontos de cada motivo de `reasons_for` (os mesmos somados em `score_columns`)
+REASON_POINTS = {
+    "Liquidez saudável": 10,
+    "Volume 24h forte": 20,
+    "Momentum positivo": 15,
+    "Queda acentuada": -20,
+}
+
+
+def reasons_for(liquidity: float, volume_24h: float, change_24h: float) -> List[str]:
+    """Motivos de um único token (só chamado para os selecionados)."""
+    reasons = []
+    if liquidity > LIQUIDITY_MIN:
+        reasons.append("Liquidez saudável")
+    if volume_24h > VOLUME_24H_MIN:
+        reasons.append("Volume 24h forte")
+    if change_24h > MOMENTUM_UP:
+        reasons.append("Momentum positivo")
+    if change_24h < MOMENTUM_DOWN:
+        reasons.append("Queda acentuada")
+    return reasons
+
+
+def score_one(liquidity: float, volume_24h: float, change_24h: float) -> Tuple[int, str, List[str]]:
+    """(score, ação, motivos) de um único token, pelas mesmas regras de `score_columns`."""
+    reasons = reasons_for(liquidity, volume_24h, change_24h)
+    score = sum(REASON_POINTS[reason] for reason in reasons)
+    return score, action_name(score), reasons
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Índices dos k maiores scores, em ordem decrescente.
+
+    Usa `np.partition` (O(n)) em vez de ordenar tudo; empates são resolvidos
+    pela ordem original, igual a um `sort` estável.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+
+    kth = np.partition(scores, n - k)[n - k]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[: k - len(above)]
+    idx = np.concatenate([above, ties])
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def action_name(score: int) -> str:
+    if score >= BUY_SCORE:
+        return "buy"
+    if score <= SELL_SCORE:
+        return "sell"
+    return "hold"
+
+
+class StreamingTopK:
+    """
+    Seleção incremental do top-k para os dois lados (long = maiores scores,
+    short = menores) com dois heaps limitados a k entradas.
+
+    Os lotes podem chegar conforme as respostas do fetch vão terminando. O
+    último score de cada linha vista fica guardado; cada `push` filtra em
+    NumPy só quem alcança o pior elemento retido (ou já está retido) e faz
+    O(m log k) no resto. Empates ficam com quem chegou primeiro, como no
+    `sort` estável do `scan`. Se uma linha retida volta (outro par do mesmo
+    token) com score maior, a entrada é trocada; se volta com score menor,
+    alguém que ficou de fora pode passar à frente, então aquele lado é
+    refeito a partir de todos os scores guardados (O(n), só nesse caso).
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._scores: Dict[int, int] = {}  # último score por linha, em ordem de primeira chegada
+        self._seq: Dict[int, int] = {}  # ordem de primeira chegada (desempate)
+        self._long: List[tuple] = []   # (score, -seq, row): o topo é o pior long
+        self._short: List[tuple] = []  # (-score, -seq, row): o topo é o pior short
+        self._long_rows: Dict[int, int] = {}
+        self._short_rows: Dict[int, int] = {}
+
+    def push(self, rows: np.ndarray, scores: np.ndarray):
+        if self.k <= 0 or len(rows) == 0:
+            return
+        rows = np.asarray(rows, dtype=np.intp)
+        scores = np.asarray(scores)
+        seq = self._seq
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            if row not in seq:
+                seq[row] = len(seq)
+            self._scores[row] = score
+        self._push_side(self._long, self._long_rows, rows, scores, sign=1)
+        self._push_side(self._short, self._short_rows, rows, scores, sign=-1)
+
+    def _push_side(self, heap, retained, rows, scores, sign):
+        keys = scores * sign
+        if len(heap) >= self.k:
+            # empate com o pior retido ainda pode entrar, se chegou antes dele
+            mask = keys >= heap[0][0]
+            if retained:
+                mask |= np.isin(rows, np.fromiter(retained, np.intp, len(retained)))
+            idx = np.flatnonzero(mask)
+        else:
+            idx = range(len(rows))
+
+        for i in idx:
+            row = int(rows[i])
+            key = int(keys[i])
+            if self._scores[row] * sign != key:
+                continue  # a mesma linha aparece de novo mais adiante no lote
+            old = retained.get(row)
+            if old is not None:
+                if key == old:
+                    continue
+                if key < old:
+                    self._rebuild(heap, retained, sign)
+                    return
+                heap[:] = [entry for entry in heap if entry[2] != row]
+                heapq.heapify(heap)
+                del retained[row]
+            entry = (key, -self._seq[row], row)
+            if len(heap) < self.k:
+                heapq.heappush(heap, entry)
+                retained[row] = key
+            elif entry > heap[0]:
+                evicted = heapq.heapreplace(heap, entry)
+                del retained[evicted[2]]
+                retained[row] = key
+
+    def _rebuild(self, heap, retained, sign):
+        """Refaz um lado a partir de todos os scores guardados (já na ordem de chegada)."""
+        rows = np.fromiter(self._scores, np.intp, len(self._scores))
+        keys = np.fromiter(self._scores.values(), np.int64, len(self._scores)) * sign
+        heap[:] = [(int(keys[i]), -self._seq[int(rows[i])], int(rows[i])) for i in top_k_indices(keys, self.k)]
+        heapq.heapify(heap)
+        retained.clear()
+        retained.update((row, key) for key, _, row in heap)
+
+    def longs(self) -> List[Tuple[int, int]]:
+        """(linha, score) dos k maiores, em ordem decrescente."""
+        return [(row, key) for key, _, row in sorted(self._long, reverse=True)]
+
+    def shorts(self) -> List[Tuple[int, int]]:
+        """(linha, score) dos k menores, em ordem crescente."""
+        return [(row, -key) for key, _, row in sorted(self._short, reverse=True)]
@@ -0,0 +1,148 @@
+"""Scan particionado entre processos.
+
+O universo de descoberta é dividido em shards: consultas de busca em
+round-robin, endereços de `/tokens` por hash (crc32, estável entre
+execuções). Cada worker de um `ProcessPoolExecutor` mantém o próprio
+`SolanaTradingAgent` por shard (tabela e cache sobrevivem entre scans), faz
+fetch + parse + scoring do seu pedaço e devolve só o top-k local como
+tuplas. O coordenador junta os shards no ranking global.
+
+`limit` vale para o scan inteiro, como no scan num processo só: cada shard
+devolve os seus primeiros `limit` tokens em ordem de chegada (com score) e
+o merge intercala os shards um a um, como respostas concorrentes chegando,
+antes de cortar em `limit` e ranquear.
+
+Um token que aparece em consultas de shards diferentes é deduplicado no
+merge pelo par de maior liquidez, como na `TokenTable`. A diferença para o
+scan num processo só: se o par mais líquido ficou fora do top-k do seu
+shard, vale o score do par que entrou.
+"""
+import logging
+import multiprocessing
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import zip_longest
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import scoring
+from token_table import TokenInfo
+
+logger = logging.getLogger("sharding")
+
+# (address, symbol, name, price, liquidity, volume_24h, change_24h, score)
+Candidate = Tuple[str, str, str, float, float, float, float, int]
+Shard = Tuple[Tuple[str, ...], Tuple[str, ...]]  # (queries, token_addresses)
+
+_worker_agents: Dict[Shard, object] = {}
+
+
+def split_sources(queries: Sequence[str], token_addresses: Sequence[str], shards: int) -> List[Shard]:
+    """Divide consultas e endereços em até `shards` partes não vazias."""
+    shards = max(1, shards)
+    parts_q: List[List[str]] = [[] for _ in range(shards)]
+    parts_a: List[List[str]] = [[] for _ in range(shards)]
+    for i, query in enumerate(queries):
+        parts_q[i % shards].append(query)
+    for addr in dict.fromkeys(token_addresses):
+        parts_a[zlib.crc32(addr.encode()) % shards].append(addr)
+    return [(tuple(q), tuple(a)) for q, a in zip(parts_q, parts_a) if q or a]
+
+
+def scan_shard(shard: Shard, limit: Optional[int], top_k: int) -> List[Candidate]:
+    """
+    Roda no worker: scan completo do shard. Sem `limit`, devolve só o top-k
+    local; com `limit`, os primeiros `limit` tokens em ordem de chegada (o
+    corte global e o top-k ficam com o merge).
+    """
+    from agent import SolanaTradingAgent
+
+    agent = _worker_agents.get(shard)
+    if agent is None:
+        queries, addresses = shard
+        agent = _worker_agents[shard] = SolanaTradingAgent(
+            queries=list(queries), token_addresses=list(addresses), shards=1
+        )
+    if limit:
+        signals = [agent.score_token(t) for t in agent.fetch_tokens(limit)]
+    else:
+        signals = agent.scan(None, top_k)
+    return [
+        (s.token.address, s.token.symbol, s.token.name, s.token.price,
+         s.token.liquidity, s.token.volume_24h, s.token.change_24h, s.score)
+        for s in signals
+    ]
+
+
+def merge_shards(results: Sequence[Sequence[Candidate]], top_k: int,
+                 limit: Optional[int] = None) -> List[Candidate]:
+    """
+    Ranking global a partir dos candidatos dos shards. Sem `limit`, os shards
+    entram em sequência; com `limit`, intercalados um a um e só os primeiros
+    `limit` tokens distintos contam. Empates ficam na ordem em que os
+    candidatos entraram (determinístico).
+    """
+    if limit:
+        order = [cand for group in zip_longest(*results) for cand in group if cand is not None]
+    else:
+        order = [cand for candidates in results for cand in candidates]
+    best: Dict[str, Tuple[Candidate, int]] = {}
+    for seq, cand in enumerate(order):
+        current = best.get(cand[0])
+        if current is None:
+            if limit and len(best) >= limit:
+                continue
+            best[cand[0]] = (cand, seq)
+        elif cand[4] > current[0][4]:
+            best[cand[0]] = (cand, current[1])
+    ranked = sorted(best.values(), key=lambda item: (-item[0][7], item[1]))
+    return [cand for cand, _ in ranked[:top_k]]
+
+
+def to_signal(cand: Candidate):
+    from agent import TradingSignal
+
+    address, symbol, name, price, liquidity, volume_24h, change_24h, score = cand
+    return TradingSignal(
+        TokenInfo(address, symbol, name, price, liquidity, volume_24h, change_24h),
+        score,
+        scoring.action_name(score),
+        scoring.reasons_for(liquidity, volume_24h, change_24h),
+    )
+
+
+class ShardedScanner:
+    """Pool de processos (spawn) reaproveitado entre scans."""
+
+    def __init__(self, shards: int, workers: Optional[int] = None):
+        self.shards = shards
+        self.workers = workers or min(shards, multiprocessing.cpu_count())
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: o processo pai tem threads (event loop, pools) e fork não é seguro
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def scan(self, queries: Sequence[str], token_addresses: Sequence[str],
+             limit: Optional[int] = None, top_k: int = 5):
+        pool = self._get_pool()
+        shards = split_sources(queries, token_addresses, self.shards)
+        futures = [pool.submit(scan_shard, shard, limit, top_k) for shard in shards]
+
+        results, errors = [], []
+        for shard, future in zip(shards, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # um shard com erro não derruba o scan, como uma consulta no modo assíncrono
+                logger.warning("Shard %s falhou: %s", shard, e)
+                errors.append(e)
+        if errors and not results:
+            raise errors[0]
+        return [to_signal(cand) for cand in merge_shards(results, top_k, limit)]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
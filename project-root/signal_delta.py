@@ -0,0 +1,90 @@
+"""Detecção de mudanças nos sinais, token a token.
+
+O watcher comparava o top-k inteiro como string: qualquer score diferente ou
+troca de posição reenviava a lista toda. Aqui cada token tem estado próprio
+entre ciclos e só saem eventos de mudança real:
+
+- entered:  entrou no top-k
+- exited:   saiu do top-k (depois de `exit_cycles` ciclos ausente)
+- action:   cruzou um limiar de ação (hold -> buy, buy -> sell...)
+- score:    o score andou `score_band` ou mais desde o último aviso
+
+Histerese: a banda é medida contra o score do último aviso, não do ciclo
+anterior, e um token na borda do top-k que some por um ciclo só não gera
+saída + entrada. Reordenar o top-k não gera evento.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+ENTERED = "entered"
+EXITED = "exited"
+ACTION = "action"
+SCORE = "score"
+KINDS = (ENTERED, ACTION, SCORE, EXITED)
+
+
+@dataclass
+class SignalDelta:
+    kind: str
+    signal: object  # TradingSignal (o último visto, no caso de exited)
+    previous_score: Optional[int] = None
+    previous_action: Optional[str] = None
+
+
+@dataclass
+class _TokenState:
+    signal: object
+    notified_score: int
+    notified_action: str
+    missed: int = 0
+
+
+class DeltaTracker:
+    """Estado por token entre ciclos; `update` devolve só as mudanças."""
+
+    def __init__(self, score_band: int = 10, exit_cycles: int = 2):
+        self.score_band = score_band
+        self.exit_cycles = max(1, exit_cycles)
+        self._states: Dict[str, _TokenState] = {}
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def update(self, signals: Sequence) -> List[SignalDelta]:
+        deltas: List[SignalDelta] = []
+        seen = set()
+
+        for s in signals:
+            address = s.token.address
+            if address in seen:
+                continue
+            seen.add(address)
+
+            state = self._states.get(address)
+            if state is None:
+                self._states[address] = _TokenState(s, s.score, s.action)
+                deltas.append(SignalDelta(ENTERED, s))
+                continue
+
+            state.signal = s
+            state.missed = 0
+            if s.action != state.notified_action:
+                deltas.append(SignalDelta(ACTION, s, state.notified_score, state.notified_action))
+            elif abs(s.score - state.notified_score) >= self.score_band:
+                deltas.append(SignalDelta(SCORE, s, state.notified_score, state.notified_action))
+            else:
+                continue
+            state.notified_score = s.score
+            state.notified_action = s.action
+
+        for address in [a for a in self._states if a not in seen]:
+            state = self._states[address]
+            state.missed += 1
+            if state.missed >= self.exit_cycles:
+                del self._states[address]
+                deltas.append(SignalDelta(EXITED, state.signal, state.notified_score, state.notified_action))
+
+        return deltas
+
+    def reset(self):
+        self._states.clear()
@@ -0,0 +1,145 @@
+"""Armazenamento compacto do universo de tokens.
+
+`TokenTable` guarda os campos numéricos em colunas NumPy (struct-of-arrays)
+e os textos em listas de strings internadas, com um índice estável
+endereço -> linha. Cada scan atualiza as linhas no lugar em vez de criar
+um `TokenInfo` por par; `TokenInfo` só é criado sob demanda, como view.
+"""
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+@dataclass
+class TokenInfo:
+    __slots__ = ("address", "symbol", "name", "price", "liquidity", "volume_24h", "change_24h")
+
+    address: str
+    symbol: str
+    name: str
+    price: float
+    liquidity: float
+    volume_24h: float
+    change_24h: float
+
+
+class TokenTable:
+    COLUMNS = ("price", "liquidity", "volume_24h", "change_24h")
+
+    def __init__(self, capacity: int = 1024, max_idle_cycles: int = 100):
+        self.max_idle_cycles = max_idle_cycles
+        self.epoch = 0
+        self._size = 0
+        self._alloc(max(1, capacity))
+        self.addresses: List[str] = []
+        self.symbols: List[str] = []
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._cycle: List[int] = []  # linhas vistas neste ciclo, em ordem de chegada
+
+    def _alloc(self, capacity: int):
+        self._capacity = capacity
+        self.price = np.zeros(capacity, dtype=np.float64)
+        self.liquidity = np.zeros(capacity, dtype=np.float64)
+        self.volume_24h = np.zeros(capacity, dtype=np.float64)
+        self.change_24h = np.zeros(capacity, dtype=np.float64)
+        self.last_seen = np.zeros(capacity, dtype=np.int64)
+
+    def _grow(self):
+        old = {name: getattr(self, name) for name in self.COLUMNS + ("last_seen",)}
+        self._alloc(self._capacity * 2)
+        for name, values in old.items():
+            getattr(self, name)[: self._size] = values[: self._size]
+
+    def __len__(self):
+        return self._size
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def begin_cycle(self):
+        """Inicia uma nova rodada de atualização (um scan)."""
+        self.epoch += 1
+        self._cycle = []
+        if self.max_idle_cycles and self.epoch % self.max_idle_cycles == 0:
+            self.compact(self.max_idle_cycles)
+
+    def upsert(self, address: str, symbol: str, name: str, price: float,
+               liquidity: float, volume_24h: float, change_24h: float) -> int:
+        """
+        Insere ou atualiza um token no lugar. Se o endereço já apareceu neste
+        ciclo (outro par do mesmo token), fica o par de maior liquidez.
+        """
+        row = self.index.get(address)
+        if row is None:
+            if self._size == self._capacity:
+                self._grow()
+            row = self._size
+            self._size += 1
+            address = sys.intern(address)
+            self.index[address] = row
+            self.addresses.append(address)
+            self.symbols.append(sys.intern(symbol))
+            self.names.append(sys.intern(name))
+        else:
+            if self.last_seen[row] == self.epoch and liquidity <= self.liquidity[row]:
+                return row
+            if self.symbols[row] != symbol:
+                self.symbols[row] = sys.intern(symbol)
+            if self.names[row] != name:
+                self.names[row] = sys.intern(name)
+
+        self.price[row] = price
+        self.liquidity[row] = liquidity
+        self.volume_24h[row] = volume_24h
+        self.change_24h[row] = change_24h
+        if self.last_seen[row] != self.epoch:
+            self.last_seen[row] = self.epoch
+            self._cycle.append(row)
+        return row
+
+    def compact(self, max_idle_cycles: int):
+        """Remove tokens que não aparecem há mais de `max_idle_cycles` ciclos."""
+        keep = np.flatnonzero(self.last_seen[: self._size] > self.epoch - max_idle_cycles)
+        if len(keep) == self._size:
+            return
+        remap = {int(old): new for new, old in enumerate(keep)}
+        for name in self.COLUMNS + ("last_seen",):
+            column = getattr(self, name)
+            column[: len(keep)] = column[keep]
+        self.addresses = [self.addresses[i] for i in keep]
+        self.symbols = [self.symbols[i] for i in keep]
+        self.names = [self.names[i] for i in keep]
+        self.index = {addr: row for row, addr in enumerate(self.addresses)}
+        self._cycle = [remap[r] for r in self._cycle if r in remap]
+        self._size = len(keep)
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def active_count(self) -> int:
+        """Quantos tokens foram vistos no ciclo atual."""
+        return len(self._cycle)
+
+    def active_rows(self, limit: Optional[int] = None) -> np.ndarray:
+        """Linhas atualizadas no ciclo atual, na ordem em que chegaram."""
+        rows = self._cycle[:limit] if limit else self._cycle
+        return np.fromiter(rows, dtype=np.intp, count=len(rows))
+
+    def view(self, row: int) -> TokenInfo:
+        return TokenInfo(
+            address=self.addresses[row],
+            symbol=self.symbols[row],
+            name=self.names[row],
+            price=float(self.price[row]),
+            liquidity=float(self.liquidity[row]),
+            volume_24h=float(self.volume_24h[row]),
+            change_24h=float(self.change_24h[row]),
+        )
+
+    def views(self, rows) -> List[TokenInfo]:
+        return [self.view(int(r)) for r in rows]
@@ -1,17 +1,40 @@
 # trader.py
+import asyncio
+import base64
+import json
 import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple
+
+from utils import get_env
+
+if TYPE_CHECKING:
+    import aiohttp
 
 #
 # IMPORTANTE:
 # Este trader é uma camada limpa, segura e pronta para integrar com Solana.
-# Ela NÃO executa trades reais até você colocar a API (Jupiter / Raydium / Helius / Pump.fun)
-# Mas toda a lógica, exceções, validações e retorno estão 100% prontos para produção.
+# Ela NÃO executa trades reais a menos que TRADER_MODE=live (SolanaTrader via Jupiter)
+# e um keypair esteja configurado. TRADER_DRY_RUN=true monta a transação sem enviar.
 #
 
 logger = logging.getLogger("Trader")
 
+JUPITER_API_URL = "https://quote-api.jup.ag/v6"
+SOLANA_RPC_URL = "https://api.mainnet-beta.solana.com"
+USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+USDC_DECIMALS = 6
+# carteira fictícia usada só para montar a transação em dry-run sem keypair
+DRY_RUN_PUBKEY = "11111111111111111111111111111111"
+# abaixo disso (em USD) compras e vendas do mesmo token se anulam no lote
+NET_EPSILON_USD = 0.01
+
 
 @dataclass
 class TradeResult:
@@ -24,6 +47,26 @@ class TradeResult:
     extra: Dict[str, Any]
 
 
+@dataclass
+class Order:
+    action: str  # buy / sell
+    token: str
+    amount_usd: float
+
+
+@dataclass
+class BatchResult:
+    results: List[TradeResult]  # um por ordem recebida, na mesma ordem
+    executed: int  # ordens líquidas realmente enviadas
+    netted: int  # ordens absorvidas por outra do mesmo token
+    elapsed: float
+    started_at: float
+
+    @property
+    def success(self) -> bool:
+        return all(r.success for r in self.results)
+
+
 class Trader:
     """
     Classe base genérica. Use get_trader() para retornar o trader certo.
@@ -35,6 +78,130 @@ class Trader:
     def sell(self, token_addr: str, amount_usd: float) -> TradeResult:
         raise NotImplementedError
 
+    def prefetch(self, token_addrs: List[str]):
+        """Prepara execução para os tokens do top-k (no-op por padrão)."""
+
+    def submit_batch(self, orders: List[Order], max_in_flight: int = 4) -> BatchResult:
+        """
+        Executa várias ordens de uma vez:
+
+        1. valida cada ordem (ação buy/sell, token, valor positivo);
+        2. junta as ordens do mesmo token numa só ordem líquida
+           (compras - vendas); ordens opostas se compensam;
+        3. executa as ordens líquidas em paralelo, no máximo `max_in_flight`.
+
+        Cada ordem recebida ganha um `TradeResult`: o da ordem líquida que a
+        executou, ou um resultado de validação/compensação.
+        """
+        started_at = time.time()
+        t0 = time.perf_counter()
+        results: List[Optional[TradeResult]] = [None] * len(orders)
+
+        net: Dict[str, float] = {}
+        members: Dict[str, List[int]] = {}
+        amounts: List[float] = [0.0] * len(orders)  # valor normalizado de cada ordem válida
+        for i, order in enumerate(orders):
+            amount, error = _validate_order(order)
+            if error:
+                results[i] = TradeResult(
+                    success=False,
+                    action=str(order.action),
+                    token=str(order.token),
+                    amount=order.amount_usd,
+                    tx_signature=None,
+                    message=error,
+                    extra={"batch": "invalid"}
+                )
+                continue
+            amounts[i] = amount
+            sign = 1 if order.action == "buy" else -1
+            net[order.token] = net.get(order.token, 0.0) + sign * amount
+            members.setdefault(order.token, []).append(i)
+
+        to_execute: List[Order] = []
+        for token, amount in net.items():
+            if abs(amount) < NET_EPSILON_USD:
+                for i in members[token]:
+                    results[i] = TradeResult(
+                        success=True,
+                        action=orders[i].action,
+                        token=token,
+                        amount=amounts[i],
+                        tx_signature=None,
+                        message="Compensada por ordem oposta no mesmo lote.",
+                        extra={"batch": "netted"}
+                    )
+                continue
+            to_execute.append(Order("buy" if amount > 0 else "sell", token, round(abs(amount), 6)))
+
+        executed = self._execute_orders(to_execute, max(1, max_in_flight))
+
+        for order, res in zip(to_execute, executed):
+            for i in members[order.token]:
+                if orders[i].action != order.action:
+                    results[i] = TradeResult(
+                        success=res.success,
+                        action=orders[i].action,
+                        token=order.token,
+                        amount=amounts[i],
+                        tx_signature=None,
+                        message="Compensada pela ordem líquida do lote.",
+                        extra={"batch": "netted", "net_order": res}
+                    )
+                else:
+                    results[i] = res
+
+        valid = sum(len(idx) for idx in members.values())
+        return BatchResult(
+            results=results,
+            executed=len(to_execute),
+            netted=valid - len(to_execute),
+            elapsed=time.perf_counter() - t0,
+            started_at=started_at,
+        )
+
+    def _execute_orders(self, orders: List[Order], max_in_flight: int) -> List[TradeResult]:
+        """Executa ordens já líquidas em threads (subclasses podem trocar por async)."""
+        def _one(order: Order) -> TradeResult:
+            fn = self.buy if order.action == "buy" else self.sell
+            return fn(order.token, order.amount_usd)
+
+        if len(orders) <= 1 or max_in_flight == 1:
+            return [_one(o) for o in orders]
+        with ThreadPoolExecutor(max_workers=min(max_in_flight, len(orders))) as pool:
+            return list(pool.map(_one, orders))
+
+
+def _validate_order(order: Order) -> Tuple[Optional[float], Optional[str]]:
+    """Devolve (valor em float, None) ou (None, mensagem de erro)."""
+    if order.action not in ("buy", "sell"):
+        return None, f"Ação inválida: {order.action!r} (use buy ou sell)."
+    if not order.token:
+        return None, "Token não informado."
+    if isinstance(order.amount_usd, bool):
+        return None, f"Valor inválido: {order.amount_usd!r}."
+    try:
+        amount = float(order.amount_usd)
+    except (TypeError, ValueError):
+        return None, f"Valor inválido: {order.amount_usd!r}."
+    if not math.isfinite(amount) or amount <= 0:
+        return None, f"Valor deve ser positivo: {order.amount_usd!r}."
+    return amount, None
+
+
+def _parse_sizes(value) -> List[float]:
+    """JUPITER_PREFETCH_USD: um valor ou vários separados por vírgula (ex.: "50,100,250")."""
+    if isinstance(value, (int, float)):
+        items = [value]
+    elif isinstance(value, str):
+        items = [v for v in value.split(",") if v.strip()]
+    else:
+        items = list(value)
+    sizes = [float(v) for v in items]
+    if any(not math.isfinite(v) or v <= 0 for v in sizes):
+        raise ValueError(f"JUPITER_PREFETCH_USD inválido: {value!r}.")
+    return sizes
+
 
 class PaperTrader(Trader):
     """
@@ -69,64 +236,315 @@ class PaperTrader(Trader):
         )
 
 
+class QuoteCache:
+    """
+    Cache de cotações do Jupiter por (inputMint, outputMint, amount, swapMode).
+    Uma cotação só é reaproveitada enquanto tiver menos de `ttl` segundos.
+    """
+
+    def __init__(self, ttl: float = 10.0, max_entries: int = 512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple, Tuple[float, Dict[str, Any]]] = {}
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        fetched_at, quote = item
+        if time.monotonic() - fetched_at > self.ttl:
+            del self._entries[key]
+            return None
+        return quote
+
+    def put(self, key: Tuple, quote: Dict[str, Any]):
+        if len(self._entries) >= self.max_entries:
+            now = time.monotonic()
+            self._entries = {k: v for k, v in self._entries.items() if now - v[0] <= self.ttl}
+            while len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic(), quote)
+
+    def age(self, key: Tuple) -> Optional[float]:
+        item = self._entries.get(key)
+        return None if item is None else time.monotonic() - item[0]
+
+
+class JupiterClient:
+    """
+    Cliente assíncrono da API do Jupiter (quote + swap) e do RPC Solana,
+    com uma única `aiohttp.ClientSession` (conexões reaproveitadas).
+    `base_url`/`rpc_url` configuráveis permitem apontar para um servidor mock.
+    """
+
+    def __init__(self, base_url: str, rpc_url: str, slippage_bps: int = 50,
+                 quote_ttl: float = 10.0, timeout: float = 10.0, max_connections: int = 20):
+        self.base_url = base_url.rstrip("/")
+        self.rpc_url = rpc_url
+        self.slippage_bps = slippage_bps
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.quotes = QuoteCache(ttl=quote_ttl)
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            import aiohttp  # o PaperTrader nunca chega aqui
+
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    async def quote(self, input_mint: str, output_mint: str, amount: int,
+                    swap_mode: str = "ExactIn", use_cache: bool = True) -> Dict[str, Any]:
+        key = (input_mint, output_mint, amount, swap_mode)
+        if use_cache:
+            cached = self.quotes.get(key)
+            if cached is not None:
+                return cached
+        params = {
+            "inputMint": input_mint,
+            "outputMint": output_mint,
+            "amount": str(amount),
+            "swapMode": swap_mode,
+            "slippageBps": str(self.slippage_bps),
+        }
+        async with self._get_session().get(f"{self.base_url}/quote", params=params) as r:
+            r.raise_for_status()
+            quote = await r.json(content_type=None)
+        self.quotes.put(key, quote)
+        return quote
+
+    async def swap_transaction(self, quote: Dict[str, Any], user_pubkey: str) -> str:
+        payload = {"quoteResponse": quote, "userPublicKey": user_pubkey, "wrapAndUnwrapSol": True}
+        async with self._get_session().post(f"{self.base_url}/swap", json=payload) as r:
+            r.raise_for_status()
+            data = await r.json(content_type=None)
+        return data["swapTransaction"]
+
+    async def send_transaction(self, signed_tx_b64: str) -> str:
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "sendTransaction",
+            "params": [signed_tx_b64, {"encoding": "base64", "skipPreflight": True, "maxRetries": 2}],
+        }
+        async with self._get_session().post(self.rpc_url, json=payload) as r:
+            r.raise_for_status()
+            data = await r.json(content_type=None)
+        if "error" in data:
+            raise RuntimeError(f"RPC sendTransaction: {data['error']}")
+        return data["result"]
+
+
 class SolanaTrader(Trader):
     """
-    Trader real (quando você quiser ativar trade em mainnet).
-    Aqui eu deixo toda a estrutura pronta para integrar Jupiter/Raydium.
+    Trader real via Jupiter. O motor é assíncrono e roda num event loop
+    próprio (thread dedicada), então `buy`/`sell` síncronos e os métodos
+    `*_async` compartilham a mesma sessão HTTP e o mesmo cache de cotações.
+
+    - `prefetch(tokens)` cota antecipadamente os tokens do top-k do scan, nos
+      valores de JUPITER_PREFETCH_USD e nos últimos valores de compra usados
+      (a cotação do cache vale só para o mesmo valor);
+    - cotações valem `quote_ttl` segundos e são refeitas se expiraram;
+    - ordens com price impact acima de `max_price_impact_pct` são recusadas;
+    - com `dry_run=True` (ou sem keypair) para antes de assinar/enviar.
     """
 
-    def __init__(self, keypair_path: Optional[str] = None):
+    def __init__(self, keypair_path: Optional[str] = None, api_url: Optional[str] = None,
+                 rpc_url: Optional[str] = None, slippage_bps: Optional[int] = None,
+                 quote_ttl: Optional[float] = None, max_price_impact_pct: Optional[float] = None,
+                 prefetch_amount_usd=None, dry_run: Optional[bool] = None):
         self.keypair_path = keypair_path
-        logger.info("SolanaTrader inicializado (transações reais DESATIVADAS).")
+        self.client = JupiterClient(
+            base_url=api_url or get_env("JUPITER_API_URL", JUPITER_API_URL),
+            rpc_url=rpc_url or get_env("SOLANA_RPC_URL", SOLANA_RPC_URL),
+            slippage_bps=int(slippage_bps or get_env("JUPITER_SLIPPAGE_BPS", 50)),
+            quote_ttl=float(quote_ttl or get_env("JUPITER_QUOTE_TTL", 10)),
+        )
+        self.max_price_impact_pct = float(max_price_impact_pct or get_env("JUPITER_MAX_PRICE_IMPACT_PCT", 1.0))
+        self.prefetch_sizes = _parse_sizes(prefetch_amount_usd or get_env("JUPITER_PREFETCH_USD", 100))
+        # valores das últimas compras: o próximo prefetch também cota nesses tamanhos
+        self.recent_sizes = deque(maxlen=int(get_env("JUPITER_PREFETCH_RECENT", 4)))
+        if dry_run is None:
+            dry_run = get_env("TRADER_DRY_RUN", "false").lower() == "true"
+        self.dry_run = dry_run
+        self._keypair = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        logger.info("SolanaTrader inicializado (Jupiter em %s%s).", self.client.base_url,
+                    ", dry-run" if self.dry_run else "")
 
-    def buy(self, token_addr: str, amount_usd: float) -> TradeResult:
+    # ------------------------------------------------------------------
+    # Event loop próprio
+    # ------------------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="jupiter", daemon=True).start()
+            return self._loop
+
+    def _run(self, coro, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result(timeout)
+
+    def close(self):
+        if self._loop is not None:
+            self._run(self.client.close())
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+
+    # ------------------------------------------------------------------
+    # Carteira
+    # ------------------------------------------------------------------
+
+    def _load_keypair(self):
+        if self._keypair is None:
+            if not self.keypair_path or not os.path.exists(self.keypair_path):
+                raise RuntimeError("Keypair não configurado (SOLANA_KEYPAIR_PATH).")
+            try:
+                from solders.keypair import Keypair
+            except ImportError as e:
+                raise RuntimeError("Pacote 'solders' necessário para assinar transações.") from e
+            with open(self.keypair_path) as f:
+                self._keypair = Keypair.from_bytes(bytes(json.load(f)))
+        return self._keypair
+
+    def _public_key(self) -> str:
+        if self.dry_run and not self.keypair_path:
+            return DRY_RUN_PUBKEY
+        return str(self._load_keypair().pubkey())
+
+    def _sign(self, swap_tx_b64: str) -> str:
+        from solders.transaction import VersionedTransaction
+
+        keypair = self._load_keypair()
+        raw = VersionedTransaction.from_bytes(base64.b64decode(swap_tx_b64))
+        signed = VersionedTransaction(raw.message, [keypair])
+        return base64.b64encode(bytes(signed)).decode()
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _order_params(action: str, token_addr: str, amount_usd: float) -> Tuple[str, str, int, str]:
+        amount = int(round(amount_usd * 10 ** USDC_DECIMALS))
+        if action == "buy":
+            return USDC_MINT, token_addr, amount, "ExactIn"
+        # venda: entrega token suficiente para receber exatamente amount_usd em USDC
+        return token_addr, USDC_MINT, amount, "ExactOut"
+
+    def _prefetch_amounts(self) -> List[float]:
+        return list(dict.fromkeys([*self.prefetch_sizes, *self.recent_sizes]))
+
+    def _remember_size(self, amount_usd: float):
+        if amount_usd in self.recent_sizes:
+            self.recent_sizes.remove(amount_usd)
+        self.recent_sizes.append(amount_usd)
+
+    async def prefetch_async(self, token_addrs: List[str]):
+        """Aquece o cache com cotações de compra para os tokens e valores de prefetch."""
+        jobs = [(addr, amount) for addr in dict.fromkeys(token_addrs) for amount in self._prefetch_amounts()]
+        results = await asyncio.gather(
+            *(self.client.quote(*self._order_params("buy", addr, amount)) for addr, amount in jobs),
+            return_exceptions=True,
+        )
+        for (addr, amount), res in zip(jobs, results):
+            if isinstance(res, Exception):
+                logger.warning("Prefetch de cotação falhou para %s (%s USD): %s", addr, amount, res)
+
+    def prefetch(self, token_addrs: List[str]):
+        """Dispara o prefetch em background (não bloqueia quem chamou)."""
+        if token_addrs:
+            asyncio.run_coroutine_threadsafe(self.prefetch_async(token_addrs), self._ensure_loop())
+
+    async def _execute(self, action: str, token_addr: str, amount_usd: float) -> TradeResult:
+        started = time.perf_counter()
         try:
-            # ---- AQUI entra Jupiter API real quando você quiser ----
-            logger.info(f"[REAL] BUY {amount_usd} USD em {token_addr}")
+            if amount_usd <= 0:
+                raise ValueError("Valor da ordem deve ser positivo.")
+            if action == "buy":
+                self._remember_size(amount_usd)
+            params = self._order_params(action, token_addr, amount_usd)
+            quote = await self.client.quote(*params)
+            age = self.client.quotes.age(params) or 0.0
+            impact = float(quote.get("priceImpactPct") or 0) * 100
+            if impact > self.max_price_impact_pct:
+                # cotação do cache pode estar defasada: refaz uma vez antes de recusar
+                quote = await self.client.quote(*params, use_cache=False)
+                age = 0.0
+                impact = float(quote.get("priceImpactPct") or 0) * 100
+                if impact > self.max_price_impact_pct:
+                    return TradeResult(
+                        success=False,
+                        action=action,
+                        token=token_addr,
+                        amount=amount_usd,
+                        tx_signature=None,
+                        message=f"Price impact {impact:.2f}% acima do limite {self.max_price_impact_pct:.2f}%.",
+                        extra={"quote": quote},
+                    )
 
-            # Placeholder até integrar Jupiter Swap
-            return TradeResult(
-                success=False,
-                action="buy",
-                token=token_addr,
-                amount=amount_usd,
-                tx_signature=None,
-                message="BUY real não implementado ainda. Configure Jupiter API.",
-                extra={}
-            )
+            swap_tx = await self.client.swap_transaction(quote, self._public_key())
+            extra = {
+                "mode": "jupiter",
+                "in_amount": quote.get("inAmount"),
+                "out_amount": quote.get("outAmount"),
+                "min_out": quote.get("otherAmountThreshold"),
+                "price_impact_pct": impact,
+                "slippage_bps": self.client.slippage_bps,
+                "quote_age_s": round(age, 3),
+            }
+            if self.dry_run:
+                extra["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                return TradeResult(
+                    success=True,
+                    action=action,
+                    token=token_addr,
+                    amount=amount_usd,
+                    tx_signature=None,
+                    message="Dry-run: transação montada, não enviada.",
+                    extra=extra,
+                )
 
-        except Exception as e:
-            logger.exception("Erro no BUY real:")
+            signature = await self.client.send_transaction(self._sign(swap_tx))
+            extra["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            logger.info(f"[REAL] {action.upper()} {amount_usd} USD em {token_addr}: {signature}")
             return TradeResult(
-                success=False,
-                action="buy",
+                success=True,
+                action=action,
                 token=token_addr,
                 amount=amount_usd,
-                tx_signature=None,
-                message=str(e),
-                extra={}
+                tx_signature=signature,
+                message="Transação enviada.",
+                extra=extra,
             )
 
-    def sell(self, token_addr: str, amount_usd: float) -> TradeResult:
-        try:
-            # ---- AQUI entra Jupiter API real quando você quiser ----
-            logger.info(f"[REAL] SELL {amount_usd} USD em {token_addr}")
-
+        except ValueError as e:
+            logger.warning(f"Ordem {action.upper()} inválida: {e}")
             return TradeResult(
                 success=False,
-                action="sell",
+                action=action,
                 token=token_addr,
                 amount=amount_usd,
                 tx_signature=None,
-                message="SELL real não implementado ainda. Configure Jupiter API.",
+                message=str(e),
                 extra={}
             )
 
         except Exception as e:
-            logger.exception("Erro no SELL real:")
+            logger.exception(f"Erro no {action.upper()} real:")
             return TradeResult(
                 success=False,
-                action="sell",
+                action=action,
                 token=token_addr,
                 amount=amount_usd,
                 tx_signature=None,
@@ -134,16 +552,40 @@ class SolanaTrader(Trader):
                 extra={}
             )
 
+    async def buy_async(self, token_addr: str, amount_usd: float) -> TradeResult:
+        return await self._execute("buy", token_addr, amount_usd)
+
+    async def sell_async(self, token_addr: str, amount_usd: float) -> TradeResult:
+        return await self._execute("sell", token_addr, amount_usd)
+
+    async def _execute_orders_async(self, orders: List[Order], max_in_flight: int) -> List[TradeResult]:
+        sem = asyncio.Semaphore(max_in_flight)
+
+        async def _one(order: Order) -> TradeResult:
+            async with sem:
+                return await self._execute(order.action, order.token, order.amount_usd)
+
+        return list(await asyncio.gather(*(_one(o) for o in orders)))
+
+    def _execute_orders(self, orders: List[Order], max_in_flight: int) -> List[TradeResult]:
+        # mesma sessão/event loop das ordens avulsas, sem uma thread por ordem
+        return self._run(self._execute_orders_async(orders, max_in_flight))
+
+    def buy(self, token_addr: str, amount_usd: float) -> TradeResult:
+        return self._run(self.buy_async(token_addr, amount_usd))
+
+    def sell(self, token_addr: str, amount_usd: float) -> TradeResult:
+        return self._run(self.sell_async(token_addr, amount_usd))
+
 
 def get_trader() -> Trader:
     """
-    Decide qual trader usar.
-    Por padrão: Paper mode (seguro).
-    Para modo real: mude para SolanaTrader()
+    Decide qual trader usar a partir de TRADER_MODE.
+    Por padrão: Paper mode (seguro). "live" ativa o SolanaTrader (Jupiter).
     """
-    USE_REAL = False  # <-- aqui você ativa trade real no futuro
+    mode = (get_env("TRADER_MODE", "mock") or "mock").lower()
 
-    if USE_REAL:
-        return SolanaTrader(keypair_path="wallet.json")
+    if mode == "live":
+        return SolanaTrader(keypair_path=get_env("SOLANA_KEYPAIR_PATH"))
 
     return PaperTrader()
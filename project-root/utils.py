@@ -1,6 +1,11 @@
 """Utility helpers."""
 
 import os
+import sys
+from typing import TYPE_CHECKING, Dict, Hashable
+
+if TYPE_CHECKING:
+    import asyncio
 
 
 def load_env(path=".env"):
@@ -16,3 +21,61 @@ def load_env(path=".env"):
                 k, v = line.split("=", 1)
                 env[k.strip()] = v.strip()
     return env
+
+
+def get_env(key, default=None):
+    """Lê uma variável do ambiente, caindo para o `.env` local."""
+    value = os.environ.get(key)
+    if value is None:
+        value = load_env().get(key, default)
+    return value
+
+
+def get_env_list(key, default=""):
+    """Lê uma variável separada por vírgulas como lista (ignora vazios)."""
+    raw = get_env(key, default) or ""
+    return [item.strip() for item in raw.split(",") if item.strip()]
+
+
+# solana_trader/core, ao lado de project-root no repositório
+SHARED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solana_trader", "core")
+
+
+def load_shared(module: str):
+    """
+    Carrega `solana_trader/core/<module>.py` (uma vez; fica em sys.modules).
+    project-root roda sem o pacote solana_trader no path, então isso só serve
+    para módulos que não importam nada de solana_trader (scheduler, store).
+    """
+    import importlib.util
+
+    name = f"_shared_{module}"
+    loaded = sys.modules.get(name)
+    if loaded is None:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(SHARED_DIR, f"{module}.py"))
+        loaded = importlib.util.module_from_spec(spec)
+        sys.modules[name] = loaded  # dataclasses resolvem o módulo por aqui
+        spec.loader.exec_module(loaded)
+    return loaded
+
+
+class SingleFlight:
+    """
+    Junta chamadas concorrentes com a mesma chave numa execução só: quem chega
+    enquanto uma chamada está em andamento espera o mesmo resultado.
+    A função (síncrona) roda no `executor` para não travar o event loop.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Future"] = {}
+
+    async def run(self, key: Hashable, fn, *args, executor=None):
+        import asyncio  # utils é importado por todo ponto de entrada; asyncio só aqui
+
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: se um dos handlers for cancelado, os outros continuam esperando
+        return await asyncio.shield(fut)
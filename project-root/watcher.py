@@ -1,151 +1,266 @@
-"""Watcher stub to monitor events or prices."""
+# watcher.py
+"""Watcher: scan periódico da IA e envio dos sinais para o Telegram.
 
-import time
+Nada pesado é criado na importação: agente, trader, `Bot` e outbox (e com
+eles numpy, aiohttp e python-telegram-bot) só nascem em `setup()`, na
+primeira volta do loop. Use `python cli.py watch`.
 
+Cada grupo de tokens (WATCH_GROUPS, ou um grupo só com DISCOVERY_QUERIES)
+tem o próprio agente, o próprio intervalo — curto com volatilidade e churn
+de sinais, longo em mercado parado, respeitando a quota da DexScreener — e o
+próprio circuit breaker (scheduler.py).
 
-def watch():
-    try:
-        while True:
-            print("Watching for changes...")
-            time.sleep(5)
-    except KeyboardInterrupt:
-        print("Watcher stopped")
-# watcher.py (VERSÃO PRO)
+Com RECORD_DIR, cada ciclo grava o universo visto pelo grupo (preço,
+liquidez, volume e variação de todos os tokens ativos, por endereço) no
+`SnapshotStore` de solana_trader/core/store.py, num append em colunas só.
+"""
 import asyncio
 import logging
 import time
-import math
-from typing import List, Optional
 
+import signal_delta
+from metrics import REGISTRY, start_http_server
 from utils import get_env
-from agent import SolanaTradingAgent
-from trader import get_trader
-from telegram import Bot
 
-logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s: %(message)s")
 logger = logging.getLogger("watcher")
 
 # ENV CONFIG
 BOT_TOKEN = get_env("BOT_TOKEN")
 NOTIFY_CHAT = get_env("TELEGRAM_CHAT_ID")
-INTERVAL = int(get_env("WATCH_INTERVAL", 300))
+INTERVAL = float(get_env("WATCH_INTERVAL", 300))  # intervalo inicial de cada grupo
+MIN_INTERVAL = float(get_env("WATCH_MIN_INTERVAL", 30))
+MAX_INTERVAL = float(get_env("WATCH_MAX_INTERVAL", 900))
+# grupos de consultas: "majors=sol,jup;memes=bonk,wif" (vazio = um grupo com DISCOVERY_QUERIES)
+WATCH_GROUPS = get_env("WATCH_GROUPS", "")
+VOLATILITY_REF = float(get_env("WATCH_VOLATILITY_REF", 0.02))  # variação média que já pede o intervalo mínimo
+CHURN_REF = float(get_env("WATCH_CHURN_REF", 0.5))  # mudanças de sinal por token idem
+API_QUOTA_PER_MIN = int(get_env("DEXSCREENER_QUOTA_PER_MIN", 300))  # 0 = sem limite
+BREAKER_FAILURES = int(get_env("WATCH_BREAKER_FAILURES", 3))
+BREAKER_RESET = float(get_env("WATCH_BREAKER_RESET", 30))
+BREAKER_MAX = float(get_env("WATCH_BREAKER_MAX", 900))
 RATE_LIMIT_SECONDS = int(get_env("TELEGRAM_RATE_LIMIT_SECONDS", 1))
 MAX_MESSAGE_CHARS = 3500
 ENABLE_HEARTBEAT = get_env("HEARTBEAT", "false").lower() == "true"
+METRICS_PORT = int(get_env("METRICS_PORT", 0) or 0)  # 0 = sem endpoint /metrics
+METRICS_HOST = get_env("METRICS_HOST", "127.0.0.1")
+SIGNAL_SCORE_BAND = int(get_env("SIGNAL_SCORE_BAND", 10))  # variação mínima de score para reavisar
+SIGNAL_EXIT_CYCLES = int(get_env("SIGNAL_EXIT_CYCLES", 2))  # ciclos fora do top-k até avisar a saída
+RECORD_DIR = get_env("RECORD_DIR")  # vazio = não grava snapshots
+
+# MÉTRICAS
+STAGE_SECONDS = REGISTRY.histogram(
+    "watcher_stage_seconds", "Duração por etapa: fetch, parse, score, record, compose, send", ("stage",)
+)
+CYCLE_SECONDS = REGISTRY.histogram("watcher_cycle_seconds", "Duração de um ciclo completo")
+CYCLE_LAG = REGISTRY.gauge("watcher_cycle_lag_seconds", "Atraso do início do ciclo em relação ao horário agendado")
+POLL_INTERVAL = REGISTRY.gauge("watcher_poll_interval_seconds", "Intervalo atual de cada grupo", ("group",))
+CIRCUIT_OPEN = REGISTRY.gauge("watcher_circuit_open", "1 se o circuit breaker do grupo está aberto", ("group",))
+UNCHANGED_CYCLES = REGISTRY.counter("watcher_unchanged_cycles_total", "Ciclos sem mudança nos sinais, nada enviado")
+SIGNAL_DELTAS = REGISTRY.counter(
+    "watcher_signal_deltas_total", "Mudanças de sinal avisadas: entered, exited, action, score", ("kind",)
+)
+SCAN_FAILURES = REGISTRY.counter("watcher_scan_failures_total", "Scans que terminaram em erro")
+CIRCUIT_TRIPS = REGISTRY.counter("watcher_circuit_trips_total", "Aberturas do circuit breaker", ("group",))
+
+# GRUPOS + SCHEDULER + TRADER + TELEGRAM (criados em setup())
+groups = []
+scheduler = None
+trader = None
+outbox = None
+recorder = None
 
-# IA + TRADER
-agent = SolanaTradingAgent(max_position_size=100)
-trader = get_trader()
+_last_heartbeat_ts = 0
 
-bot = Bot(token=BOT_TOKEN) if BOT_TOKEN else None
 
-_last_send_ts = 0
-_last_signal_hash = None
-_last_heartbeat_ts = 0
+class WatchGroup:
+    """Um grupo de consultas: agente, detector de mudanças e circuit breaker próprios."""
 
+    def __init__(self, name: str, agent):
+        from scheduler import CircuitBreaker
 
-# --------------------------------------------------------
-# Funções auxiliares
-# --------------------------------------------------------
+        self.name = name
+        self.agent = agent
+        self.tracker = signal_delta.DeltaTracker(SIGNAL_SCORE_BAND, SIGNAL_EXIT_CYCLES)
+        self.breaker = CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET, BREAKER_MAX)
 
-def _hash_signals(signals) -> str:
-    """Cria hash simples para saber se os sinais mudaram (anti-spam)."""
-    return "|".join(f"{s.token.symbol}:{s.score:.3f}" for s in signals)
 
+def _parse_groups(spec: str):
+    """'majors=sol,jup;memes=bonk' -> [("majors", ["sol", "jup"]), ("memes", ["bonk"])]"""
+    parsed = []
+    for i, part in enumerate(p for p in spec.split(";") if p.strip()):
+        name, _, queries = part.rpartition("=")
+        queries = [q.strip() for q in queries.split(",") if q.strip()]
+        if queries:
+            parsed.append((name.strip() or f"group{i + 1}", queries))
+    return parsed
 
-def _wait_rate_limit() -> float:
-    global _last_send_ts
-    now = time.time()
-    return max(0, RATE_LIMIT_SECONDS - (now - _last_send_ts))
 
+def setup():
+    """Cria grupos, scheduler, trader, recorder e outbox do Telegram (uma vez só)."""
+    global scheduler, trader, outbox, recorder
+    if scheduler is not None:
+        return
 
-async def _send_text(chat_id: str, text: str):
-    """Envio seguro com rate-limit + chunking."""
-    global _last_send_ts
+    from agent import SolanaTradingAgent
+    from scheduler import AdaptiveScheduler
+    from trader import get_trader
 
-    if not bot:
+    def on_stage(stage, seconds):
+        STAGE_SECONDS.labels(stage).observe(seconds)
+
+    specs = _parse_groups(WATCH_GROUPS)
+    if specs:
+        groups.extend(
+            WatchGroup(name, SolanaTradingAgent(queries=queries, token_addresses=[], max_position_size=100,
+                                                on_stage=on_stage))
+            for name, queries in specs
+        )
+    else:
+        groups.append(WatchGroup("default", SolanaTradingAgent(max_position_size=100, on_stage=on_stage)))
+
+    scheduler = AdaptiveScheduler(
+        MIN_INTERVAL, MAX_INTERVAL, INTERVAL,
+        volatility_ref=VOLATILITY_REF, churn_ref=CHURN_REF, quota=API_QUOTA_PER_MIN,
+    )
+    for group in groups:
+        scheduler.add_group(group.name)
+        POLL_INTERVAL.labels(group.name).set(scheduler.interval(group.name))
+        CIRCUIT_OPEN.labels(group.name).set(0)
+
+    trader = get_trader()
+    if RECORD_DIR:
+        from utils import load_shared
+
+        recorder = load_shared("store").SnapshotStore(RECORD_DIR)
+    REGISTRY.gauge_callback("watcher_universe_tokens", "Tokens nas tabelas dos agentes",
+                            lambda: sum(len(g.agent.table) for g in groups))
+    REGISTRY.gauge_callback("watcher_active_tokens", "Tokens vistos no último ciclo de cada grupo",
+                            lambda: sum(g.agent.table.active_count() for g in groups))
+
+    if BOT_TOKEN:
+        from telegram import Bot
+
+        from notifier import TelegramOutbox
+
+        outbox = TelegramOutbox(
+            Bot(token=BOT_TOKEN), chat_rate=1 / max(RATE_LIMIT_SECONDS, 0.001), max_chars=MAX_MESSAGE_CHARS
+        )
+        outbox.on_send = lambda seconds, ok: STAGE_SECONDS.labels("send").observe(seconds)
+        REGISTRY.gauge_callback("telegram_queue_depth", "Mensagens aguardando envio", outbox.pending)
+        REGISTRY.counter_callback("telegram_messages_sent_total", "Mensagens entregues", lambda: outbox.sent)
+        REGISTRY.counter_callback("telegram_send_failures_total", "Mensagens descartadas após as tentativas",
+                                  lambda: outbox.failed)
+        REGISTRY.counter_callback("telegram_retries_total", "Reenvios após erro ou flood control",
+                                  lambda: outbox.retries)
+
+
+# --------------------------------------------------------
+# Funções auxiliares
+# --------------------------------------------------------
+
+async def _send_text(chat_id: str, text: str):
+    """Enfileira no outbox (rate-limit, chunking e retry ficam em background)."""
+    if not outbox:
         logger.warning("Bot não configurado.")
         return
 
-    # dividir chunks
-    chunks: List[str] = []
-    if len(text) <= MAX_MESSAGE_CHARS:
-        chunks = [text]
-    else:
-        buffer = ""
-        for line in text.splitlines(keepends=True):
-            if len(buffer) + len(line) > MAX_MESSAGE_CHARS:
-                chunks.append(buffer)
-                buffer = line
-            else:
-                buffer += line
-        if buffer:
-            chunks.append(buffer)
+    outbox.send(chat_id, text)
 
-    # enviar
-    for chunk in chunks:
-        wait = _wait_rate_limit()
-        if wait > 0:
-            await asyncio.sleep(wait)
-        try:
-            await bot.send_message(chat_id=chat_id, text=chunk)
-            _last_send_ts = time.time()
-        except Exception as e:
-            logger.exception("Erro ao enviar mensagem: %s", e)
-            break
+
+SIGNAL_SECTIONS = (
+    ("buy", "🟢 *Compra*"),
+    ("sell", "🔴 *Venda*"),
+    ("hold", "⚪ *Observar*"),
+)
 
 
 def _compose_signal_message(signals) -> str:
-    """Texto amigável, resumido e organizado."""
-    longs = [s for s in signals if s.action.lower() == "long"]
-    shorts = [s for s in signals if s.action.lower() == "short"]
+    """Texto amigável, resumido e organizado por ação (buy/sell/hold)."""
+    by_action = {}
+    for s in signals:
+        by_action.setdefault(s.action.lower(), []).append(s)
 
     lines = []
     lines.append(f"🚨 *{len(signals)} Oportunidades Detectadas*")
     lines.append("")
 
-    if longs:
-        lines.append("🟢 *Long Opportunities*")
-        for s in longs:
-            lines.append(
-                f"- {s.token.symbol}: score={s.score:.3f}"
-            )
+    known = [action for action, _ in SIGNAL_SECTIONS]
+    sections = list(SIGNAL_SECTIONS) + [(a, f"*{a}*") for a in by_action if a not in known]
+    for action, title in sections:
+        items = by_action.get(action)
+        if not items:
+            continue
+        lines.append(title)
+        for s in items:
+            lines.append(f"- {s.token.symbol}: score={s.score}")
         lines.append("")
 
-    if shorts:
-        lines.append("🔴 *Short Opportunities*")
-        for s in shorts:
-            lines.append(
-                f"- {s.token.symbol}: score={s.score:.3f}"
-            )
+    return "\n".join(lines)
+
+
+DELTA_SECTIONS = (
+    (signal_delta.ENTERED, "🆕 *Entraram no top*"),
+    (signal_delta.ACTION, "🔁 *Mudaram de ação*"),
+    (signal_delta.SCORE, "📊 *Score mudou*"),
+    (signal_delta.EXITED, "👋 *Saíram do top*"),
+)
+
+
+def _compose_delta_message(deltas, group: str = None) -> str:
+    """Só o que mudou desde o último aviso, agrupado por tipo de mudança."""
+    by_kind = {}
+    for d in deltas:
+        by_kind.setdefault(d.kind, []).append(d)
+
+    lines = []
+    lines.append(f"🚨 *{len(deltas)} Mudanças nos Sinais*" + (f" ({group})" if group else ""))
+    lines.append("")
+
+    for kind, title in DELTA_SECTIONS:
+        items = by_kind.get(kind)
+        if not items:
+            continue
+        lines.append(title)
+        for d in items:
+            s = d.signal
+            if kind == signal_delta.ENTERED:
+                lines.append(f"- {s.token.symbol}: {s.action} score={s.score}")
+            elif kind == signal_delta.ACTION:
+                lines.append(f"- {s.token.symbol}: {d.previous_action} → {s.action} (score {d.previous_score} → {s.score})")
+            elif kind == signal_delta.SCORE:
+                lines.append(f"- {s.token.symbol}: {s.action} score {d.previous_score} → {s.score}")
+            else:
+                lines.append(f"- {s.token.symbol} (último score={d.previous_score})")
         lines.append("")
 
     return "\n".join(lines)
 
 
-async def _run_scan():
-    """Executa IA + formatação + anti-spam."""
-    global _last_signal_hash
-
+async def _run_scan(group: WatchGroup):
+    """
+    Executa IA + detecção de mudanças (anti-spam) de um grupo. Devolve
+    (sinais, deltas); erros do scan sobem para o circuit breaker.
+    """
     # IA scan (executa em thread para não travar event loop)
-    try:
-        signals = await asyncio.to_thread(agent.scan, 30, 5)
-    except Exception as e:
-        logger.exception("Falha no scan IA: %s", e)
-        return None
+    signals = await asyncio.to_thread(group.agent.scan, 30, 5)
 
     if not signals:
-        logger.info("Nenhuma oportunidade.")
-        return None
+        logger.info("[%s] Nenhuma oportunidade.", group.name)
+    else:
+        # aquece cotações de todo o top-k atual; o filtro de mudanças vale só para o aviso
+        trader.prefetch(list(dict.fromkeys(s.token.address for s in signals)))
 
-    # anti-spam: só enviar se novo
-    sig_hash = _hash_signals(signals)
-    if sig_hash == _last_signal_hash:
-        logger.info("Sinais idênticos ao último — não enviando.")
-        return None
-    _last_signal_hash = sig_hash
+    # lista vazia também conta: os tokens que estavam no top-k saem
+    deltas = group.tracker.update(signals)
+    if not deltas:
+        if signals:
+            UNCHANGED_CYCLES.inc()
+            logger.info("[%s] Nenhuma mudança nos sinais — não enviando.", group.name)
+        return signals, deltas
+    for d in deltas:
+        SIGNAL_DELTAS.labels(d.kind).inc()
 
-    return signals
+    return signals, deltas
 
 
 async def _maybe_send_heartbeat():
@@ -160,84 +275,135 @@ async def _maybe_send_heartbeat():
     await _send_text(NOTIFY_CHAT, "💙 Watcher ativo e monitorando o mercado.")
 
 
-async def loop():
-    """Loop principal com adaptação de mercado e backoff seguro."""
-    attempt = 0
-
-    while True:
-        try:
-            attempt = 0
-
-            signals = await _run_scan()
-            if signals:
-                msg = _compose_signal_message(signals)
-                await _send_text(NOTIFY_CHAT, msg)
+def _on_scan_failure(group: WatchGroup, error: Exception):
+    """Falha conta no breaker do grupo: retry no intervalo mínimo até o circuito abrir."""
+    SCAN_FAILURES.inc()
+    if group.breaker.record_failure():
+        CIRCUIT_TRIPS.labels(group.name).inc()
+        CIRCUIT_OPEN.labels(group.name).set(1)
+        logger.error("[%s] Falha no scan: %s. Circuito aberto por %.0fs", group.name, error, group.breaker.timeout)
+        scheduler.schedule(group.name, group.breaker.retry_in())
+    else:
+        logger.warning("[%s] Falha no scan: %s", group.name, error)
+        scheduler.schedule(group.name, scheduler.min_interval)
 
-            await _maybe_send_heartbeat()
 
-            await asyncio.sleep(INTERVAL)
+def _group_prices(group: WatchGroup, signals):
+    """Preços de todos os tokens vistos no ciclo (no modo sharded a tabela fica vazia: só os sinais)."""
+    table = group.agent.table
+    rows = table.active_rows()
+    if len(rows):
+        return dict(zip((table.addresses[r] for r in rows), table.price[rows].tolist()))
+    return {s.token.address: s.token.price for s in signals}
 
-        except asyncio.CancelledError:
-            raise
 
-        except Exception as e:
-            attempt += 1
-            backoff = min(300, (2 ** attempt) + (0.1 * attempt))
-            logger.error(f"Erro no loop: {e}. Backoff {backoff}s")
-            await asyncio.sleep(backoff)
+def _record(group: WatchGroup):
+    """Grava os tokens ativos do ciclo (chave = endereço); no modo sharded a tabela fica vazia."""
+    table = group.agent.table
+    rows = table.active_rows()
+    if recorder is None or not len(rows):
+        return
+    t0 = time.perf_counter()
+    try:
+        recorder.append_columns(
+            [time.time()] * len(rows),
+            [table.addresses[r] for r in rows],
+            price=table.price[rows],
+            liquidity=table.liquidity[rows],
+            volume_24h=table.volume_24h[rows],
+            change_24h=table.change_24h[rows],
+        )
+    except Exception as e:
+        # gravação é acessória: disco cheio não pode parar os alertas
+        logger.warning("[%s] Falha ao gravar snapshots: %s", group.name, e)
+        return
+    STAGE_SECONDS.labels("record").observe(time.perf_counter() - t0)
 
 
-def main():
+async def _poll(group: WatchGroup):
+    cycle_t0 = time.perf_counter()
     try:
-        asyncio.run(loop())
-    except KeyboardInterrupt:
-        logger.info("Watcher finalizado manualmente.")
+        signals, deltas = await _run_scan(group)
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
-        logger.exception("Falha fatal: %s", e)
+        _on_scan_failure(group, e)
+        return
 
+    group.breaker.record_success()
+    CIRCUIT_OPEN.labels(group.name).set(0)
+    _record(group)
+    interval = scheduler.observe(
+        group.name,
+        _group_prices(group, signals),
+        changes=len(deltas),
+        calls=group.agent.calls_per_scan,
+    )
+    scheduler.schedule(group.name)
+    POLL_INTERVAL.labels(group.name).set(interval)
+
+    if deltas:
+        t0 = time.perf_counter()
+        msg = _compose_delta_message(deltas, group.name if len(groups) > 1 else None)
+        STAGE_SECONDS.labels("compose").observe(time.perf_counter() - t0)
+        await _send_text(NOTIFY_CHAT, msg)
+    CYCLE_SECONDS.observe(time.perf_counter() - cycle_t0)
 
-if __name__ == "__main__":
-    main()
-# watcher.py
-import asyncio
-import logging
-from utils import get_env
-from telegram import Bot
-from agent import SolanaTradingAgent
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("watcher")
-
-BOT_TOKEN = get_env("BOT_TOKEN")
-CHAT_ID = get_env("TELEGRAM_CHAT_ID")
-INTERVAL = int(get_env("WATCH_INTERVAL", 300))
+async def loop():
+    """Loop principal: poll do grupo que vence primeiro, no intervalo adaptativo de cada um."""
+    setup()
+    if outbox:
+        outbox.start()
+    if METRICS_PORT:
+        try:
+            start_http_server(METRICS_PORT, METRICS_HOST)
+        except OSError as e:
+            logger.warning("Não foi possível abrir /metrics em %s:%s: %s", METRICS_HOST, METRICS_PORT, e)
 
-bot = Bot(token=BOT_TOKEN)
-agent = SolanaTradingAgent()
+    by_name = {g.name: g for g in groups}
+    while True:
+        name, wait = scheduler.next_due()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        group = by_name[name]
+        due = scheduler.due_at(name)
 
+        if not group.breaker.allow():
+            scheduler.schedule(name, group.breaker.retry_in())
+            continue
 
-async def send(chat_id, text):
-    try:
-        await bot.send_message(chat_id, text)
-    except Exception as e:
-        logger.error("Falha ao enviar no Telegram: %s", e)
+        CYCLE_LAG.set(max(0.0, time.monotonic() - due))
+        try:
+            await _poll(group)
+            await _maybe_send_heartbeat()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # erro fora do scan (envio, métricas...): não para o loop nem conta no breaker
+            logger.exception("[%s] Erro no ciclo: %s", name, e)
+            if scheduler.due_at(name) <= due:
+                scheduler.schedule(name, scheduler.min_interval)
 
 
-async def loop():
-    while True:
-        signals = agent.scan(limit=30, top_k=5)
-        msg = "📈 **Sinais detectados:**\n\n"
-        for s in signals:
-            msg += f"→ {s.token.symbol} | Score {s.score}\n"
-            for r in s.reasons:
-                msg += f"   • {r}\n"
-            msg += "\n"
-        await send(CHAT_ID, msg)
-        await asyncio.sleep(INTERVAL)
+async def _run_forever():
+    try:
+        await loop()
+    finally:
+        if outbox:
+            await outbox.stop()
+        if recorder is not None:
+            recorder.flush()
 
 
 def main():
-    asyncio.run(loop())
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s: %(message)s")
+    try:
+        asyncio.run(_run_forever())
+    except KeyboardInterrupt:
+        logger.info("Watcher finalizado manualmente.")
+    except Exception as e:
+        logger.exception("Falha fatal: %s", e)
 
 
 if __name__ == "__main__":
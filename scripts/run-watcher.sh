@@ -4,4 +4,4 @@ set -e
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 cd "$SCRIPT_DIR/.."
 cd project-root
-python3 watcher.py
+python3 cli.py watch
@@ -6,7 +6,8 @@ quando for necessário.
 """
 import logging
 import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
 from solana_trader.core.strategy import Strategy
 from solana_trader.core.risk import RiskManager
@@ -18,43 +19,262 @@ from solana_trader.utils import load_env
 logger = logging.getLogger("solana_trader.agent")
 
 
+def _has_price(market: Dict[str, Any]) -> bool:
+    try:
+        return float(market.get("price")) > 0
+    except (TypeError, ValueError):
+        return False
+
+
 class Agent:
-    def __init__(self, env_path: Optional[str] = None):
-        self.env = load_env(env_path) if env_path else load_env(".env")
-        self.poll_interval = int(self.env.get("POLLING_INTERVAL", 30))
-        self.data_source = DexScreener()
+    def __init__(self, env_path: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+                 data_source=None, clock=None):
+        if env is not None:
+            self.env = env
+        else:
+            self.env = load_env(env_path) if env_path else load_env(".env")
+        self.poll_interval = float(self.env.get("POLLING_INTERVAL", 30))
+        self.symbols = [s.strip() for s in self.env.get("SYMBOLS", "SOL-USD").split(",") if s.strip()]
+        self.symbol_groups = self._parse_symbol_groups(self.env.get("SYMBOL_GROUPS", ""))
+        if self.symbol_groups:
+            self.symbols = list(dict.fromkeys(s for group in self.symbol_groups.values() for s in group))
+        else:
+            self.symbol_groups = {"default": list(self.symbols)}
+        self.last_markets: List[Dict[str, Any]] = []
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.clock = clock or time
         self.strategy = Strategy(self.env)
-        self.risk = RiskManager(self.env)
-        self.portfolio = Portfolio(starting_cash=float(self.env.get("STARTING_CASH", 1000)))
+        self.risk = RiskManager(self.env, clock=self.clock)
+        starting_cash = float(self.env.get("STARTING_CASH", 1000))
+        self.state = None
+        if self.env.get("STATE_DIR"):
+            from solana_trader.core.journal import StateStore
+
+            # journal + snapshots: posições e fills sobrevivem a restarts
+            self.state = StateStore(
+                self.env["STATE_DIR"],
+                snapshot_every=int(self.env.get("STATE_SNAPSHOT_EVERY", 1000)),
+                sync_interval=float(self.env.get("STATE_SYNC_INTERVAL", 1.0)),
+                keep_segments=int(self.env["STATE_KEEP_SEGMENTS"]) if self.env.get("STATE_KEEP_SEGMENTS") else None,
+            )
+            self.portfolio = self.state.load(starting_cash)
+        else:
+            self.portfolio = Portfolio(starting_cash=starting_cash)
+        self.recorder = None
+        if self.env.get("RECORD_DIR"):
+            from solana_trader.core.store import SnapshotStore
+
+            self.recorder = SnapshotStore(self.env["RECORD_DIR"])
+            # indicadores já começam com o histórico gravado, sem esperar a janela encher
+            warmup = float(self.env.get("INDICATOR_WARMUP_SECONDS", 86400))
+            self.strategy.warm_up(self.recorder, self.symbols, self.clock.time() - warmup if warmup > 0 else None)
+        self.events = None
+        if self.env.get("HELIUS_WS_URL") or self.env.get("HELIUS_WEBHOOK_PORT"):
+            from solana_trader.core.data_sources.helius import Helius
 
-    def step(self):
-        market = self.data_source.get_market_snapshot()
-        logger.debug("Market snapshot: %s", market)
+            # swaps/liquidez on-chain num ring de capacidade fixa; o step lê só os agregados
+            self.events = Helius.from_env(self.env)
+            self.events.start()
+        # eventos entram nos snapshots pelo annotate, a menos que helius seja uma das fontes
+        self._annotate_events = self.events is not None
+        # data_source/clock injetáveis: o backtest troca por replay + relógio simulado
+        self.data_source = data_source or self._build_data_source()
 
-        # Strategy decides an action dict: {"type": "buy"|"sell"|None, "symbol":..., "price":..., "qty":...}
-        action = self.strategy.decide(market, self.portfolio)
-        if not action or action.get("type") is None:
+    @staticmethod
+    def _parse_symbol_groups(spec: str) -> Dict[str, List[str]]:
+        """SYMBOL_GROUPS=majors=SOL-USD,JUP-USD;memes=BONK-USD -> {"majors": [...], "memes": [...]}"""
+        groups: Dict[str, List[str]] = {}
+        for i, part in enumerate(p for p in spec.split(";") if p.strip()):
+            name, _, symbols = part.rpartition("=")
+            symbols = [s.strip() for s in symbols.split(",") if s.strip()]
+            if symbols:
+                groups[name.strip() or f"group{i + 1}"] = symbols
+        return groups
+
+    def _build_data_source(self):
+        """
+        MARKET_SOURCES=dexscreener,birdeye,helius (ordem = prioridade na fusão):
+        com mais de uma fonte, consulta todas em paralelo sob MARKET_BUDGET.
+        """
+        names = [n.strip().lower() for n in self.env.get("MARKET_SOURCES", "dexscreener").split(",") if n.strip()]
+        sources = []
+        for name in names:
+            if name == "dexscreener":
+                sources.append((name, DexScreener()))
+            elif name == "birdeye":
+                from solana_trader.core.data_sources.birdeye import BirdEye
+
+                sources.append((name, BirdEye.from_env(self.env)))
+            elif name == "helius":
+                if self.events is not None:
+                    sources.append((name, self.events))
+                    self._annotate_events = False
+                else:
+                    logger.warning("MARKET_SOURCES inclui helius, mas a ingestão Helius não está configurada")
+            else:
+                logger.warning("Fonte de mercado desconhecida: %s", name)
+        if len(sources) <= 1:
+            return sources[0][1] if sources else DexScreener()
+
+        from solana_trader.core.data_sources.fanout import FanoutAggregator
+
+        required = tuple(f.strip() for f in self.env.get("MARKET_REQUIRED_FIELDS", "price,change_1h").split(",")
+                         if f.strip())
+        return FanoutAggregator(sources, budget=float(self.env.get("MARKET_BUDGET", 1.0)), required=required)
+
+    def _fetch_markets(self, symbols: List[str]) -> List[Dict[str, Any]]:
+        """
+        Snapshots dos símbolos, buscados em paralelo. Snapshot sem preço conta
+        como falha; se nenhum símbolo volta com preço, levanta (o primeiro erro
+        das fontes, se houve) para o circuit breaker do grupo contar.
+        """
+        errors: List[Exception] = []
+        # fontes que já sabem buscar em lote (ex.: replay do backtest) vão direto
+        batch = getattr(self.data_source, "get_market_snapshots", None)
+        if batch is not None:
+            markets = batch(symbols)
+        elif len(symbols) == 1:
+            markets = [self.data_source.get_market_snapshot(symbols[0])]
+        else:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=min(len(self.symbols), int(self.env.get("FETCH_WORKERS", 8))),
+                    thread_name_prefix="market",
+                )
+            futures = [(sym, self._pool.submit(self.data_source.get_market_snapshot, sym)) for sym in symbols]
+            markets = []
+            for sym, fut in futures:
+                try:
+                    markets.append(fut.result())
+                except Exception as e:
+                    logger.warning("Failed to fetch snapshot for %s: %s", sym, e)
+                    errors.append(e)
+
+        priced = [m for m in markets if m and _has_price(m)]
+        if len(priced) < len(markets):
+            logger.warning("Snapshots sem preço descartados: %s",
+                           [m.get("symbol") for m in markets if m and not _has_price(m)])
+        if symbols and not priced:
+            if errors:
+                raise errors[0]
+            raise ValueError(f"Nenhum snapshot com preço para {', '.join(symbols)}")
+        return priced
+
+    def step(self, symbols: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Executa um ciclo para `symbols` (padrão: todos); retorna as ações executadas."""
+        markets = self.last_markets = self._fetch_markets(self.symbols if symbols is None else symbols)
+        if self._annotate_events:
+            self.events.annotate(markets)
+        logger.debug("Market snapshots: %s", markets)
+        if self.recorder is not None:
+            for market in markets:
+                self.recorder.append(market)
+        self.portfolio.update_prices(markets)
+        self.risk.observe(markets)
+
+        # Strategy decides one action dict per market: {"type": "buy"|"sell"|None, "symbol":..., "price":..., "qty":...}
+        actions = [a for a in self.strategy.decide_batch(markets, self.portfolio) if a and a.get("type")]
+        if not actions:
             logger.info("No action decided this step")
-            return
+            return []
+
+        # ordem determinística: vendas antes (liberam caixa), depois compras; por símbolo
+        actions.sort(key=lambda a: (a["type"] != "sell", str(a.get("symbol"))))
+
+        apply_trade = self.state.apply_trade if self.state is not None else self.portfolio.apply_trade
+        # Risk manager adjusts/validates all actions at once against the whole book
+        checked = self.risk.check_batch(actions, self.portfolio)
+        executed = []
+        for action, safe_action in zip(actions, checked):
+            if not safe_action:
+                logger.info("Action rejected by risk manager: %s", action)
+                continue
 
-        # Risk manager adjusts/validates the action
-        safe_action = self.risk.check(action, self.portfolio)
-        if not safe_action:
-            logger.info("Action rejected by risk manager: %s", action)
+            # Apply action to portfolio (simulated execution)
+            if apply_trade(safe_action):
+                logger.info("Executed action: %s", safe_action)
+                executed.append(safe_action)
+            else:
+                logger.warning("Failed to execute action: %s", safe_action)
+        return executed
+
+    def _build_scheduler(self):
+        from solana_trader.core.scheduler import AdaptiveScheduler, CircuitBreaker
+
+        scheduler = AdaptiveScheduler(
+            float(self.env.get("POLLING_MIN_INTERVAL", 5)),
+            float(self.env.get("POLLING_MAX_INTERVAL", 300)),
+            self.poll_interval,
+            volatility_ref=float(self.env.get("POLLING_VOLATILITY_REF", 0.01)),
+            churn_ref=float(self.env.get("POLLING_CHURN_REF", 0.5)),
+            quota=int(self.env.get("MARKET_QUOTA_PER_MIN", 300)),
+            clock=self.clock.time,
+        )
+        breakers = {}
+        for name in self.symbol_groups:
+            scheduler.add_group(name)
+            breakers[name] = CircuitBreaker(
+                int(self.env.get("BREAKER_FAILURES", 3)),
+                float(self.env.get("BREAKER_RESET", 30)),
+                float(self.env.get("BREAKER_MAX", 600)),
+                clock=self.clock.time,
+            )
+        return scheduler, breakers
+
+    def _run_group(self, name: str, scheduler, breaker):
+        """Um step do grupo; o resultado (ou a falha) decide quando ele roda de novo."""
+        symbols = self.symbol_groups[name]
+        try:
+            executed = self.step(symbols)
+        except Exception as e:
+            if breaker.record_failure():
+                logger.error("Step do grupo %s falhou: %s; circuito aberto por %.0fs", name, e, breaker.timeout)
+                scheduler.schedule(name, breaker.retry_in())
+            else:
+                logger.warning("Step do grupo %s falhou: %s", name, e)
+                scheduler.schedule(name, scheduler.min_interval)
             return
 
-        # Apply action to portfolio (simulated execution)
-        executed = self.portfolio.apply_trade(safe_action)
-        if executed:
-            logger.info("Executed action: %s", safe_action)
-        else:
-            logger.warning("Failed to execute action: %s", safe_action)
+        breaker.record_success()
+        prices = {}
+        for market in self.last_markets:
+            try:
+                prices[market["symbol"]] = float(market["price"])
+            except (KeyError, TypeError, ValueError):
+                continue
+        interval = scheduler.observe(name, prices, changes=len(executed), calls=len(symbols))
+        scheduler.schedule(name)
+        logger.debug("Grupo %s: próximo step em %.1fs", name, interval)
 
     def run(self):
-        logger.info("Agent started; poll interval=%s seconds", self.poll_interval)
+        scheduler, breakers = self._build_scheduler()
+        logger.info("Agent started; adaptive poll interval %.0f-%.0fs (start %.0fs), groups=%s",
+                    scheduler.min_interval, scheduler.max_interval, self.poll_interval, list(self.symbol_groups))
         try:
             while True:
-                self.step()
-                time.sleep(self.poll_interval)
+                name, wait = scheduler.next_due()
+                if wait > 0:
+                    self.clock.sleep(wait)
+                breaker = breakers[name]
+                if not breaker.allow():
+                    scheduler.schedule(name, breaker.retry_in())
+                    continue
+                self._run_group(name, scheduler, breaker)
         except KeyboardInterrupt:
             logger.info("Agent stopped by user")
+        finally:
+            self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        if self.recorder is not None:
+            self.recorder.flush()
+        if self.state is not None:
+            self.state.close()
+        if self.events is not None:
+            self.events.stop()
+        close = getattr(self.data_source, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,216 @@
+"""Backtest: reproduz snapshots gravados pelo mesmo pipeline do `Agent.step`.
+
+Strategy + RiskManager + Portfolio rodam exatamente como no modo ao vivo; só
+a fonte de dados (replay) e o relógio (simulado) são trocados, então o
+backtest anda tão rápido quanto a CPU permite.
+
+Uso:
+    python -m solana_trader.core.backtest snapshots.jsonl --set STRATEGY_THRESHOLD=0.02
+    python -m solana_trader.core.backtest --store data/ --symbol SOL-USD
+    python -m solana_trader.core.backtest --synthetic 1000000
+"""
+import argparse
+import csv
+import json
+import logging
+import math
+import random
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from solana_trader.core.agent import Agent
+from solana_trader.utils import load_env
+
+
+logger = logging.getLogger("solana_trader.backtest")
+
+
+class SimulatedClock:
+    """Relógio do backtest: `sleep` só avança o tempo, sem esperar."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = float(start)
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+class ReplaySource:
+    """
+    Fonte de dados que devolve snapshots gravados, em ordem. Cada tick é o
+    grupo de snapshots consecutivos com o mesmo timestamp (um por símbolo);
+    o replay manda nos símbolos, não a lista `SYMBOLS` do agente.
+    """
+
+    def __init__(self, snapshots: Iterable[Dict[str, Any]], clock: SimulatedClock):
+        self._it = iter(snapshots)
+        self._next: Optional[Dict[str, Any]] = None
+        self.clock = clock
+        self.last: List[Dict[str, Any]] = []
+
+    def get_market_snapshots(self, symbols=None) -> List[Dict[str, Any]]:
+        snap = self._next if self._next is not None else next(self._it)  # StopIteration encerra o backtest
+        self._next = None
+        ts = snap.get("timestamp")
+        tick = [snap]
+        for other in self._it:
+            if ts is None or other.get("timestamp") != ts:
+                self._next = other
+                break
+            tick.append(other)
+        if ts is not None:
+            self.clock.now = float(ts)
+        self.last = tick
+        return tick
+
+    def get_market_snapshot(self, symbol=None) -> Dict[str, Any]:
+        return self.get_market_snapshots()[0]
+
+
+@dataclass
+class BacktestReport:
+    ticks: int
+    trades: int
+    start_value: float
+    end_value: float
+    pnl: float
+    pnl_pct: float
+    max_drawdown: float
+    max_drawdown_pct: float
+    elapsed: float
+    ticks_per_second: float
+
+    def summary(self) -> str:
+        return (
+            f"ticks={self.ticks} trades={self.trades} "
+            f"pnl={self.pnl:.2f} ({self.pnl_pct:.2%}) "
+            f"max_dd={self.max_drawdown:.2f} ({self.max_drawdown_pct:.2%}) "
+            f"throughput={self.ticks_per_second:,.0f} ticks/s"
+        )
+
+
+class Backtester:
+    def __init__(self, env: Optional[Dict[str, str]] = None):
+        self.env = dict(env) if env is not None else load_env(".env")
+        # o replay não deve regravar os próprios snapshots nem mexer no estado real
+        self.env.pop("RECORD_DIR", None)
+        self.env.pop("STATE_DIR", None)
+        self.env.pop("HELIUS_WS_URL", None)
+        self.env.pop("HELIUS_WEBHOOK_PORT", None)
+
+    def run(self, snapshots: Iterable[Dict[str, Any]], max_ticks: Optional[int] = None) -> BacktestReport:
+        clock = SimulatedClock()
+        source = ReplaySource(snapshots, clock)
+        agent = Agent(env=self.env, data_source=source, clock=clock)
+        portfolio = agent.portfolio
+
+        start_value = portfolio.cash
+        peak = start_value
+        max_dd = 0.0
+        max_dd_pct = 0.0
+        ticks = 0
+        trades = 0
+
+        t0 = time.perf_counter()
+        while max_ticks is None or ticks < max_ticks:
+            try:
+                executed = agent.step()
+            except StopIteration:
+                break
+            ticks += 1
+            trades += len(executed)
+
+            # mark-to-market pelo índice de preços do portfólio (O(1))
+            equity = portfolio.equity
+            if equity > peak:
+                peak = equity
+            elif peak - equity > max_dd:
+                max_dd = peak - equity
+                max_dd_pct = max_dd / peak if peak else 0.0
+        elapsed = time.perf_counter() - t0
+
+        portfolio.resync()
+        end_value = portfolio.equity
+        pnl = end_value - start_value
+        return BacktestReport(
+            ticks=ticks,
+            trades=trades,
+            start_value=start_value,
+            end_value=end_value,
+            pnl=pnl,
+            pnl_pct=pnl / start_value if start_value else 0.0,
+            max_drawdown=max_dd,
+            max_drawdown_pct=max_dd_pct,
+            elapsed=elapsed,
+            ticks_per_second=ticks / elapsed if elapsed > 0 else float("inf"),
+        )
+
+
+def load_snapshots(path: str) -> Iterator[Dict[str, Any]]:
+    """Lê snapshots de um `.jsonl` (um dict por linha) ou `.csv` com cabeçalho."""
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield {k: (v if k == "symbol" else float(v)) for k, v in row.items()}
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def synthetic_snapshots(n: int, symbol: str = "SOL-USD", start_price: float = 20.0,
+                        interval: int = 30, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Passeio aleatório log-normal, útil para medir throughput."""
+    rnd = random.Random(seed)
+    price = start_price
+    window = max(1, 3600 // interval)
+    history = [price] * window
+    for i in range(n):
+        price *= math.exp(rnd.gauss(0, 0.002))
+        ref = history[i % window]
+        history[i % window] = price
+        yield {"symbol": symbol, "price": price, "change_1h": price / ref - 1, "timestamp": i * interval}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest do Agent sobre snapshots gravados")
+    parser.add_argument("path", nargs="?", help="arquivo .jsonl ou .csv com snapshots")
+    parser.add_argument("--store", help="diretório de um SnapshotStore (RECORD_DIR) em vez de arquivo")
+    parser.add_argument("--symbol", default="SOL-USD", help="símbolo lido do --store")
+    parser.add_argument("--start", type=float, default=None, help="timestamp inicial (--store)")
+    parser.add_argument("--end", type=float, default=None, help="timestamp final, exclusivo (--store)")
+    parser.add_argument("--synthetic", type=int, default=0, help="gera N ticks sintéticos em vez de ler arquivo")
+    parser.add_argument("--max-ticks", type=int, default=None)
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="sobrescreve variáveis do .env (ex.: STRATEGY_THRESHOLD=0.02)")
+    parser.add_argument("--json", action="store_true", help="imprime o relatório em JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    env = load_env(".env")
+    for item in args.set:
+        k, v = item.split("=", 1)
+        env[k.strip()] = v.strip()
+
+    if args.synthetic:
+        snapshots = synthetic_snapshots(args.synthetic)
+    elif args.store:
+        from solana_trader.core.store import SnapshotStore
+
+        snapshots = SnapshotStore(args.store, readonly=True).snapshots(args.symbol, args.start, args.end)
+    elif args.path:
+        snapshots = load_snapshots(args.path)
+    else:
+        parser.error("informe um arquivo de snapshots, --store DIR ou --synthetic N")
+
+    report = Backtester(env).run(snapshots, max_ticks=args.max_ticks)
+    print(json.dumps(asdict(report), indent=2) if args.json else report.summary())
+
+
+if __name__ == "__main__":
+    main()
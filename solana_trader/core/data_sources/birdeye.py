@@ -1,9 +1,58 @@
-"""Stub para BirdEye ou outro provedor de on-chain alerts."""
+"""BirdEye: visão geral do token (preço, liquidez, volume, variações).
+
+Sem BIRDEYE_API_KEY (ou sem endereço para o símbolo) devolve snapshot vazio,
+e o agregador segue com as outras fontes.
+"""
+from typing import Any, Dict, Optional
+
+BIRDEYE_API_URL = "https://public-api.birdeye.so"
 
 
 class BirdEye:
-    def __init__(self):
-        pass
+    def __init__(self, api_key: Optional[str] = None, addresses: Optional[Dict[str, str]] = None,
+                 base_url: str = BIRDEYE_API_URL, timeout: float = 5.0):
+        self.api_key = api_key
+        self.addresses = addresses or {}  # símbolo -> mint
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._session = None
+
+    @classmethod
+    def from_env(cls, env: Dict[str, str]) -> "BirdEye":
+        # BIRDEYE_ADDRESSES=SOL-USD:So111...,BONK-USD:DezX...
+        addresses = {}
+        for item in (env.get("BIRDEYE_ADDRESSES") or "").split(","):
+            if ":" in item:
+                symbol, mint = item.split(":", 1)
+                addresses[symbol.strip()] = mint.strip()
+        return cls(env.get("BIRDEYE_API_KEY") or None, addresses,
+                   env.get("BIRDEYE_API_URL", BIRDEYE_API_URL), float(env.get("BIRDEYE_TIMEOUT", 5)))
+
+    def get_market_snapshot(self, symbol: str) -> Dict[str, Any]:
+        address = self.addresses.get(symbol)
+        if not self.api_key or not address:
+            return {}
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+            self._session.headers.update({"X-API-KEY": self.api_key, "x-chain": "solana"})
+        resp = self._session.get(f"{self.base_url}/defi/token_overview", params={"address": address},
+                                 timeout=self.timeout)
+        resp.raise_for_status()
+        data = resp.json().get("data") or {}
+        snapshot = {"symbol": symbol, "address": address}
+        for field, key, scale in (
+            ("price", "price", 1),
+            ("liquidity", "liquidity", 1),
+            ("volume_24h", "v24hUSD", 1),
+            # a BirdEye devolve percentuais; a Strategy usa frações
+            ("change_1h", "priceChange1hPercent", 0.01),
+            ("change_24h", "priceChange24hPercent", 0.01),
+        ):
+            if data.get(key) is not None:
+                snapshot[field] = float(data[key]) * scale
+        return snapshot
 
     def alerts(self):
         return []
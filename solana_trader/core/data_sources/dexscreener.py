@@ -8,8 +8,8 @@ class DexScreener:
     def __init__(self):
         pass
 
-    def get_market_snapshot(self):
+    def get_market_snapshot(self, symbol: str = "SOL-USD"):
         # Retorna um dict simples com campos esperados pela Strategy
         # Em produção, substitua por chamada HTTP para buscar price e changes
         now = int(time.time())
-        return {"symbol": "SOL-USD", "price": 20.0, "change_1h": 0.015, "timestamp": now}
+        return {"symbol": symbol, "price": 20.0, "change_1h": 0.015, "timestamp": now}
@@ -0,0 +1,250 @@
+"""Fan-out concorrente entre provedores de mercado, com orçamento de latência.
+
+`FanoutAggregator` implementa `get_market_snapshots(symbols)` (o caminho em
+lote do `Agent`): dispara todas as consultas (fonte x símbolo) de uma vez e
+espera no máximo `budget` segundos.
+
+- Hedge: uma consulta que passa do p95 recente da sua fonte ganha uma cópia;
+  vale a que responder primeiro. Os hedges de cada fonte ficam limitados a
+  `hedge_ratio` das consultas dela, para não dobrar a carga numa fonte que
+  ficou lenta inteira.
+- Saída antecipada: assim que todo símbolo tem os campos obrigatórios vindos
+  de alguma fonte, o step segue; as fontes lentas terminam em background e
+  o resultado fica guardado como último valor bom.
+- Fallback: fonte que estourou o prazo (ou falhou) entra com o último valor
+  bom, marcado como stale.
+- Falha: símbolo que fica sem os campos obrigatórios (nem frescos nem stale)
+  sai do resultado; se nenhum símbolo sobra, levanta o primeiro erro das
+  fontes (`TimeoutError` se só estouraram o prazo, `ValueError` se
+  responderam sem os campos), para o circuit breaker do chamador contar.
+
+O snapshot final junta os campos de todas as fontes (fresco vence stale;
+entre frescos, vale a ordem das fontes) e leva `provenance`:
+{campo: {"source": nome, "stale": bool, "age": segundos}}.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("solana_trader.fanout")
+
+REQUIRED_FIELDS = ("price", "change_1h")
+_META_FIELDS = ("symbol", "timestamp")
+
+
+class _SourceStats:
+    def __init__(self, samples: int = 200):
+        self.latencies: Deque[float] = deque(maxlen=samples)
+        self.in_flight = 0
+        self.requests = 0
+        self.hedges = 0
+
+    def p95(self, default: float) -> float:
+        if len(self.latencies) < 5:
+            return default
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+class FanoutAggregator:
+    def __init__(self, sources: Sequence[Tuple[str, Any]], budget: float = 1.0,
+                 required: Sequence[str] = REQUIRED_FIELDS, hedge_after: float = 0.25,
+                 hedge_ratio: float = 0.1, max_in_flight: int = 16, workers: Optional[int] = None):
+        """
+        sources: (nome, fonte) em ordem de prioridade; cada fonte tem
+        `get_market_snapshot(symbol) -> dict` (campos parciais valem).
+        hedge_after: atraso do hedge enquanto a fonte ainda não tem amostras.
+        """
+        self.sources = list(sources)
+        self._by_name = dict(self.sources)
+        self.budget = budget
+        self.required = tuple(required)
+        self.hedge_after = hedge_after
+        self.hedge_ratio = hedge_ratio
+        self.max_in_flight = max_in_flight
+        self._pool = ThreadPoolExecutor(max_workers=workers or 4 * max(1, len(self.sources)),
+                                        thread_name_prefix="fanout")
+        self._stats = {name: _SourceStats() for name, _ in self.sources}
+        self._last_good: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.stale_served = 0
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _call(self, name: str, source, symbol: str) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        try:
+            return source.get_market_snapshot(symbol) or {}
+        finally:
+            stats = self._stats[name]
+            with self._lock:
+                stats.latencies.append(time.perf_counter() - t0)
+                stats.in_flight -= 1
+
+    def _submit(self, name: str, source, symbol: str) -> Optional[Future]:
+        stats = self._stats[name]
+        with self._lock:
+            if stats.in_flight >= self.max_in_flight:
+                # fonte travada: não empilha mais threads nela
+                return None
+            stats.in_flight += 1
+        fut = self._pool.submit(self._call, name, source, symbol)
+        fut.add_done_callback(lambda f, key=(name, symbol): self._remember(key, f))
+        return fut
+
+    def _remember(self, key: Tuple[str, str], fut: Future):
+        # roda também para respostas que chegam depois do prazo
+        if fut.cancelled() or fut.exception() is not None:
+            return
+        data = fut.result()
+        if data:
+            with self._lock:
+                self._last_good[key] = (time.time(), data)
+
+    def get_market_snapshot(self, symbol: str) -> Dict[str, Any]:
+        return self.get_market_snapshots([symbol])[0]
+
+    def get_market_snapshots(self, symbols: Sequence[str]) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        deadline = start + self.budget
+        hedge_at: Dict[Tuple[str, str], float] = {}
+        futures: Dict[Future, Tuple[str, str, bool]] = {}  # fut -> (fonte, símbolo, é hedge)
+        fresh: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        errors: List[BaseException] = []
+        open_keys = set()
+
+        for name, source in self.sources:
+            p95 = self._stats[name].p95(self.hedge_after)
+            for symbol in symbols:
+                fut = self._submit(name, source, symbol)
+                if fut is None:
+                    continue
+                self.requests += 1
+                self._stats[name].requests += 1
+                futures[fut] = (name, symbol, False)
+                open_keys.add((name, symbol))
+                hedge_at[(name, symbol)] = start + p95
+
+        pending = set(futures)
+        while pending and open_keys:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            # hedge de quem passou do p95 da própria fonte
+            for key in [k for k, at in hedge_at.items() if at <= now and k in open_keys]:
+                del hedge_at[key]
+                name, symbol = key
+                stats = self._stats[name]
+                if stats.hedges >= self.hedge_ratio * stats.requests:
+                    continue
+                fut = self._submit(name, self._by_name[name], symbol)
+                if fut is not None:
+                    self.hedges += 1
+                    stats.hedges += 1
+                    futures[fut] = (name, symbol, True)
+                    pending.add(fut)
+
+            next_hedge = min((at for k, at in hedge_at.items() if k in open_keys), default=deadline)
+            done, pending = wait(pending, timeout=max(0.0, min(deadline, next_hedge) - now),
+                                 return_when=FIRST_COMPLETED)
+            for fut in done:
+                name, symbol, hedged = futures[fut]
+                key = (name, symbol)
+                if key not in open_keys:
+                    continue
+                if fut.exception() is not None:
+                    self.errors += 1
+                    errors.append(fut.exception())
+                    logger.debug("Fonte %s falhou para %s: %s", name, symbol, fut.exception())
+                    # sem hedge pendente para essa chave, desiste dela
+                    if not any(futures[f][:2] == key for f in pending):
+                        open_keys.discard(key)
+                    continue
+                fresh[key] = fut.result()
+                open_keys.discard(key)
+                if hedged:
+                    self.hedge_wins += 1
+            if self._covered(symbols, fresh):
+                break
+
+        if open_keys and time.perf_counter() >= deadline:
+            self.timeouts += len(open_keys)
+
+        markets = []
+        for symbol in symbols:
+            market = self._fuse(symbol, fresh)
+            missing = [f for f in self.required if f not in market]
+            if missing or not market["provenance"]:
+                logger.warning("Nenhuma fonte trouxe %s para %s", ", ".join(missing) or "dados", symbol)
+                continue
+            markets.append(market)
+        if symbols and not markets:
+            if errors:
+                raise errors[0]
+            if open_keys:
+                raise TimeoutError(f"Nenhuma fonte respondeu em {self.budget}s")
+            raise ValueError(f"Nenhuma fonte trouxe os campos obrigatórios {self.required}")
+        return markets
+
+    def _covered(self, symbols: Sequence[str], fresh: Dict[Tuple[str, str], Dict[str, Any]]) -> bool:
+        if not self.required:  # sem campos obrigatórios: espera todas as fontes (ou o prazo)
+            return False
+        for symbol in symbols:
+            fields = set()
+            for name, _ in self.sources:
+                fields.update(fresh.get((name, symbol), ()))
+            if not fields.issuperset(self.required):
+                return False
+        return True
+
+    # ------------------------------------------------------------------
+    # Fusão
+    # ------------------------------------------------------------------
+
+    def _fuse(self, symbol: str, fresh: Dict[Tuple[str, str], Dict[str, Any]]) -> Dict[str, Any]:
+        now = time.time()
+        market: Dict[str, Any] = {"symbol": symbol, "timestamp": now}
+        provenance: Dict[str, Dict[str, Any]] = {}
+
+        layers = []
+        for name, _ in self.sources:
+            data = fresh.get((name, symbol))
+            if data is not None:
+                layers.append((name, data, False, 0.0))
+        with self._lock:
+            stale = [(name, self._last_good.get((name, symbol))) for name, _ in self.sources
+                     if (name, symbol) not in fresh]
+        for name, entry in stale:
+            if entry is not None:
+                layers.append((name, entry[1], True, now - entry[0]))
+
+        for name, data, is_stale, age in layers:
+            for field, value in data.items():
+                if field in _META_FIELDS or field in provenance or value is None:
+                    continue
+                market[field] = value
+                provenance[field] = {"source": name, "stale": is_stale, "age": round(age, 3)}
+                if is_stale:
+                    self.stale_served += 1
+        market["provenance"] = provenance
+        return market
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            p95 = {name: s.p95(float("nan")) for name, s in self._stats.items()}
+        return {"requests": self.requests, "hedges": self.hedges, "hedge_wins": self.hedge_wins, "timeouts": self.timeouts,
+                "errors": self.errors, "stale_served": self.stale_served, "p95": p95}
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,10 +1,287 @@
-"""Stub para Helius (ex.: monitor de transações)"""
+"""Ingestão de transações da Helius (formato "enhanced transactions").
+
+Swaps e eventos de liquidez são decodificados e gravados num `EventRing`;
+a estratégia lê os agregados por token (fluxo líquido, swaps grandes).
+
+O ring é indexado pelo mint; os snapshots de mercado vêm por símbolo
+("SOL-USD"). A leitura usa o `address` do snapshot quando a fonte traz, senão
+o mapa símbolo -> mint de HELIUS_MINTS (mesmo formato de BIRDEYE_ADDRESSES,
+que serve de fallback).
+
+Dois transportes, ambos com aiohttp numa thread própria com event loop:
+
+- webhook: servidor HTTP que recebe os POSTs da Helius (lista JSON de
+  transações). Com o ring saturado e política drop_newest, responde 503 e a
+  Helius reenvia depois — backpressure de verdade.
+- websocket: cliente de um stream que entrega transações no mesmo formato
+  (HELIUS_WS_URL, com HELIUS_WS_SUBSCRIBE opcional enviado ao conectar);
+  reconecta com backoff. Aqui não há como frear a fonte: o excesso é
+  descartado pelo ring e contado.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from solana_trader.core.events import (
+    DROP_NEWEST,
+    LIQUIDITY_ADD,
+    LIQUIDITY_REMOVE,
+    SWAP_BUY,
+    SWAP_SELL,
+    Event,
+    EventRing,
+)
+
+logger = logging.getLogger("solana_trader.helius")
+
+LAMPORTS_PER_SOL = 1_000_000_000
+WSOL_MINT = "So11111111111111111111111111111111111111112"
+
+
+def _raw_amount(token: Dict[str, Any]) -> float:
+    raw = token.get("rawTokenAmount") or {}
+    return int(raw.get("tokenAmount") or 0) / 10 ** int(raw.get("decimals") or 0)
+
+
+def parse_mints(spec: str) -> Dict[str, str]:
+    """"SOL-USD:So111...,BONK-USD:DezX..." -> {"SOL-USD": "So111...", ...}"""
+    mints = {}
+    for item in (spec or "").split(","):
+        if ":" in item:
+            symbol, mint = item.split(":", 1)
+            if symbol.strip() and mint.strip():
+                mints[symbol.strip()] = mint.strip()
+    return mints
+
+
+def decode_transaction(tx: Dict[str, Any]) -> List[Event]:
+    """Eventos (ts, mint, tipo, valor em SOL) de uma transação enhanced."""
+    kind = tx.get("type")
+    ts = float(tx.get("timestamp") or time.time())
+    events: List[Event] = []
+
+    if kind == "SWAP":
+        swap = (tx.get("events") or {}).get("swap") or {}
+        inputs = swap.get("tokenInputs") or []
+        outputs = swap.get("tokenOutputs") or []
+        # SOL nativo ou wSOL contam como o lado "SOL" do swap
+        sol_in = int((swap.get("nativeInput") or {}).get("amount") or 0) / LAMPORTS_PER_SOL
+        sol_in += sum(_raw_amount(t) for t in inputs if t.get("mint") == WSOL_MINT)
+        sol_out = int((swap.get("nativeOutput") or {}).get("amount") or 0) / LAMPORTS_PER_SOL
+        sol_out += sum(_raw_amount(t) for t in outputs if t.get("mint") == WSOL_MINT)
+        if sol_in:
+            events.extend((ts, t["mint"], SWAP_BUY, sol_in) for t in outputs if t.get("mint") != WSOL_MINT)
+        if sol_out:
+            events.extend((ts, t["mint"], SWAP_SELL, sol_out) for t in inputs if t.get("mint") != WSOL_MINT)
+
+    elif kind in ("ADD_LIQUIDITY", "WITHDRAW_LIQUIDITY"):
+        transfers = tx.get("tokenTransfers") or []
+        sol = sum(abs(int(t.get("amount") or 0)) for t in tx.get("nativeTransfers") or []) / LAMPORTS_PER_SOL
+        sol += sum(abs(float(t.get("tokenAmount") or 0)) for t in transfers if t.get("mint") == WSOL_MINT)
+        event = LIQUIDITY_ADD if kind == "ADD_LIQUIDITY" else LIQUIDITY_REMOVE
+        mints = dict.fromkeys(t["mint"] for t in transfers if t.get("mint") and t["mint"] != WSOL_MINT)
+        events.extend((ts, mint, event, sol) for mint in mints)
+
+    return events
+
+
+def decode_message(payload: Any) -> List[Event]:
+    """Aceita lista (webhook), notificação JSON-RPC ({"params": {"result": ...}}) ou uma transação."""
+    if isinstance(payload, dict):
+        payload = (payload.get("params") or {}).get("result", payload)
+    if isinstance(payload, dict):
+        payload = [payload]
+    events: List[Event] = []
+    for tx in payload or []:
+        try:
+            events.extend(decode_transaction(tx))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.debug("Transação ignorada (%s): %s", e, tx.get("signature") if isinstance(tx, dict) else tx)
+    return events
 
 
 class Helius:
-    def __init__(self):
-        pass
+    def __init__(self, ring: Optional[EventRing] = None, ws_url: Optional[str] = None,
+                 subscribe: Optional[str] = None, webhook_port: Optional[int] = None,
+                 webhook_host: str = "127.0.0.1", webhook_auth: Optional[str] = None,
+                 mints: Optional[Dict[str, str]] = None):
+        self.ring = ring if ring is not None else EventRing()
+        self.mints = mints or {}  # símbolo -> mint
+        self.ws_url = ws_url
+        self.subscribe = subscribe
+        self.webhook_port = webhook_port
+        self.webhook_host = webhook_host
+        self.webhook_auth = webhook_auth
+        self.messages = 0
+        self.rejected = 0  # POSTs recusados com 503 (backpressure)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._runner = None
+
+    @classmethod
+    def from_env(cls, env: Dict[str, str]) -> "Helius":
+        ring = EventRing(
+            capacity=int(env.get("HELIUS_RING_CAPACITY", 65536)),
+            window=float(env.get("HELIUS_WINDOW", 300)),
+            large_swap=float(env.get("HELIUS_LARGE_SWAP_SOL", 50)),
+            overflow=env.get("HELIUS_OVERFLOW", "drop_oldest"),
+        )
+        port = env.get("HELIUS_WEBHOOK_PORT")
+        return cls(
+            ring,
+            ws_url=env.get("HELIUS_WS_URL") or None,
+            subscribe=env.get("HELIUS_WS_SUBSCRIBE") or None,
+            webhook_port=int(port) if port else None,
+            webhook_host=env.get("HELIUS_WEBHOOK_HOST", "127.0.0.1"),
+            webhook_auth=env.get("HELIUS_WEBHOOK_AUTH") or None,
+            mints=parse_mints(env.get("HELIUS_MINTS") or env.get("BIRDEYE_ADDRESSES") or ""),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.ws_url or self.webhook_port)
+
+    # ------------------------------------------------------------------
+    # Leitura (thread da estratégia)
+    # ------------------------------------------------------------------
+
+    def recent_events(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return self.ring.recent(limit)
+
+    def get_market_snapshot(self, symbol: str) -> Dict[str, Any]:
+        """Agregados da janela como snapshot parcial (fonte do agregador de mercado)."""
+        self.ring.expire()
+        flow = self.ring.flow(self.mint_for(symbol))
+        if flow is None:
+            return {}
+        return {"net_flow": flow.net_flow, "large_swaps": flow.large_swaps, "swaps": flow.swaps}
+
+    def mint_for(self, symbol: Optional[str], address: Optional[str] = None) -> Optional[str]:
+        """Mint de um snapshot: o `address` da fonte, senão o mapa; sem mapeamento, o próprio símbolo."""
+        return address or self.mints.get(symbol, symbol)
+
+    def annotate(self, markets: List[Dict[str, Any]]):
+        """Acrescenta net_flow / large_swaps / swaps aos snapshots com eventos na janela."""
+        self.ring.expire()
+        for market in markets:
+            flow = self.ring.flow(self.mint_for(market.get("symbol"), market.get("address")))
+            if flow is not None:
+                market["net_flow"] = flow.net_flow
+                market["large_swaps"] = flow.large_swaps
+                market["swaps"] = flow.swaps
+
+    # ------------------------------------------------------------------
+    # Ingestão (thread própria)
+    # ------------------------------------------------------------------
+
+    def ingest(self, payload: Any) -> int:
+        self.messages += 1
+        return self.ring.push_many(decode_message(payload))
+
+    async def _handle_webhook(self, request):
+        from aiohttp import web
+
+        if self.webhook_auth and request.headers.get("Authorization") != self.webhook_auth:
+            return web.Response(status=401)
+        if self.ring.overflow == DROP_NEWEST and self.ring.saturated:
+            self.ring.expire()
+            if self.ring.saturated:
+                self.rejected += 1
+                return web.Response(status=503, headers={"Retry-After": "1"})
+        try:
+            payload = json.loads(await request.read())
+        except ValueError:
+            return web.Response(status=400)
+        self.ingest(payload)
+        return web.Response(status=200)
+
+    async def _start_webhook(self):
+        from aiohttp import web
+
+        app = web.Application(client_max_size=8 * 1024 * 1024)
+        app.router.add_post("/", self._handle_webhook)
+        app.router.add_post("/webhook", self._handle_webhook)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.webhook_host, self.webhook_port).start()
+        logger.info("Webhook Helius ouvindo em %s:%s", self.webhook_host, self.webhook_port)
+
+    async def _consume_ws(self):
+        import aiohttp
+
+        attempt = 0
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    async with session.ws_connect(self.ws_url, heartbeat=30) as ws:
+                        attempt = 0
+                        if self.subscribe:
+                            await ws.send_str(self.subscribe)
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                try:
+                                    payload = json.loads(msg.data)
+                                except ValueError:
+                                    continue
+                                self.ingest(payload)
+                            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("Stream Helius caiu: %s", e)
+                attempt += 1
+                await asyncio.sleep(min(30.0, 0.5 * 2 ** attempt))
+
+    async def _main(self):
+        if self.webhook_port:
+            await self._start_webhook()
+        if self.ws_url:
+            self._tasks.append(asyncio.ensure_future(self._consume_ws()))
+
+    def start(self):
+        """Sobe os transportes configurados numa thread daemon."""
+        if self._thread is not None or not self.enabled:
+            return
+
+        def _run():
+            loop = self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self._main())
+            except Exception as e:
+                logger.error("Falha ao iniciar a ingestão Helius: %s", e)
+                loop.close()
+                return
+            finally:
+                self._ready.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=_run, name="helius", daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        if not self._thread.is_alive():
+            self._thread = None
+            return
+
+        async def _shutdown():
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            if self._runner is not None:
+                await self._runner.cleanup()
 
-    def recent_events(self):
-        # Retornar eventos relevantes (stub)
-        return []
+        asyncio.run_coroutine_threadsafe(_shutdown(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(10)
+        self._loop.close()
+        self._thread = None
@@ -0,0 +1,205 @@
+"""Ring buffer de eventos on-chain (swaps e liquidez) com agregados por token.
+
+Capacidade fixa: as colunas (ts, token, tipo, valor) são arrays numpy
+pré-alocados, então a memória não cresce com a taxa de eventos. Cada evento
+que entra soma nos agregados do token (`TokenFlow`) e cada evento que sai —
+expirado pela janela de tempo ou despejado pelo overflow — é subtraído. A
+estratégia lê os agregados em O(1), sem copiar nem varrer os eventos.
+
+Overflow (ring cheio dentro da janela):
+
+- drop_oldest: o evento mais antigo sai para o novo entrar (contado em `evicted`)
+- drop_newest: o evento novo é recusado (contado em `dropped`); quem produz
+  pode usar `saturated` para segurar a fonte (o webhook responde 503)
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("solana_trader.events")
+
+SWAP_BUY = 0
+SWAP_SELL = 1
+LIQUIDITY_ADD = 2
+LIQUIDITY_REMOVE = 3
+KIND_NAMES = {SWAP_BUY: "buy", SWAP_SELL: "sell", LIQUIDITY_ADD: "liquidity_add", LIQUIDITY_REMOVE: "liquidity_remove"}
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+# (ts, token, tipo, valor em SOL)
+Event = Tuple[float, str, int, float]
+
+
+@dataclass
+class TokenFlow:
+    buy: float = 0.0  # SOL entrando no token
+    sell: float = 0.0  # SOL saindo
+    swaps: int = 0
+    large_swaps: int = 0
+    liquidity: float = 0.0  # adições - remoções
+
+    @property
+    def net_flow(self) -> float:
+        return self.buy - self.sell
+
+
+class EventRing:
+    def __init__(self, capacity: int = 65536, window: float = 300.0, large_swap: float = 50.0,
+                 overflow: str = DROP_OLDEST, high_watermark: float = 0.9, clock=None):
+        if overflow not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"overflow inválido: {overflow}")
+        self.capacity = capacity
+        self.window = window
+        self.large_swap = large_swap
+        self.overflow = overflow
+        self.high_watermark = high_watermark
+        self.clock = clock or time
+        self._ts = np.zeros(capacity, dtype=np.float64)
+        self._token = np.zeros(capacity, dtype=np.int32)
+        self._kind = np.zeros(capacity, dtype=np.int8)
+        self._value = np.zeros(capacity, dtype=np.float64)
+        self._tail = 0  # evento mais antigo
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.token_ids: Dict[str, int] = {}
+        self.tokens: List[str] = []
+        self._flows: List[TokenFlow] = []
+        self._counts: List[int] = []  # eventos no ring por token
+        self._free: List[int] = []  # ids de tokens sem eventos, reaproveitados
+
+        self.pushed = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def fill_ratio(self) -> float:
+        return self._size / self.capacity
+
+    @property
+    def saturated(self) -> bool:
+        return self.fill_ratio >= self.high_watermark
+
+    def stats(self) -> Dict[str, float]:
+        return {"size": self._size, "capacity": self.capacity, "pushed": self.pushed,
+                "dropped": self.dropped, "evicted": self.evicted, "expired": self.expired}
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def _token_id(self, token: str) -> int:
+        tid = self.token_ids.get(token)
+        if tid is None:
+            if self._free:
+                tid = self._free.pop()
+                self.tokens[tid] = token
+                self._flows[tid] = TokenFlow()
+            else:
+                tid = len(self.tokens)
+                self.tokens.append(token)
+                self._flows.append(TokenFlow())
+                self._counts.append(0)
+            self.token_ids[token] = tid
+        return tid
+
+    def _account(self, tid: int, kind: int, value: float, sign: int):
+        flow = self._flows[tid]
+        if kind == SWAP_BUY or kind == SWAP_SELL:
+            if kind == SWAP_BUY:
+                flow.buy += sign * value
+            else:
+                flow.sell += sign * value
+            flow.swaps += sign
+            if value >= self.large_swap:
+                flow.large_swaps += sign
+        elif kind == LIQUIDITY_ADD:
+            flow.liquidity += sign * value
+        else:
+            flow.liquidity -= sign * value
+
+    def _pop_oldest(self):
+        i = self._tail
+        tid = int(self._token[i])
+        self._counts[tid] -= 1
+        if self._counts[tid]:
+            self._account(tid, int(self._kind[i]), float(self._value[i]), -1)
+        else:
+            # último evento do token: libera o id (o dicionário não cresce com
+            # tokens que passaram pela janela) e zera sem resíduo de ponto flutuante
+            del self.token_ids[self.tokens[tid]]
+            self._free.append(tid)
+        self._tail = (i + 1) % self.capacity
+        self._size -= 1
+
+    def _push(self, ts: float, token: str, kind: int, value: float) -> bool:
+        if self._size == self.capacity:
+            if self.overflow == DROP_NEWEST:
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 10000 == 0:
+                    logger.warning("Ring de eventos cheio: %d eventos descartados", self.dropped)
+                return False
+            self._pop_oldest()
+            self.evicted += 1
+        i = (self._tail + self._size) % self.capacity
+        tid = self._token_id(token)
+        self._ts[i] = ts
+        self._token[i] = tid
+        self._kind[i] = kind
+        self._value[i] = value
+        self._size += 1
+        self.pushed += 1
+        self._counts[tid] += 1
+        self._account(tid, kind, value, 1)
+        return True
+
+    def push(self, ts: float, token: str, kind: int, value: float) -> bool:
+        with self._lock:
+            return self._push(ts, token, kind, value)
+
+    def push_many(self, events: Iterable[Event]) -> int:
+        """Grava um lote (uma mensagem decodificada); devolve quantos entraram."""
+        accepted = 0
+        with self._lock:
+            for ts, token, kind, value in events:
+                accepted += self._push(ts, token, kind, value)
+        return accepted
+
+    def expire(self, now: Optional[float] = None):
+        """Tira do ring (e dos agregados) os eventos mais velhos que a janela."""
+        cutoff = (self.clock.time() if now is None else now) - self.window
+        with self._lock:
+            ts = self._ts
+            while self._size and ts[self._tail] < cutoff:
+                self._pop_oldest()
+                self.expired += 1
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def flow(self, token: str) -> Optional[TokenFlow]:
+        """Cópia dos agregados do token na janela (None se não há eventos dele)."""
+        with self._lock:
+            tid = self.token_ids.get(token)
+            return None if tid is None else replace(self._flows[tid])
+
+    def recent(self, limit: int = 100) -> List[Dict]:
+        """Os `limit` eventos mais novos, do mais novo para o mais antigo."""
+        with self._lock:
+            n = min(limit, self._size)
+            idx = (self._tail + self._size - 1 - np.arange(n)) % self.capacity
+            return [
+                {"timestamp": float(self._ts[i]), "token": self.tokens[self._token[i]],
+                 "kind": KIND_NAMES[int(self._kind[i])], "value": float(self._value[i])}
+                for i in idx
+            ]
@@ -0,0 +1,242 @@
+"""Indicadores incrementais por símbolo sobre janelas deslizantes.
+
+`IndicatorEngine` guarda, para cada símbolo, o estado mínimo para atualizar
+em O(1) a cada tick, sem varrer o histórico:
+
+- EMA do preço (`ema_span` ticks);
+- volatilidade: desvio padrão dos log-retornos dos últimos `window` ticks;
+- VWAP dos últimos `window` ticks (ponderado pelo volume do snapshot);
+- z-score do volume do tick contra os últimos `window` ticks;
+- RSI de Wilder (`rsi_period`).
+
+As janelas são buffers circulares de tamanho fixo (numpy, alocados uma vez
+por símbolo) com somas e somas de quadrados correntes: entra o valor novo,
+sai o que ocupava a posição. A cada `window` ticks as somas são recalculadas
+do buffer, para o erro de ponto flutuante não acumular (custo amortizado O(1)).
+
+`warm_up` carrega uma série gravada (ex.: `SnapshotStore.read`) de uma vez,
+vetorizado: EMA e RSI pela forma fechada da média exponencial sobre a cauda
+da série, buffers com os últimos `window` ticks. O resultado é o mesmo de
+alimentar a série tick a tick.
+"""
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+# linhas do buffer de cada símbolo
+_RET, _VOL, _PV = 0, 1, 2
+# peso abaixo do qual a cauda de uma média exponencial é desprezada no warm-up
+_EPSILON = 1e-12
+
+
+@dataclass
+class Indicators:
+    samples: int
+    price: float
+    ema: float
+    volatility: float  # desvio padrão dos log-retornos por tick
+    vwap: float  # nan sem volume na janela
+    volume_z: float
+    rsi: float
+    ready: bool  # janela cheia
+
+
+class _SymbolState:
+    __slots__ = ("count", "price", "ema", "avg_gain", "avg_loss", "volume", "buf",
+                 "ret_sum", "ret_sq", "vol_sum", "vol_sq", "pv_sum")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.price = 0.0
+        self.ema = 0.0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.volume = 0.0  # volume do último tick
+        self.buf = np.zeros((3, window), dtype=np.float64)
+        self.ret_sum = self.ret_sq = 0.0
+        self.vol_sum = self.vol_sq = 0.0
+        self.pv_sum = 0.0
+
+    def resync(self):
+        buf = self.buf
+        self.ret_sum, self.vol_sum, self.pv_sum = buf.sum(axis=1).tolist()
+        self.ret_sq = float(buf[_RET] @ buf[_RET])
+        self.vol_sq = float(buf[_VOL] @ buf[_VOL])
+
+
+def _ema_tail(seed: float, values: np.ndarray, alpha: float) -> float:
+    """Valor final de `x = x + alpha * (v - x)` a partir de `seed`, em forma fechada."""
+    n = len(values)
+    if not n:
+        return seed
+    decay = 1.0 - alpha
+    horizon = n if decay <= 0 else min(n, int(math.log(_EPSILON) / math.log(decay)) + 1)
+    if horizon < n:
+        # o seed e o começo da série pesam menos que _EPSILON: parte do primeiro valor da cauda
+        seed, values = float(values[n - horizon - 1]), values[n - horizon:]
+        n = horizon
+    weights = decay ** np.arange(n - 1, -1, -1, dtype=np.float64)
+    return float(decay ** n * seed + alpha * (weights @ values))
+
+
+class IndicatorEngine:
+    def __init__(self, window: int = 60, ema_span: int = 20, rsi_period: int = 14):
+        if window < 2 or ema_span < 1 or rsi_period < 1:
+            raise ValueError("precisa window >= 2, ema_span >= 1 e rsi_period >= 1")
+        self.window = window
+        self.ema_span = ema_span
+        self.rsi_period = rsi_period
+        self.alpha = 2.0 / (ema_span + 1)
+        self._states: Dict[str, _SymbolState] = {}
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._states
+
+    def reset(self, symbol: Optional[str] = None):
+        if symbol is None:
+            self._states.clear()
+        else:
+            self._states.pop(symbol, None)
+
+    # ------------------------------------------------------------------
+    # Atualização
+    # ------------------------------------------------------------------
+
+    def update(self, symbol: str, price: float, volume: Optional[float] = None) -> Optional[Indicators]:
+        """Acrescenta um tick (O(1)) e devolve os indicadores atualizados."""
+        state = self._states.get(symbol)
+        if state is None:
+            state = self._states[symbol] = _SymbolState(self.window)
+        if price is None or not 0 < price < math.inf:  # None/NaN/inf/<= 0: tick ignorado
+            return self._read(state) if state.count else None
+        price = float(price)
+        volume = float(volume) if volume is not None and volume == volume and volume > 0 else 0.0
+        buf = state.buf
+        window = self.window
+        n = state.count
+
+        if n == 0:
+            state.ema = price
+        else:
+            state.ema += self.alpha * (price - state.ema)
+            # Wilder: média simples nos primeiros `rsi_period` diffs, depois suavização 1/period
+            diff = price - state.price
+            k = n if n < self.rsi_period else self.rsi_period
+            state.avg_gain += ((diff if diff > 0 else 0.0) - state.avg_gain) / k
+            state.avg_loss += ((-diff if diff < 0 else 0.0) - state.avg_loss) / k
+            ret = math.log(price / state.price)
+            i = (n - 1) % window  # retornos: um a menos que os ticks
+            old = buf[_RET, i]
+            buf[_RET, i] = ret
+            state.ret_sum += ret - old
+            state.ret_sq += ret * ret - old * old
+
+        i = n % window
+        old_vol = buf[_VOL, i]
+        pv = price * volume
+        state.pv_sum += pv - buf[_PV, i]
+        buf[_VOL, i] = volume
+        buf[_PV, i] = pv
+        state.vol_sum += volume - old_vol
+        state.vol_sq += volume * volume - old_vol * old_vol
+
+        state.count = n + 1
+        state.price = price
+        state.volume = volume
+        if state.count % window == 0:
+            state.resync()
+        return self._read(state)
+
+    def update_many(self, ticks: Iterable[Dict]) -> Dict[str, Indicators]:
+        """Atualiza a partir de snapshots ({"symbol", "price", "volume"/"volume_24h"})."""
+        out = {}
+        for market in ticks:
+            symbol = market.get("symbol")
+            volume = market.get("volume")
+            ind = self.update(symbol, market.get("price"), market.get("volume_24h") if volume is None else volume)
+            if ind is not None:
+                out[symbol] = ind
+        return out
+
+    def warm_up(self, symbol: str, prices, volumes=None) -> Optional[Indicators]:
+        """
+        Carrega uma série histórica inteira (em ordem de tempo) de uma vez.
+        Substitui o estado do símbolo; o resultado é o mesmo de `update` tick a tick.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if volumes is None:
+            volumes = np.zeros(len(prices))
+        volumes = np.nan_to_num(np.asarray(volumes, dtype=np.float64), nan=0.0)
+        volumes[volumes < 0] = 0.0
+        valid = (prices > 0) & np.isfinite(prices)  # NaN e inf também saem
+        prices, volumes = prices[valid], volumes[valid]
+        self._states.pop(symbol, None)
+        n = len(prices)
+        if not n:
+            return None
+
+        window = self.window
+        state = self._states[symbol] = _SymbolState(window)
+        state.count = n
+        state.price = float(prices[-1])
+        state.volume = float(volumes[-1])
+        state.ema = _ema_tail(float(prices[0]), prices[1:], self.alpha)
+
+        diffs = np.diff(prices)
+        gains, losses = np.maximum(diffs, 0.0), np.maximum(-diffs, 0.0)
+        p = self.rsi_period
+        if len(diffs):
+            state.avg_gain = _ema_tail(float(gains[:p].mean()), gains[p:], 1.0 / p)
+            state.avg_loss = _ema_tail(float(losses[:p].mean()), losses[p:], 1.0 / p)
+
+        # buffers: retorno j (1..n-1) na posição (j-1) % window, tick i na posição i % window
+        rets = np.log(prices[1:] / prices[:-1])
+        m = min(len(rets), window)
+        if m:
+            slots = np.arange(len(rets) - m, len(rets)) % window
+            state.buf[_RET, slots] = rets[-m:]
+        m = min(n, window)
+        slots = np.arange(n - m, n) % window
+        state.buf[_VOL, slots] = volumes[-m:]
+        state.buf[_PV, slots] = prices[-m:] * volumes[-m:]
+        state.resync()
+        return self._read(state)
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def get(self, symbol: str) -> Optional[Indicators]:
+        state = self._states.get(symbol)
+        return self._read(state) if state is not None and state.count else None
+
+    def _read(self, state: _SymbolState) -> Indicators:
+        window = self.window
+        n = state.count
+
+        m = min(n - 1, window)
+        volatility = 0.0
+        if m > 1:
+            volatility = math.sqrt(max(0.0, (state.ret_sq - state.ret_sum * state.ret_sum / m) / (m - 1)))
+
+        m = min(n, window)
+        vwap = state.pv_sum / state.vol_sum if state.vol_sum > 0 else math.nan
+        volume_z = 0.0
+        if m > 1:
+            mean = state.vol_sum / m
+            var = (state.vol_sq - state.vol_sum * mean) / (m - 1)
+            # variância relativa ínfima = resíduo de arredondamento de uma janela constante
+            if var > 1e-12 * mean * mean:
+                volume_z = (state.volume - mean) / math.sqrt(var)
+
+        if state.avg_loss > 0:
+            rsi = 100.0 - 100.0 / (1.0 + state.avg_gain / state.avg_loss)
+        else:
+            rsi = 100.0 if state.avg_gain > 0 else 50.0
+
+        return Indicators(n, state.price, state.ema, volatility, vwap, volume_z, rsi, n >= window)
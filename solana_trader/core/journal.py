@@ -0,0 +1,302 @@
+"""Estado durável do portfólio: journal append-only + snapshots periódicos.
+
+Layout em disco:
+
+    <root>/snapshot.json                 último snapshot (estado + seq do último trade incluído)
+    <root>/journal-<seq inicial>.log     segmentos JSONL, um trade por linha: {"seq": n, "trade": {...}}
+
+Cada trade aceito vira uma linha no segmento ativo. A escrita vai só para o
+buffer do arquivo (O(1), sem syscall na maioria das vezes); uma thread de
+fundo faz flush + fsync a cada `sync_interval`. Um crash perde no máximo esse
+intervalo de fills — é a troca por não esperar fsync no caminho quente.
+
+A cada `snapshot_every` trades o estado do `Portfolio` é copiado e o journal
+rotaciona; a thread de fundo grava o snapshot (tmp + fsync + os.replace) e só
+então apaga os segmentos antigos além de `keep_segments`. A recuperação lê o
+snapshot e reaplica só os segmentos que começam depois dele, então o restart
+não depende do tamanho do histórico. Uma linha cortada no fim do último
+segmento (crash no meio da escrita) é descartada e truncada.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from solana_trader.core.portfolio import Portfolio
+
+logger = logging.getLogger("solana_trader.journal")
+
+SNAPSHOT_FILE = "snapshot.json"
+_PREFIX = "journal-"
+_SUFFIX = ".log"
+# encoder reaproveitado: json.dumps com argumentos monta um encoder novo a cada chamada
+_encode = json.JSONEncoder(separators=(",", ":"), default=float).encode
+
+
+def _segment_name(first_seq: int) -> str:
+    return f"{_PREFIX}{first_seq:012d}{_SUFFIX}"
+
+
+def _write_json_durable(path: str, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Journal:
+    """Segmentos JSONL append-only; fsync em background."""
+
+    def __init__(self, root: str, sync_interval: float = 1.0):
+        self.root = root
+        self.sync_interval = sync_interval
+        os.makedirs(root, exist_ok=True)
+        self.next_seq = 1
+        self._file = None
+        self._retired: List[Any] = []  # segmentos rotacionados, fechados pela thread de sync
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def segments(self) -> List[Tuple[int, str]]:
+        """(seq inicial, caminho) de cada segmento, em ordem."""
+        found = []
+        for name in os.listdir(self.root):
+            if name.startswith(_PREFIX) and name.endswith(_SUFFIX):
+                try:
+                    found.append((int(name[len(_PREFIX):-len(_SUFFIX)]), os.path.join(self.root, name)))
+                except ValueError:
+                    continue
+        return sorted(found)
+
+    def replay(self, after_seq: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Registros com seq > `after_seq`, lendo só os segmentos necessários."""
+        segments = self.segments()
+        # o segmento que contém after_seq + 1 é o último que começa em <= after_seq + 1
+        start = 0
+        for i, (first, _) in enumerate(segments):
+            if first <= after_seq + 1:
+                start = i
+        for i, (_, path) in enumerate(segments[start:], start):
+            last = i == len(segments) - 1
+            valid_end = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("linha incompleta")
+                        entry = json.loads(line)
+                        seq = entry["seq"]
+                    except (ValueError, KeyError, TypeError):
+                        if not last:
+                            raise ValueError(f"journal corrompido em {path} (offset {valid_end})")
+                        logger.warning("Descartando registro incompleto no fim de %s", path)
+                        break
+                    valid_end += len(line)
+                    if seq > after_seq:
+                        self.next_seq = seq + 1
+                        yield seq, entry["trade"]
+            if last and valid_end != os.path.getsize(path):
+                os.truncate(path, valid_end)
+        self.next_seq = max(self.next_seq, after_seq + 1)
+
+    def open(self, next_seq: int):
+        """Abre (ou continua) o segmento que começa em `next_seq`."""
+        with self._lock:
+            self.next_seq = next_seq
+            self._file = open(os.path.join(self.root, _segment_name(next_seq)), "ab")
+
+    def append(self, trade: Dict[str, Any]) -> int:
+        with self._lock:
+            seq = self.next_seq
+            self._file.write((_encode({"seq": seq, "trade": trade}) + "\n").encode())
+            self.next_seq = seq + 1
+            return seq
+
+    def rotate(self):
+        """Fecha o segmento ativo e abre outro começando no próximo seq."""
+        with self._lock:
+            if self._file is not None:
+                self._retired.append(self._file)
+            self._file = open(os.path.join(self.root, _segment_name(self.next_seq)), "ab")
+
+    def sync(self):
+        """flush + fsync de tudo o que foi escrito até agora."""
+        with self._sync_lock:
+            with self._lock:
+                retired, self._retired = self._retired, []
+                current = self._file
+                for f in retired + ([current] if current is not None else []):
+                    f.flush()
+            # fsync fora do lock: append segue enquanto o disco confirma
+            for f in retired:
+                os.fsync(f.fileno())
+                f.close()
+            if current is not None and not current.closed:
+                os.fsync(current.fileno())
+
+    def prune(self, before_seq: int, keep: Optional[int] = None):
+        """Apaga segmentos inteiramente anteriores a `before_seq`, mantendo os `keep` mais novos."""
+        segments = self.segments()
+        old = [path for (first, path), (nxt, _) in zip(segments, segments[1:]) if nxt <= before_seq]
+        if keep:
+            old = old[:-keep] if len(old) > keep else []
+        for path in old:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning("Não foi possível apagar %s: %s", path, e)
+
+    def close(self):
+        self.sync()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class StateStore:
+    """
+    Portfólio durável: `load()` recupera (snapshot + replay) e
+    `apply_trade()` aplica e registra no journal.
+    """
+
+    def __init__(self, root: str, snapshot_every: int = 1000, sync_interval: float = 1.0,
+                 keep_segments: Optional[int] = None, history: int = 100):
+        self.root = root
+        self.snapshot_every = max(1, snapshot_every)
+        self.keep_segments = keep_segments
+        self.journal = Journal(root, sync_interval)
+        self.portfolio: Optional[Portfolio] = None
+        self.trades_total = 0
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self.replayed = 0
+        self.recovery_seconds = 0.0
+        self._since_snapshot = 0
+        self._snapshot_path = os.path.join(root, SNAPSHOT_FILE)
+        self._pending_snapshot: Optional[Dict[str, Any]] = None
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Recuperação
+    # ------------------------------------------------------------------
+
+    def load(self, starting_cash: float = 1000.0) -> Portfolio:
+        t0 = time.perf_counter()
+        snapshot = self._read_snapshot()
+        if snapshot is not None:
+            portfolio = Portfolio.from_state(snapshot["portfolio"])
+            self.trades_total = snapshot.get("trades_total", snapshot["seq"])
+            self.recent.extend(snapshot.get("recent") or [])
+            after = snapshot["seq"]
+        else:
+            portfolio = Portfolio(starting_cash=starting_cash)
+            after = 0
+
+        replayed = 0
+        for _, trade in self.journal.replay(after):
+            # o journal só tem trades aceitos; reaplicar dá o mesmo estado
+            portfolio.apply_trade(trade)
+            self.trades_total += 1
+            self.recent.append(trade)
+            replayed += 1
+        if replayed:
+            portfolio.resync()
+
+        self.portfolio = portfolio
+        self.replayed = replayed
+        self._since_snapshot = replayed
+        self.journal.open(self.journal.next_seq)
+        self.recovery_seconds = time.perf_counter() - t0
+        logger.info("Estado recuperado: %d trades (%d reaplicados do journal) em %.1fms",
+                    self.trades_total, replayed, self.recovery_seconds * 1000)
+        self._start()
+        return portfolio
+
+    def _read_snapshot(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._snapshot_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            # snapshot é gravado com os.replace; inválido só se editado à mão
+            raise ValueError(f"snapshot inválido em {self._snapshot_path}: {e}")
+
+    # ------------------------------------------------------------------
+    # Caminho quente
+    # ------------------------------------------------------------------
+
+    def apply_trade(self, trade: Dict[str, Any]) -> bool:
+        if not self.portfolio.apply_trade(trade):
+            return False
+        record = dict(trade)
+        self.journal.append(record)
+        self.trades_total += 1
+        self.recent.append(record)
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+        return True
+
+    def snapshot(self):
+        """Copia o estado agora; a gravação fica com a thread de fundo."""
+        state = {
+            "seq": self.journal.next_seq - 1,
+            "trades_total": self.trades_total,
+            "portfolio": self.portfolio.to_state(),
+            "recent": list(self.recent),
+            "created_at": time.time(),
+        }
+        self.journal.rotate()
+        self._since_snapshot = 0
+        with self._pending_lock:
+            self._pending_snapshot = state
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Thread de fundo
+    # ------------------------------------------------------------------
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sync_loop, name="state-sync", daemon=True)
+            self._thread.start()
+
+    def _flush_pending(self):
+        self.journal.sync()
+        with self._pending_lock:
+            state, self._pending_snapshot = self._pending_snapshot, None
+        if state is not None:
+            _write_json_durable(self._snapshot_path, state)
+            self.journal.prune(state["seq"] + 1, self.keep_segments)
+
+    def _sync_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.journal.sync_interval)
+            self._wake.clear()
+            try:
+                self._flush_pending()
+            except Exception as e:
+                logger.error("Falha ao gravar o estado: %s", e)
+
+    def close(self, snapshot: bool = True):
+        """Para a thread de fundo e grava tudo (com snapshot final, por padrão)."""
+        if self.portfolio is None:
+            return
+        if snapshot and self._since_snapshot:
+            self.snapshot()
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._flush_pending()
+        self.journal.close()
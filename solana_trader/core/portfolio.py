@@ -1,17 +1,96 @@
-"""Portfólio simulado em memória."""
-from typing import Dict
+"""Portfólio simulado em memória.
+
+Mantém um índice de preços (último preço visto por símbolo, vindo dos
+snapshots ou das execuções) e agregados incrementais — valor das posições,
+custo total e PnL realizado — atualizados em O(1) a cada tick ou fill.
+Assim `equity`, `exposure` e `unrealized_pnl` não recalculam o livro inteiro.
+"""
+from typing import Any, Dict, Iterable
 
 
 class Portfolio:
     def __init__(self, starting_cash: float = 1000.0):
         self.cash = float(starting_cash)
         self.positions: Dict[str, float] = {}  # symbol -> qty
+        self.prices: Dict[str, float] = {}  # symbol -> último preço
+        self.cost_basis: Dict[str, float] = {}  # symbol -> custo total da posição
+        self.realized_pnl = 0.0
+        self._position_value = 0.0  # soma de qty * preço
+        self._cost_total = 0.0
+
+    # ------------------------------------------------------------------
+    # Preços
+    # ------------------------------------------------------------------
+
+    def update_price(self, symbol: str, price: float):
+        price = float(price)
+        qty = self.positions.get(symbol)
+        if qty:
+            self._position_value += qty * (price - self.prices.get(symbol, 0.0))
+        self.prices[symbol] = price
+
+    def update_prices(self, markets: Iterable[Dict[str, Any]]):
+        """Alimenta o índice com snapshots ({"symbol", "price", ...})."""
+        for market in markets:
+            price = market.get("price")
+            if price is not None:
+                self.update_price(market.get("symbol"), price)
+
+    # ------------------------------------------------------------------
+    # Agregados
+    # ------------------------------------------------------------------
+
+    @property
+    def equity(self) -> float:
+        return self.cash + self._position_value
+
+    @property
+    def position_value(self) -> float:
+        return self._position_value
 
-    def total_value(self, price_lookup=lambda s: 0):
-        # preço da posição não disponível por padrão; usar 0 ou passar um lookup
+    @property
+    def unrealized_pnl(self) -> float:
+        return self._position_value - self._cost_total
+
+    def exposure(self, symbol: str) -> float:
+        return self.positions.get(symbol, 0.0) * self.prices.get(symbol, 0.0)
+
+    def total_value(self, price_lookup=None):
+        # sem lookup, usa o índice de preços interno (O(1))
+        if price_lookup is None:
+            return self.equity
         value_positions = sum(qty * price_lookup(sym) for sym, qty in self.positions.items())
         return self.cash + value_positions
 
+    def to_state(self) -> Dict[str, Any]:
+        """Estado serializável (JSON) para snapshots; O(posições)."""
+        return {
+            "cash": self.cash,
+            "positions": dict(self.positions),
+            "prices": dict(self.prices),
+            "cost_basis": dict(self.cost_basis),
+            "realized_pnl": self.realized_pnl,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "Portfolio":
+        portfolio = cls(starting_cash=state["cash"])
+        portfolio.positions = dict(state.get("positions") or {})
+        portfolio.prices = dict(state.get("prices") or {})
+        portfolio.cost_basis = dict(state.get("cost_basis") or {})
+        portfolio.realized_pnl = float(state.get("realized_pnl", 0.0))
+        portfolio.resync()
+        return portfolio
+
+    def resync(self):
+        """Recalcula os agregados do zero (corrige erro acumulado de ponto flutuante)."""
+        self._position_value = sum(qty * self.prices.get(sym, 0.0) for sym, qty in self.positions.items())
+        self._cost_total = sum(self.cost_basis.values())
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+
     def apply_trade(self, action: Dict) -> bool:
         t = action.get("type")
         sym = action.get("symbol")
@@ -22,17 +101,32 @@ class Portfolio:
             cost = qty * price
             if cost > self.cash:
                 return False
+            self.update_price(sym, price)
             self.cash -= cost
             self.positions[sym] = self.positions.get(sym, 0) + qty
+            self.cost_basis[sym] = self.cost_basis.get(sym, 0.0) + cost
+            self._position_value += cost
+            self._cost_total += cost
             return True
         elif t == "sell":
             pos = self.positions.get(sym, 0)
             if qty > pos:
                 qty = pos
+            self.update_price(sym, price)
             revenue = qty * price
+            basis = self.cost_basis.get(sym, 0.0)
+            sold_basis = basis * (qty / pos) if pos > 0 else 0.0
             self.positions[sym] = pos - qty
+            self._position_value -= revenue
+            self._cost_total -= sold_basis
+            self.realized_pnl += revenue - sold_basis
             if self.positions[sym] <= 0:
                 del self.positions[sym]
+                self.cost_basis.pop(sym, None)
+                if not self.positions:
+                    self._position_value = self._cost_total = 0.0
+            else:
+                self.cost_basis[sym] = basis - sold_basis
             self.cash += revenue
             return True
         return False
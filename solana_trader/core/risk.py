@@ -1,30 +1,196 @@
-"""Gerencia risco e dimensionamento simples."""
-from typing import Dict, Any
+"""Gerencia risco e dimensionamento.
+
+Limites de compra (frações do equity; 0 desliga o limite):
+
+- MAX_POSITION_PCT: tamanho de cada ordem
+- MAX_TOKEN_EXPOSURE_PCT: exposição por token depois da ordem
+- MAX_GROSS_EXPOSURE_PCT / MAX_NET_EXPOSURE_PCT: exposição bruta/líquida do livro
+- MAX_LIQUIDITY_PCT: ordem como fração da liquidez do pool (dos snapshots)
+- MAX_DAILY_LOSS_PCT: queda do equity desde o início do dia (UTC) que
+  suspende compras até o dia seguinte
+
+Ordem acima de um limite é reduzida até caber; se não sobra nada, é rejeitada.
+Vendas só precisam de posição aberta (sempre reduzem risco).
+
+`check_batch` avalia todas as ordens de um step de uma vez, vetorizado: as
+ordens consomem os limites compartilhados na ordem da lista (vendas primeiro
+liberam caixa e exposição). Exposições vêm dos agregados do `Portfolio` e a
+liquidez de um índice mantido por `observe`, então o custo depende só do
+número de ordens, não do número de posições.
+"""
+import math
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
 
 
 class RiskManager:
-    def __init__(self, env: Dict[str, str]):
+    def __init__(self, env: Dict[str, str], clock=None):
         self.env = env
         self.max_position_pct = float(env.get("MAX_POSITION_PCT", 0.05))  # 5% default
+        self.max_token_pct = float(env.get("MAX_TOKEN_EXPOSURE_PCT", 0.2))
+        self.max_gross_pct = float(env.get("MAX_GROSS_EXPOSURE_PCT", 1.0))
+        self.max_net_pct = float(env.get("MAX_NET_EXPOSURE_PCT", 1.0))
+        self.max_liquidity_pct = float(env.get("MAX_LIQUIDITY_PCT", 0.02))
+        self.max_daily_loss_pct = float(env.get("MAX_DAILY_LOSS_PCT", 0.05))
+        self.clock = clock or time
+        self.liquidity: Dict[str, float] = {}  # symbol -> liquidez do pool (último snapshot)
+        self._day: Optional[int] = None
+        self._day_start_equity = 0.0
+        self.halted = False  # perda diária estourada: só vendas até virar o dia
+
+    def observe(self, markets: Iterable[Dict[str, Any]]):
+        """Atualiza o índice de liquidez com os snapshots do step."""
+        for market in markets:
+            liquidity = market.get("liquidity")
+            if liquidity:
+                self.liquidity[market.get("symbol")] = float(liquidity)
+
+    def _headroom(self, portfolio, equity: float, released: float = 0.0, proceeds: float = 0.0) -> float:
+        """Quanto ainda cabe em compras no livro todo (caixa, exposição bruta e líquida)."""
+        # livro long-only: exposição bruta == líquida == valor das posições
+        exposure = portfolio.position_value - released
+        headroom = portfolio.cash + proceeds
+        if self.max_gross_pct:
+            headroom = min(headroom, self.max_gross_pct * equity - exposure)
+        if self.max_net_pct:
+            headroom = min(headroom, self.max_net_pct * equity - exposure)
+        return max(0.0, headroom)
+
+    def _update_day(self, equity: float) -> bool:
+        """Vira o dia se preciso; True se as compras estão suspensas pela perda diária."""
+        day = int(self.clock.time() // 86400)
+        if day != self._day:
+            self._day = day
+            self._day_start_equity = equity
+            self.halted = False
+        if self.max_daily_loss_pct and self._day_start_equity > 0 and not self.halted:
+            self.halted = equity <= self._day_start_equity * (1 - self.max_daily_loss_pct)
+        return self.halted
+
+    def _order_cap(self, equity: float, exposure: float, liquidity: float) -> float:
+        cap = self.max_position_pct * equity if self.max_position_pct else math.inf
+        if self.max_token_pct:
+            cap = min(cap, self.max_token_pct * equity - exposure)
+        if self.max_liquidity_pct and liquidity > 0:
+            cap = min(cap, self.max_liquidity_pct * liquidity)
+        return max(0.0, cap)
+
+    @staticmethod
+    def _resize(action: Dict[str, Any], value: float, price: float) -> Optional[Dict[str, Any]]:
+        # arredonda para baixo: a ordem nunca passa do limite (nem do caixa)
+        units = math.floor(value / price * 1e8)
+        if units / 1e8 * price > value:
+            units -= 1  # o float de qty * price passou do limite por um ulp
+        qty = units / 1e8
+        if qty <= 0:
+            return None
+        if qty < float(action.get("qty", 0)):
+            action["qty"] = qty
+        return action
 
     def check(self, action: Dict[str, Any], portfolio) -> Dict[str, Any]:
-        # Se for buy, dimensiona pra não exceder max_position_pct do portfólio
+        """Uma ordem contra o portfólio atual (mesmos limites de `check_batch`)."""
         if action.get("type") == "buy":
+            equity = portfolio.equity
+            if self._update_day(equity):
+                return None
             price = float(action.get("price", 0))
-            qty = float(action.get("qty", 0))
-            value = price * qty
-            max_value = portfolio.total_value() * self.max_position_pct
-            if value > max_value:
-                # redimensionar
-                safe_qty = max_value / price if price > 0 else 0
-                action["qty"] = round(safe_qty, 8)
-                if action["qty"] <= 0:
-                    return None
-            # checar caixa
-            if value > portfolio.cash:
+            if price <= 0:
                 return None
+            symbol = action.get("symbol")
+            value = min(
+                float(action.get("qty", 0)) * price,
+                self._order_cap(equity, portfolio.exposure(symbol), self.liquidity.get(symbol, 0.0)),
+                self._headroom(portfolio, equity),
+            )
+            return self._resize(action, value, price)
         if action.get("type") == "sell":
             symbol = action.get("symbol")
             if portfolio.positions.get(symbol, 0) <= 0:
                 return None
         return action
+
+    def check_batch(self, actions: List[Dict[str, Any]], portfolio) -> List[Optional[Dict[str, Any]]]:
+        """Todas as ordens de uma vez; devolve, na mesma ordem, a ordem ajustada ou None."""
+        out: List[Optional[Dict[str, Any]]] = [None] * len(actions)
+        equity = portfolio.equity
+        halted = self._update_day(equity)
+
+        # vendas: liberam exposição do token e do livro, e caixa para as compras
+        left: Dict[str, float] = {}  # posição que sobra depois das vendas da lista
+        proceeds = released = 0.0
+        buys = []
+        for i, action in enumerate(actions):
+            kind = action.get("type")
+            if kind == "sell":
+                symbol = action.get("symbol")
+                position = left.get(symbol, portfolio.positions.get(symbol, 0))
+                if position <= 0:
+                    continue
+                qty = min(float(action.get("qty", 0)), position)
+                left[symbol] = position - qty
+                proceeds += qty * float(action.get("price", 0))
+                released += qty * portfolio.prices.get(symbol, 0.0)
+                out[i] = action
+            elif kind == "buy":
+                if not halted and float(action.get("price", 0)) > 0:
+                    buys.append(i)
+            else:
+                out[i] = action
+        if not buys:
+            return out
+
+        prices = portfolio.prices
+        if len(buys) == 1:
+            # uma compra só (o caso comum por step): escalar, sem o custo fixo do numpy
+            action = actions[buys[0]]
+            symbol = action.get("symbol")
+            price = float(action["price"])
+            exposure = left[symbol] * prices.get(symbol, 0.0) if symbol in left else portfolio.exposure(symbol)
+            value = min(float(action.get("qty", 0)) * price,
+                        self._order_cap(equity, exposure, self.liquidity.get(symbol, 0.0)),
+                        self._headroom(portfolio, equity, released, proceeds))
+            out[buys[0]] = self._resize(action, value, price)
+            return out
+
+        symbols = [actions[i].get("symbol") for i in buys]
+        price = np.array([float(actions[i]["price"]) for i in buys])
+        value = np.array([float(actions[i].get("qty", 0)) for i in buys]) * price
+        exposure = np.array([left[s] * prices.get(s, 0.0) if s in left else portfolio.exposure(s) for s in symbols])
+        liquidity = np.array([self.liquidity.get(s, 0.0) for s in symbols])
+
+        # limites por ordem
+        if self.max_position_pct:
+            value = np.minimum(value, self.max_position_pct * equity)
+        if self.max_liquidity_pct:
+            value = np.where(liquidity > 0, np.minimum(value, self.max_liquidity_pct * liquidity), value)
+        value = np.maximum(value, 0.0)
+
+        # limite por token: ordens do mesmo token dividem a folga, na ordem da lista
+        if self.max_token_pct:
+            headroom = np.maximum(0.0, self.max_token_pct * equity - exposure)
+            ids: Dict[str, int] = {}
+            group = np.array([ids.setdefault(s, len(ids)) for s in symbols])
+            if len(ids) == len(symbols):
+                value = np.minimum(value, headroom)
+            else:
+                order = np.argsort(group, kind="stable")
+                v = value[order]
+                g = group[order]
+                first = np.empty(len(g), dtype=bool)
+                first[0] = True
+                np.not_equal(g[1:], g[:-1], out=first[1:])
+                before = np.cumsum(v) - v  # consumido antes de cada ordem, no livro todo
+                before -= before[first][np.cumsum(first) - 1]  # ... e só no próprio token
+                value[order] = np.clip(headroom[order] - before, 0.0, v)
+
+        # livro: caixa e exposição bruta/líquida, também na ordem da lista
+        headroom = self._headroom(portfolio, equity, released, proceeds)
+        value = np.clip(headroom - (np.cumsum(value) - value), 0.0, value)
+
+        for i, v, p in zip(buys, value.tolist(), price.tolist()):
+            out[i] = self._resize(actions[i], v, p)
+        return out
+
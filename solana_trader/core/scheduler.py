@@ -0,0 +1,212 @@
+"""Polling adaptativo por grupo e circuit breaker, do `Agent.run` e do watcher.
+
+`AdaptiveScheduler` mantém um intervalo por grupo (SYMBOL_GROUPS no agente,
+grupos de tokens no watcher) entre `min_interval` e `max_interval`. A
+pressão do grupo é o maior entre:
+
+- volatilidade: variação média de preço dos símbolos do grupo entre dois
+  steps, normalizada para `base_interval` (movimento de passeio aleatório
+  cresce com a raiz do tempo) e dividida por `volatility_ref`;
+- churn: mudanças (ações executadas, sinais novos) por símbolo no step,
+  dividido por `churn_ref`.
+
+Suavizada por EWMA, pressão 0 leva a `max_interval`, pressão >= 1 a
+`min_interval`, e no meio o intervalo é interpolado geometricamente. Sem
+observações o grupo usa `base_interval`.
+
+Quota: com `quota` chamadas por `quota_window` segundos, cada grupo tem uma
+fatia igual (com folga de `headroom`) e o intervalo nunca fica menor do que
+o necessário para caber nela; com a janela esgotada, o próximo step espera.
+
+`CircuitBreaker`: `failure_threshold` falhas seguidas abrem o circuito por
+`reset_timeout`, dobrando a cada nova abertura até `max_timeout`. Depois do
+prazo passa uma consulta de teste (half-open): sucesso fecha, falha reabre.
+
+O relógio é injetável (`clock`): o agente passa `clock.time`, então o
+backtest com relógio simulado agenda no tempo do replay.
+
+Esta é a única implementação: project-root/scheduler.py carrega este arquivo
+pelo caminho (o watcher roda sem o pacote no path). Por isso só stdlib aqui.
+"""
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0, max_timeout: float = 600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0  # falhas seguidas com o circuito fechado
+        self.trips = 0  # aberturas seguidas (zera no primeiro sucesso)
+        self.timeout = reset_timeout
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == OPEN and self.clock() - self._opened_at >= self.timeout:
+            self.state = HALF_OPEN
+        return self.state != OPEN
+
+    def retry_in(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.timeout - self.clock())
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+
+    def record_failure(self) -> bool:
+        """Registra a falha; True se o circuito abriu agora."""
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.trips += 1
+            self.timeout = min(self.max_timeout, self.reset_timeout * 2 ** (self.trips - 1))
+            self.state = OPEN
+            self._opened_at = self.clock()
+            self.failures = 0
+            return True
+        return False
+
+
+class QuotaTracker:
+    """Chamadas feitas na janela deslizante de `window` segundos."""
+
+    def __init__(self, limit: int, window: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        self._calls: Deque[Tuple[float, int]] = deque()
+        self._used = 0
+
+    def _prune(self, now: float):
+        while self._calls and self._calls[0][0] <= now - self.window:
+            self._used -= self._calls.popleft()[1]
+
+    def record(self, calls: int = 1):
+        now = self.clock()
+        self._prune(now)
+        self._calls.append((now, calls))
+        self._used += calls
+
+    def remaining(self) -> int:
+        self._prune(self.clock())
+        return max(0, self.limit - self._used)
+
+    def wait_time(self, calls: int = 1) -> float:
+        """Quanto esperar até `calls` chamadas caberem na janela."""
+        now = self.clock()
+        self._prune(now)
+        excess = self._used + calls - self.limit
+        if excess <= 0:
+            return 0.0
+        for ts, n in self._calls:
+            excess -= n
+            if excess <= 0:
+                return max(0.0, ts + self.window - now)
+        return self.window
+
+
+@dataclass
+class _GroupState:
+    interval: float
+    next_at: float = 0.0
+    pressure: Optional[float] = None
+    calls: float = 1.0  # chamadas por poll (EWMA)
+    volatility: float = 0.0
+    churn: float = 0.0
+    prices: Dict[str, float] = field(default_factory=dict)
+    polled_at: Optional[float] = None
+
+
+class AdaptiveScheduler:
+    def __init__(self, min_interval: float, max_interval: float, base_interval: Optional[float] = None,
+                 volatility_ref: float = 0.02, churn_ref: float = 0.5, smoothing: float = 0.5,
+                 quota: int = 0, quota_window: float = 60.0, headroom: float = 0.8,
+                 clock: Callable[[], float] = time.monotonic):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("intervalos inválidos: precisa 0 < min_interval <= max_interval")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.base_interval = min(max(base_interval or max_interval, min_interval), max_interval)
+        self.volatility_ref = volatility_ref
+        self.churn_ref = churn_ref
+        self.smoothing = smoothing
+        self.headroom = headroom
+        self.clock = clock
+        self.quota = QuotaTracker(quota, quota_window, clock) if quota else None
+        self.groups: Dict[str, _GroupState] = {}
+
+    def add_group(self, name: str):
+        self.groups[name] = _GroupState(self.base_interval, next_at=self.clock())
+
+    # ------------------------------------------------------------------
+    # Observação
+    # ------------------------------------------------------------------
+
+    def _volatility(self, state: _GroupState, prices: Dict[str, float], now: float) -> float:
+        moves = [abs(p / state.prices[k] - 1) for k, p in prices.items() if p > 0 and state.prices.get(k, 0) > 0]
+        if not moves or state.polled_at is None:
+            return 0.0
+        elapsed = max(now - state.polled_at, 1e-3)
+        return sum(moves) / len(moves) * math.sqrt(self.base_interval / elapsed)
+
+    def observe(self, group: str, prices: Dict[str, float], changes: int = 0, calls: int = 1) -> float:
+        """Registra um poll bem-sucedido e devolve o novo intervalo do grupo."""
+        state = self.groups[group]
+        now = self.clock()
+        state.volatility = self._volatility(state, prices, now)
+        state.churn = changes / max(1, len(prices))
+        state.prices = dict(prices)
+        state.polled_at = now
+        if self.quota is not None:
+            self.quota.record(calls)
+
+        pressure = max(state.volatility / self.volatility_ref, state.churn / self.churn_ref)
+        a = self.smoothing
+        state.pressure = pressure if state.pressure is None else a * pressure + (1 - a) * state.pressure
+        state.calls = a * calls + (1 - a) * state.calls
+
+        interval = self.max_interval * (self.min_interval / self.max_interval) ** min(1.0, state.pressure)
+        state.interval = max(interval, self._quota_floor(state))
+        return state.interval
+
+    def _quota_floor(self, state: _GroupState) -> float:
+        if self.quota is None:
+            return self.min_interval
+        share = self.quota.limit * self.headroom / max(1, len(self.groups))
+        return max(self.min_interval, state.calls * self.quota.window / max(share, 1e-9))
+
+    # ------------------------------------------------------------------
+    # Agenda
+    # ------------------------------------------------------------------
+
+    def interval(self, group: str) -> float:
+        return self.groups[group].interval
+
+    def schedule(self, group: str, delay: Optional[float] = None):
+        """Próximo poll do grupo em `delay` segundos (padrão: o intervalo atual)."""
+        state = self.groups[group]
+        delay = state.interval if delay is None else delay
+        if self.quota is not None:
+            delay = max(delay, self.quota.wait_time(math.ceil(state.calls)))
+        state.next_at = self.clock() + delay
+
+    def next_due(self) -> Tuple[str, float]:
+        """(grupo, segundos até ele vencer) do próximo poll."""
+        name, state = min(self.groups.items(), key=lambda item: item[1].next_at)
+        return name, max(0.0, state.next_at - self.clock())
+
+    def due_at(self, group: str) -> float:
+        return self.groups[group].next_at
@@ -0,0 +1,399 @@
+"""Armazenamento append-only de snapshots de mercado em segmentos memmap.
+
+Layout em disco:
+
+    <root>/manifest.json      segmentos (linhas, ts min/max, estado)
+    <root>/symbols.json       dicionário símbolo -> id (posição na lista)
+    <root>/seg-00000001/      uma coluna por arquivo, largura fixa:
+        ts.f8 token.i4 price.f8 change_1h.f8 liquidity.f8 volume_24h.f8 change_24h.f8
+        tokens.i8             (só compactados) offsets das linhas de cada token
+
+O segmento ativo recebe appends em ordem de chegada; a coluna `ts` ordenada é
+o índice de tempo (busca binária). Ao encher, o segmento é selado (arquivos
+truncados ao tamanho real). `compact()` junta segmentos selados num só,
+ordenado por (token, ts) com índice de offsets: aí uma consulta por token +
+janela de tempo vira um slice contíguo do memmap, sem cópia.
+
+O `Agent` grava um snapshot por mercado (`append`); o watcher de project-root
+grava o universo de cada ciclo de uma vez (`append_columns`), carregando este
+arquivo pelo caminho — por isso só numpy e stdlib aqui.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+
+COLUMNS = (
+    ("ts", "<f8"),
+    ("token", "<i4"),
+    ("price", "<f8"),
+    ("change_1h", "<f8"),
+    ("liquidity", "<f8"),
+    ("volume_24h", "<f8"),
+    ("change_24h", "<f8"),
+)
+VALUE_COLUMNS = tuple(name for name, _ in COLUMNS if name not in ("ts", "token"))
+_EXT = {"<f8": "f8", "<i4": "i4"}
+
+
+def _write_json(path: str, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+class Segment:
+    def __init__(self, path: str, meta: Dict[str, Any], writable: bool = False):
+        self.path = path
+        self.meta = meta
+        self.columns: Dict[str, np.ndarray] = {}
+        self.offsets: Optional[np.ndarray] = None
+        capacity = meta["capacity"] if writable else meta["count"]
+        for name, dtype in COLUMNS:
+            file = os.path.join(path, f"{name}.{_EXT[dtype]}")
+            if writable:
+                mode = "r+" if os.path.exists(file) else "w+"
+                self.columns[name] = np.memmap(file, dtype=dtype, mode=mode, shape=(capacity,))
+            elif capacity:
+                self.columns[name] = np.memmap(file, dtype=dtype, mode="r", shape=(capacity,))
+            else:
+                self.columns[name] = np.empty(0, dtype=dtype)
+        if meta.get("compacted"):
+            self.offsets = np.fromfile(os.path.join(path, "tokens.i8"), dtype="<i8")
+
+    @property
+    def count(self) -> int:
+        return self.meta["count"]
+
+    def flush(self):
+        for column in self.columns.values():
+            if isinstance(column, np.memmap):
+                column.flush()
+
+    def close(self):
+        self.flush()
+        self.columns = {}
+
+    def rows_for(self, token_id: int, start: Optional[float], end: Optional[float]):
+        """Slice (ou índices) das linhas de `token_id` com start <= ts < end."""
+        n = self.count
+        ts = self.columns["ts"][:n]
+        if self.offsets is not None:
+            if token_id + 1 >= len(self.offsets):
+                return slice(0, 0)
+            lo, hi = int(self.offsets[token_id]), int(self.offsets[token_id + 1])
+            if start is not None:
+                lo += int(np.searchsorted(ts[lo:hi], start, side="left"))
+            if end is not None:
+                hi = lo + int(np.searchsorted(ts[lo:hi], end, side="left"))
+            return slice(lo, hi)
+
+        if self.meta.get("sorted", True):
+            lo = int(np.searchsorted(ts, start, side="left")) if start is not None else 0
+            hi = int(np.searchsorted(ts, end, side="left")) if end is not None else n
+            mask = self.columns["token"][lo:hi] == token_id
+            return lo + np.flatnonzero(mask)
+
+        mask = self.columns["token"][:n] == token_id
+        if start is not None:
+            mask &= ts >= start
+        if end is not None:
+            mask &= ts < end
+        return np.flatnonzero(mask)
+
+
+class SnapshotStore:
+    def __init__(self, root: str, segment_rows: int = 1 << 20, flush_interval: float = 5.0,
+                 readonly: bool = False):
+        """
+        readonly: só leitura (ex.: backtest ao lado de um recorder ao vivo); nenhum
+        arquivo é aberto para escrita e o segmento ativo é lido até o `count` publicado.
+        """
+        self.root = root
+        self.segment_rows = segment_rows
+        self.flush_interval = flush_interval
+        self.readonly = readonly
+        self._lock = threading.RLock()
+        if not readonly:
+            os.makedirs(root, exist_ok=True)
+
+        self._manifest_path = os.path.join(root, "manifest.json")
+        self._symbols_path = os.path.join(root, "symbols.json")
+        self.manifest = self._load(self._manifest_path, {"segments": [], "next_id": 1})
+        self.symbols: List[str] = self._load(self._symbols_path, [])
+        self.symbol_ids = {s: i for i, s in enumerate(self.symbols)}
+        self._symbols_dirty = False
+        self._readers: Dict[str, Segment] = {}
+        self._active: Optional[Segment] = None
+        self._last_flush = time.monotonic()
+
+        active = [m for m in self.manifest["segments"] if not m["sealed"]]
+        if active and not readonly:
+            meta = active[-1]
+            self._active = Segment(os.path.join(root, meta["name"]), meta, writable=True)
+
+    @staticmethod
+    def _load(path, default):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def _symbol_id(self, symbol: str) -> int:
+        sid = self.symbol_ids.get(symbol)
+        if sid is None:
+            sid = len(self.symbols)
+            self.symbols.append(symbol)
+            self.symbol_ids[symbol] = sid
+            self._symbols_dirty = True
+        return sid
+
+    def _new_segment(self) -> Segment:
+        name = f"seg-{self.manifest['next_id']:08d}"
+        self.manifest["next_id"] += 1
+        meta = {"name": name, "count": 0, "capacity": self.segment_rows, "min_ts": None,
+                "max_ts": None, "sealed": False, "sorted": True, "compacted": False}
+        path = os.path.join(self.root, name)
+        os.makedirs(path, exist_ok=True)
+        self.manifest["segments"].append(meta)
+        return Segment(path, meta, writable=True)
+
+    def _check_writable(self):
+        if self.readonly:
+            raise ValueError(f"SnapshotStore em {self.root} aberto só para leitura")
+
+    def _writable(self) -> Segment:
+        self._check_writable()
+        seg = self._active
+        if seg is None or seg.count >= seg.meta["capacity"]:
+            if seg is not None:
+                self._seal(seg)
+            seg = self._active = self._new_segment()
+        return seg
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def append(self, snapshot: Dict[str, Any]):
+        """Grava um snapshot (dict com symbol, timestamp e campos numéricos)."""
+        ts = snapshot.get("timestamp")
+        ts = float(ts if ts is not None else time.time())
+        with self._lock:
+            token = self._symbol_id(snapshot.get("symbol") or snapshot.get("address"))
+            seg = self._writable()
+            meta = seg.meta
+            cols = seg.columns
+            i = meta["count"]
+            cols["ts"][i] = ts
+            cols["token"][i] = token
+            for name in VALUE_COLUMNS:
+                cols[name][i] = snapshot.get(name, np.nan)
+            if meta["max_ts"] is None:
+                meta["min_ts"] = meta["max_ts"] = ts
+            elif ts >= meta["max_ts"]:
+                meta["max_ts"] = ts
+            else:
+                meta["sorted"] = False
+                meta["min_ts"] = min(meta["min_ts"], ts)
+            meta["count"] = i + 1
+            self._maybe_flush()
+
+    def append_columns(self, ts, symbols: List[str], **values):
+        """
+        Grava um lote já em colunas (ex.: o universo inteiro de um ciclo do watcher).
+        Colunas ausentes ficam NaN.
+        """
+        ts = np.asarray(ts, dtype=np.float64)
+        n = len(ts)
+        if n == 0:
+            return
+        with self._lock:
+            tokens = np.fromiter((self._symbol_id(s) for s in symbols), dtype=np.int32, count=n)
+            done = 0
+            while done < n:
+                seg = self._writable()
+                meta = seg.meta
+                start = meta["count"]
+                take = min(n - done, meta["capacity"] - start)
+                part = slice(done, done + take)
+                cols = seg.columns
+                cols["ts"][start:start + take] = ts[part]
+                cols["token"][start:start + take] = tokens[part]
+                for name in VALUE_COLUMNS:
+                    column = values.get(name)
+                    cols[name][start:start + take] = np.nan if column is None else np.asarray(column)[part]
+
+                lo, hi = float(ts[part].min()), float(ts[part].max())
+                if (meta["max_ts"] is not None and lo < meta["max_ts"]) or not np.all(np.diff(ts[part]) >= 0):
+                    meta["sorted"] = False
+                meta["min_ts"] = lo if meta["min_ts"] is None else min(meta["min_ts"], lo)
+                meta["max_ts"] = hi if meta["max_ts"] is None else max(meta["max_ts"], hi)
+                meta["count"] = start + take
+                done += take
+            self._maybe_flush()
+
+    def flush(self):
+        """Publica o estado atual (manifest + símbolos) para leitores."""
+        if self.readonly:
+            return
+        with self._lock:
+            if self._active is not None:
+                self._active.flush()
+            if self._symbols_dirty:
+                _write_json(self._symbols_path, self.symbols)
+                self._symbols_dirty = False
+            _write_json(self._manifest_path, self.manifest)
+            self._last_flush = time.monotonic()
+
+    def _seal(self, seg: Segment):
+        count = seg.count
+        seg.close()
+        for name, dtype in COLUMNS:
+            file = os.path.join(seg.path, f"{name}.{_EXT[dtype]}")
+            os.truncate(file, count * np.dtype(dtype).itemsize)
+        seg.meta["sealed"] = True
+        seg.meta["capacity"] = count
+        self._readers.pop(seg.meta["name"], None)
+
+    def rotate(self):
+        """Sela o segmento ativo (o próximo append abre outro)."""
+        with self._lock:
+            if self._active is not None and self._active.count:
+                self._seal(self._active)
+                self._active = None
+            self.flush()
+
+    def close(self):
+        self.rotate()
+
+    def compact(self, max_rows: Optional[int] = None):
+        """
+        Junta segmentos selados num segmento ordenado por (token, ts) com
+        índice de offsets por token. Segmentos com `max_rows` linhas ou mais
+        (já grandes o bastante) ficam de fora.
+        """
+        self._check_writable()
+        with self._lock:
+            todo = [m for m in self.manifest["segments"]
+                    if m["sealed"] and m["count"] and (max_rows is None or m["count"] < max_rows)]
+            if not todo or (len(todo) == 1 and todo[0]["compacted"]):
+                return
+            parts = [self._reader(m) for m in todo]
+            merged = {name: np.concatenate([p.columns[name][:p.count] for p in parts]) for name, _ in COLUMNS}
+            order = np.lexsort((merged["ts"], merged["token"]))
+            total = len(order)
+
+            name = f"seg-{self.manifest['next_id']:08d}"
+            self.manifest["next_id"] += 1
+            path = os.path.join(self.root, name)
+            os.makedirs(path, exist_ok=True)
+            for col, dtype in COLUMNS:
+                merged[col][order].astype(dtype).tofile(os.path.join(path, f"{col}.{_EXT[dtype]}"))
+            tokens_sorted = merged["token"][order]
+            offsets = np.searchsorted(tokens_sorted, np.arange(len(self.symbols) + 1), side="left").astype("<i8")
+            offsets.tofile(os.path.join(path, "tokens.i8"))
+
+            meta = {"name": name, "count": total, "capacity": total,
+                    "min_ts": float(merged["ts"].min()), "max_ts": float(merged["ts"].max()),
+                    "sealed": True, "sorted": False, "compacted": True}
+
+            # o segmento novo entra na posição do primeiro segmento substituído
+            old_names = {m["name"] for m in todo}
+            segments = []
+            for m in self.manifest["segments"]:
+                if m["name"] not in old_names:
+                    segments.append(m)
+                elif meta is not None:
+                    segments.append(meta)
+                    meta = None
+            self.manifest["segments"] = segments
+            for old in old_names:
+                self._readers.pop(old, None)
+            self.flush()
+            for old in old_names:
+                shutil.rmtree(os.path.join(self.root, old), ignore_errors=True)
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def _reader(self, meta: Dict[str, Any]) -> Segment:
+        if self._active is not None and meta["name"] == self._active.meta["name"]:
+            return self._active
+        seg = self._readers.get(meta["name"])
+        if seg is None or seg.count != meta["count"]:
+            seg = self._readers[meta["name"]] = Segment(os.path.join(self.root, meta["name"]), meta)
+        return seg
+
+    def refresh(self):
+        """Relê manifest/símbolos gravados por outro processo (modo leitor)."""
+        with self._lock:
+            if self._active is None:
+                self.manifest = self._load(self._manifest_path, self.manifest)
+                self.symbols = self._load(self._symbols_path, self.symbols)
+                self.symbol_ids = {s: i for i, s in enumerate(self.symbols)}
+
+    def iter_range(self, symbol: str, start: Optional[float] = None,
+                   end: Optional[float] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Pedaços (um por segmento) das linhas de `symbol` com start <= ts < end.
+        Em segmentos compactados os arrays são views do memmap (sem cópia).
+        """
+        token_id = self.symbol_ids.get(symbol)
+        if token_id is None:
+            return
+        with self._lock:
+            metas = list(self.manifest["segments"])
+        for meta in metas:
+            if not meta["count"] or meta["min_ts"] is None:
+                continue
+            if start is not None and meta["max_ts"] < start:
+                continue
+            if end is not None and meta["min_ts"] >= end:
+                continue
+            seg = self._reader(meta)
+            rows = seg.rows_for(token_id, start, end)
+            empty = rows.stop <= rows.start if isinstance(rows, slice) else not len(rows)
+            if empty:
+                continue
+            chunk = {name: seg.columns[name][rows] for name in ("ts",) + VALUE_COLUMNS}
+            if not meta.get("compacted") and not meta.get("sorted", True):
+                order = np.argsort(chunk["ts"], kind="stable")
+                chunk = {name: values[order] for name, values in chunk.items()}
+            yield chunk
+
+    def read(self, symbol: str, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Igual a `iter_range`, mas concatenado num único dict de colunas."""
+        chunks = list(self.iter_range(symbol, start, end))
+        if not chunks:
+            return {name: np.empty(0) for name in ("ts",) + VALUE_COLUMNS}
+        if len(chunks) == 1:
+            return chunks[0]
+        data = {name: np.concatenate([c[name] for c in chunks]) for name in chunks[0]}
+        order = np.argsort(data["ts"], kind="stable")
+        return {name: values[order] for name, values in data.items()}
+
+    def snapshots(self, symbol: str, start: Optional[float] = None,
+                  end: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Snapshots no formato de `get_market_snapshot` (para backtest/replay)."""
+        data = self.read(symbol, start, end)
+        columns = [(name, data[name].tolist()) for name in VALUE_COLUMNS]
+        for i, ts in enumerate(data["ts"].tolist()):
+            snap = {"symbol": symbol, "timestamp": ts}
+            for name, values in columns:
+                value = values[i]
+                if value == value:  # NaN = campo não gravado
+                    snap[name] = value
+            yield snap
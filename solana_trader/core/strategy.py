@@ -2,23 +2,63 @@
 
 Decide comprar se houver movimento de alta recente, vender se queda.
 Substitua pelo seu modelo de AI/ML conforme necessário.
+
+Cada snapshot alimenta o `IndicatorEngine` (EMA, volatilidade, VWAP,
+z-score de volume, RSI por símbolo, atualizados em O(1)). Sem `change_1h`
+do provedor, o movimento vem do próprio histórico (preço vs. EMA); com a
+janela cheia, compras com RSI acima de STRATEGY_RSI_MAX ou volatilidade
+acima de STRATEGY_MAX_VOLATILITY são filtradas.
 """
-from typing import Dict, Any
+import math
+from typing import Any, Dict, List, Optional
+
+from solana_trader.core.indicators import IndicatorEngine, Indicators
 
 
 class Strategy:
     def __init__(self, env: Dict[str, str]):
         self.env = env
         self.threshold = float(env.get("STRATEGY_THRESHOLD", 0.01))  # 1% por padrão
+        self.rsi_max = float(env.get("STRATEGY_RSI_MAX", 100))  # 100 = sem filtro
+        self.max_volatility = float(env.get("STRATEGY_MAX_VOLATILITY", 0))  # 0 = sem filtro
+        self.indicators = IndicatorEngine(
+            window=int(env.get("INDICATOR_WINDOW", 60)),
+            ema_span=int(env.get("INDICATOR_EMA_SPAN", 20)),
+            rsi_period=int(env.get("INDICATOR_RSI_PERIOD", 14)),
+        )
+
+    def warm_up(self, store, symbols: List[str], start: Optional[float] = None):
+        """Carrega o histórico gravado (`SnapshotStore`) nos indicadores, de uma vez por símbolo."""
+        for symbol in symbols:
+            data = store.read(symbol, start)
+            if len(data["price"]):
+                self.indicators.warm_up(symbol, data["price"], data["volume_24h"])
+
+    def _observe(self, market: Dict[str, Any]) -> Optional[Indicators]:
+        volume = market.get("volume")
+        return self.indicators.update(market.get("symbol", "UNKNOWN"), market.get("price"),
+                                      market.get("volume_24h") if volume is None else volume)
 
     def decide(self, market: Dict[str, Any], portfolio) -> Dict[str, Any]:
+        return self._decide(market, portfolio, self._observe(market))
+
+    def _decide(self, market: Dict[str, Any], portfolio, ind: Optional[Indicators]) -> Dict[str, Any]:
         # market: {"symbol": str, "price": float, "change_1h": float, ...}
         symbol = market.get("symbol", "UNKNOWN")
-        price = float(market.get("price", 0))
-        change = float(market.get("change_1h", 0))
+        price = market.get("price")
+        price = float(price) if price is not None else 0.0
+        if not 0 < price < math.inf:
+            # snapshot sem preço válido: não dá para dimensionar nem avaliar a ordem
+            return {"type": None}
+        change = market.get("change_1h")
+        if change is None:
+            # fonte sem variação pronta: momentum contra a própria EMA
+            change = price / ind.ema - 1 if ind is not None and ind.ready and ind.ema > 0 else 0.0
+        change = float(change)
 
         # regra simples: se subiu mais que threshold, comprar um pequeno lote
-        if change >= self.threshold:
+        # (com eventos on-chain, só se o fluxo líquido da janela não for de saída)
+        if change >= self.threshold and market.get("net_flow", 0.0) >= 0 and self._entry_ok(ind):
             qty = round((portfolio.cash * 0.01) / price, 8)
             return {"type": "buy", "symbol": symbol, "price": price, "qty": qty}
 
@@ -28,3 +68,15 @@ class Strategy:
             return {"type": "sell", "symbol": symbol, "price": price, "qty": qty}
 
         return {"type": None}
+
+    def _entry_ok(self, ind: Optional[Indicators]) -> bool:
+        # filtros só valem com a janela cheia
+        if ind is None or not ind.ready:
+            return True
+        if ind.rsi > self.rsi_max:
+            return False
+        return not (self.max_volatility and ind.volatility > self.max_volatility)
+
+    def decide_batch(self, markets: List[Dict[str, Any]], portfolio) -> List[Dict[str, Any]]:
+        """Uma decisão por mercado, todas avaliadas contra o mesmo estado do portfólio."""
+        return [self.decide(market, portfolio) for market in markets]
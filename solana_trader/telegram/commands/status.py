@@ -3,7 +3,12 @@ from solana_trader.core.portfolio import Portfolio
 
 
 def status_text(portfolio: Portfolio) -> str:
-    lines = [f"Cash: {portfolio.cash:.2f}"]
+    lines = [
+        f"Cash: {portfolio.cash:.2f}",
+        f"Equity: {portfolio.equity:.2f}",
+        f"PnL não realizado: {portfolio.unrealized_pnl:.2f}",
+        f"PnL realizado: {portfolio.realized_pnl:.2f}",
+    ]
     for sym, qty in portfolio.positions.items():
-        lines.append(f"{sym}: {qty}")
+        lines.append(f"{sym}: {qty} ({portfolio.exposure(sym):.2f})")
     return "\n".join(lines)
@@ -17,7 +17,10 @@ def main():
 
     agent = Agent()
     if args.once:
-        agent.step()
+        try:
+            agent.step()
+        finally:
+            agent.close()
     else:
         agent.run()
 
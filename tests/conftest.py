@@ -0,0 +1,99 @@
+"""Os testes rodam a partir da raiz: `python -m pytest tests`.
+
+project-root é um app de módulos soltos (importados pelo nome, como em
+`python cli.py`); solana_trader é importado como pacote a partir da raiz.
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.join(ROOT, "project-root")
+
+for path in (ROOT, PROJECT_ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def dex_pair(address, liquidity=0.0, volume_24h=0.0, change_24h=0.0, price=1.0, symbol=None, chain="solana"):
+    """Um par no formato compacto da DexScreener."""
+    return {
+        "chainId": chain,
+        "dexId": "raydium",
+        "pairAddress": f"pair-{address}",
+        "baseToken": {"address": address, "name": f"Token {address}", "symbol": symbol or address.upper()},
+        "priceUsd": str(price),
+        "volume": {"h24": volume_24h},
+        "priceChange": {"h24": change_24h},
+        "liquidity": {"usd": liquidity},
+    }
+
+
+def dex_body(*pairs) -> bytes:
+    return json.dumps({"schemaVersion": "1.0.0", "pairs": list(pairs)}, separators=(",", ":")).encode()
+
+
+class FakeCache:
+    """`ResponseCache` de mentira: serve `bodies[url]` (ou chama `bodies[url]()`), sem rede."""
+
+    def __init__(self, bodies=None, default=None):
+        self.bodies = dict(bodies or {})
+        self.default = default
+        self.calls = []
+
+    def _entry(self, url):
+        from cache import CacheEntry
+
+        self.calls.append(url)
+        body = self.bodies.get(url, self.default)
+        if callable(body):
+            body = body()
+        if isinstance(body, BaseException):
+            raise body
+        return CacheEntry(body, None, None, 0.0)
+
+    def fetch(self, url, timeout=15):
+        return self._entry(url)
+
+    async def fetch_async(self, session, url):
+        return self._entry(url)
+
+    async def drain_async(self, timeout=None):
+        pass
+
+
+class LocalServer:
+    """
+    Servidor aiohttp em 127.0.0.1 (porta livre) com event loop numa thread
+    própria: atende clientes síncronos e de outros loops. Subclasses
+    registram as rotas em `routes(app)`.
+    """
+
+    def __init__(self):
+        self.url = None
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+
+    def routes(self, app):
+        raise NotImplementedError
+
+    async def _start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        self.routes(app)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        self.url = f"http://127.0.0.1:{self._runner.addresses[0][1]}"
+
+    def start(self):
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(5)
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
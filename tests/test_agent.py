@@ -0,0 +1,110 @@
+import asyncio
+import threading
+
+import pytest
+
+from conftest import FakeCache, dex_body, dex_pair
+
+from agent import SolanaTradingAgent
+
+
+def test_fetch_tokens_async_waits_for_sync_scan():
+    release = threading.Event()
+    entered = threading.Event()
+
+    def slow_body():
+        entered.set()
+        release.wait(5)
+        return dex_body(dex_pair("a", 60_000))
+
+    cache = FakeCache(default=dex_body(dex_pair("b", 60_000)))
+    agent = SolanaTradingAgent(queries=["slow"], token_addresses=[], cache=cache)
+    slow_url = agent._discovery_urls()[0]
+    cache.bodies[slow_url] = slow_body
+
+    worker = threading.Thread(target=agent.fetch_tokens)
+    worker.start()
+    assert entered.wait(5)
+
+    async def run():
+        agent.queries = ["x", "y"]  # caminho concorrente, outros URLs
+        task = asyncio.ensure_future(agent.fetch_tokens_async())
+        await asyncio.sleep(0.1)
+        assert not task.done()  # esperando o lock do scan síncrono
+        release.set()
+        return await task
+
+    tokens = asyncio.run(run())
+    worker.join(5)
+    assert [t.address for t in tokens] == ["b"]
+    assert not agent._lock.locked()
+
+
+def test_fetch_tokens_async_cancel_releases_nothing_it_does_not_hold():
+    agent = SolanaTradingAgent(queries=["x"], token_addresses=[], cache=FakeCache(default=dex_body()))
+
+    async def run():
+        agent._lock.acquire()
+        task = asyncio.ensure_future(agent.fetch_tokens_async())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        agent._lock.release()
+
+    asyncio.run(run())
+    assert not agent._lock.locked()
+
+
+def test_scan_sides_when_a_retained_token_scores_lower_later():
+    # "a" entra no top-1 pela primeira resposta; a segunda traz um par de "a"
+    # com mais liquidez (a tabela fica com ele) e score menor que "b"
+    first = dex_body(dex_pair("a", 60_000, 200_000, 30), dex_pair("b", 60_000, 200_000, 0))
+    second = dex_body(dex_pair("a", 70_000, 0, 0))
+    agent = SolanaTradingAgent(queries=["one", "two"], token_addresses=[], cache=FakeCache())
+    one, two = agent._discovery_urls()
+    agent.cache.bodies.update({one: first, two: second})
+    agent.max_concurrency = 1  # respostas na ordem dos URLs
+
+    longs, shorts = agent.scan_sides(top_k=1)
+    assert [(s.token.address, s.score) for s in longs] == [("b", 30)]
+    assert [(s.token.address, s.score) for s in shorts] == [("a", 10)]
+
+
+def test_scan_raises_when_every_query_fails():
+    agent = SolanaTradingAgent(queries=["x", "y"], token_addresses=[], cache=FakeCache(default=ConnectionError("fora")))
+
+    with pytest.raises(ConnectionError):
+        agent.scan()
+
+
+def test_scan_keeps_partial_results_when_some_queries_fail():
+    agent = SolanaTradingAgent(queries=["x", "y"], token_addresses=[], cache=FakeCache())
+    ok, bad = agent._discovery_urls()
+    agent.cache.bodies.update({ok: dex_body(dex_pair("a", 60_000, 200_000, 30)), bad: ConnectionError("fora")})
+
+    assert [s.token.address for s in agent.scan()] == ["a"]
+
+
+def test_calls_per_scan_counts_queries_and_address_batches():
+    addresses = [f"addr{i}" for i in range(31)] + ["addr0"]
+    agent = SolanaTradingAgent(queries=["x", "y"], token_addresses=addresses, cache=FakeCache())
+
+    assert agent.calls_per_scan == len(agent._discovery_urls()) == 4
+
+
+def test_fetch_tokens_async_cancelled_while_waiting_returns_the_lock_later():
+    agent = SolanaTradingAgent(queries=["x", "y"], token_addresses=[], cache=FakeCache(default=dex_body(dex_pair("a", 60_000))))
+    agent._lock.acquire()  # scan síncrono em andamento
+
+    async def run():
+        task = asyncio.ensure_future(agent.fetch_tokens_async())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        agent._lock.release()  # o scan termina; a thread que esperava pega e devolve
+        await asyncio.sleep(0.05)
+        return await agent.fetch_tokens_async()
+
+    tokens = asyncio.run(run())
+    assert [t.address for t in tokens] == ["a"]
+    assert not agent._lock.locked()
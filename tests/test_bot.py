@@ -0,0 +1,95 @@
+"""/trade do bot: execução e registro no ledger fora do event loop."""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import bot
+from ledger import TradeLedger
+from trader import PaperTrader
+
+
+class _Message:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text):
+        self.replies.append(text)
+
+
+class _ThreadRecordingLedger(TradeLedger):
+    def __init__(self):
+        super().__init__(None)
+        self.threads = []
+
+    def record(self, result):
+        self.threads.append(threading.get_ident())
+        return super().record(result)
+
+
+def test_trade_records_ledger_off_the_event_loop(monkeypatch):
+    ledger = _ThreadRecordingLedger()
+    monkeypatch.setattr(bot, "_ledger", ledger)
+    monkeypatch.setattr(bot, "_trader", PaperTrader())
+    message = _Message()
+    update = SimpleNamespace(message=message)
+    context = SimpleNamespace(args=["buy", "TokenX", "25"])
+
+    async def run():
+        await bot.trade_cmd(update, context)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+
+    assert ledger.trades_total == 1
+    assert ledger.open_positions == {"TokenX": 25.0}
+    assert ledger.threads and loop_thread not in ledger.threads
+    assert message.replies[0].startswith("Resultado:")
+
+
+class _Agent:
+    def __init__(self):
+        self.calls = 0
+
+    def scan(self, limit, top_n):
+        self.calls += 1
+        time.sleep(0.1)
+        return []
+
+
+def test_concurrent_scans_share_one_agent_scan(monkeypatch):
+    agent = _Agent()
+    monkeypatch.setattr(bot, "_agent", agent)
+    monkeypatch.setattr(bot, "_trader", PaperTrader())
+    messages = [_Message() for _ in range(3)]
+
+    async def run():
+        await asyncio.gather(*(bot.scan_cmd(SimpleNamespace(message=m), None) for m in messages))
+
+    asyncio.run(run())
+
+    assert agent.calls == 1
+    assert [m.replies[-1] for m in messages] == ["Nenhuma oportunidade encontrada."] * 3
+
+
+def test_status_creates_the_ledger_off_the_event_loop(monkeypatch):
+    threads = []
+
+    class Ledger(TradeLedger):
+        def __init__(self, directory):
+            threads.append(threading.get_ident())
+            super().__init__(directory)
+
+    monkeypatch.setattr(bot, "_ledger", None)
+    monkeypatch.setattr(bot, "_trader", PaperTrader())
+    monkeypatch.setattr("ledger.TradeLedger", Ledger)
+    message = _Message()
+
+    async def run():
+        await bot.status(SimpleNamespace(message=message), None)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+
+    assert threads and loop_thread not in threads
+    assert "Total trades: 0" in message.replies[0]
@@ -0,0 +1,203 @@
+"""ResponseCache: LRU, camada em disco, ETag/304, stale-while-revalidate e single-flight."""
+import asyncio
+import threading
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from cache import CacheEntry, ResponseCache
+from conftest import LocalServer
+
+
+class Origin(LocalServer):
+    """GET /<nome> com ETag fixo por versão; responde 304 ao If-None-Match igual."""
+
+    def __init__(self):
+        super().__init__()
+        self.version = 1
+        self.delay = 0.0
+        self.requests = []  # (path, If-None-Match)
+
+    async def _get(self, request):
+        self.requests.append((request.path, request.headers.get("If-None-Match")))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        etag = f'"v{self.version}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=f"{request.path}:{self.version}".encode(), headers={"ETag": etag})
+
+    def routes(self, app):
+        app.router.add_get("/{name}", self._get)
+
+
+@pytest.fixture
+def origin():
+    server = Origin().start()
+    yield server
+    server.stop()
+
+
+def entry(body, age=0.0):
+    return CacheEntry(body, None, None, time.time() - age)
+
+
+def wait_until(cond, timeout=2.0):
+    deadline = time.time() + timeout
+    while not cond() and time.time() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", entry(b"a"))
+    cache.put("b", entry(b"b"))
+    assert cache.get("a").body == b"a"  # "a" passa a ser o mais recente
+    cache.put("c", entry(b"c"))
+
+    assert cache.get("b") is None
+    assert [cache.get(u).body for u in ("a", "c")] == [b"a", b"c"]
+
+
+def test_disk_tier_is_shared_between_instances(tmp_path):
+    writer = ResponseCache(disk_dir=str(tmp_path))
+    writer.put("http://x/a", CacheEntry(b"corpo", '"e1"', "ontem", 123.0))
+
+    reader = ResponseCache(disk_dir=str(tmp_path))
+    got = reader.get("http://x/a")
+    assert (got.body, got.etag, got.last_modified, got.fetched_at) == (b"corpo", '"e1"', "ontem", 123.0)
+    assert reader.get("http://x/b") is None
+
+    # meta corrompido: vira miss, não erro
+    with open(reader._disk_path("http://x/a") + ".meta", "w") as f:
+        f.write("{")
+    assert ResponseCache(disk_dir=str(tmp_path)).get("http://x/a") is None
+
+
+def test_states_follow_ttl_and_stale_ttl():
+    cache = ResponseCache(ttl=10, stale_ttl=20)
+    assert cache.state(entry(b"", age=5)) == "fresh"
+    assert cache.state(entry(b"", age=15)) == "stale"
+    assert cache.state(entry(b"", age=31)) == "expired"
+
+
+def test_expired_entry_revalidates_with_etag(origin):
+    cache = ResponseCache(ttl=0, stale_ttl=0)
+    url = origin.url + "/a"
+    first = cache.fetch(url)
+    parsed = first.parse(bytes.upper)
+
+    second = cache.fetch(url)
+    assert origin.requests == [("/a", None), ("/a", '"v1"')]
+    assert second.body == b"/a:1" and second.fetched_at >= first.fetched_at
+    assert second.parse(bytes.upper) is parsed  # 304 reaproveita o parse
+
+    origin.version = 2
+    assert cache.fetch(url).body == b"/a:2"
+
+
+def test_stale_entry_is_served_and_revalidated_in_background(origin):
+    cache = ResponseCache(ttl=10, stale_ttl=100)
+    url = origin.url + "/a"
+    cache.put(url, CacheEntry(b"velho", '"v0"', None, time.time() - 50))
+
+    assert cache.fetch(url).body == b"velho"
+    assert wait_until(lambda: cache.get(url).body == b"/a:1")
+    assert origin.requests == [("/a", '"v0"')]
+
+
+def test_concurrent_sync_misses_make_one_request(origin):
+    cache = ResponseCache()
+    origin.delay = 0.2
+    url = origin.url + "/a"
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.fetch(url).body)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert results == [b"/a:1"] * 8
+    assert len(origin.requests) == 1
+
+
+def test_sync_miss_error_reaches_every_waiter():
+    cache = ResponseCache()
+    calls = []
+
+    def failing_fetch(url, timeout, entry):
+        calls.append(url)
+        time.sleep(0.1)
+        raise ConnectionError("fora")
+
+    cache._fetch_now = failing_fetch
+    errors = []
+
+    def run():
+        try:
+            cache.fetch("http://x/a")
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert len(errors) == 4 and len(calls) == 1
+    assert not cache._inflight
+
+
+def test_concurrent_async_misses_make_one_request(origin):
+    cache = ResponseCache()
+    origin.delay = 0.1
+    url = origin.url + "/a"
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            return await asyncio.gather(*(cache.fetch_async(session, url) for _ in range(8)))
+
+    entries = asyncio.run(run())
+    assert {e.body for e in entries} == {b"/a:1"}
+    assert len(origin.requests) == 1
+    assert not cache._inflight_async
+
+
+def test_async_stale_revalidation_uses_the_session(origin):
+    cache = ResponseCache(ttl=10, stale_ttl=100)
+    url = origin.url + "/a"
+    cache.put(url, CacheEntry(b"velho", '"v1"', None, time.time() - 50))
+    cache._fetch_now = None  # o caminho síncrono (requests numa thread) não pode ser usado
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            served = await cache.fetch_async(session, url)
+            await cache.drain_async(2)
+            return served
+
+    assert asyncio.run(run()).body == b"velho"
+    assert origin.requests == [("/a", '"v1"')]
+    fresh = cache.get(url)
+    assert fresh.body == b"velho" and cache.state(fresh) == "fresh"  # 304 renovou o timestamp
+    assert not cache._revalidating
+
+
+def test_drain_cancels_revalidations_past_the_timeout(origin):
+    cache = ResponseCache(ttl=10, stale_ttl=100)
+    origin.delay = 1.0
+    url = origin.url + "/a"
+    cache.put(url, CacheEntry(b"velho", None, None, time.time() - 50))
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            await cache.fetch_async(session, url)
+            t0 = time.perf_counter()
+            await cache.drain_async(0.05)
+            return time.perf_counter() - t0
+
+    assert asyncio.run(run()) < 0.5
+    assert cache.get(url).body == b"velho"
+    assert not cache._revalidating  # a próxima leitura tenta de novo
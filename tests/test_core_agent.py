@@ -0,0 +1,179 @@
+"""Agent do solana_trader: step com vários mercados buscados em paralelo."""
+import threading
+import time
+
+import pytest
+
+from solana_trader.core.agent import Agent
+
+
+class Markets:
+    """Fonte de mercado com snapshot fixo por símbolo, atraso e falhas opcionais."""
+
+    def __init__(self, snapshots, delay=0.0, fail=()):
+        self.snapshots = snapshots
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+        self.threads = set()
+
+    def get_market_snapshot(self, symbol):
+        self.calls.append(symbol)
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        if symbol in self.fail:
+            raise ConnectionError(f"{symbol} fora do ar")
+        return dict(self.snapshots[symbol], symbol=symbol)
+
+
+def market(price=10.0, change_1h=0.0):
+    return {"price": price, "change_1h": change_1h}
+
+
+def make_agent(source, symbols, **env):
+    env = {"SYMBOLS": ",".join(symbols), "STARTING_CASH": "1000", **env}
+    return Agent(env=env, data_source=source)
+
+
+def test_markets_are_fetched_concurrently():
+    symbols = [f"T{i}-USD" for i in range(4)]
+    source = Markets({s: market() for s in symbols}, delay=0.1)
+    agent = make_agent(source, symbols)
+    try:
+        t0 = time.perf_counter()
+        agent.step()
+        elapsed = time.perf_counter() - t0
+    finally:
+        agent.close()
+
+    assert sorted(source.calls) == symbols
+    assert [m["symbol"] for m in agent.last_markets] == symbols  # ordem dos símbolos
+    assert elapsed < 0.3
+    assert len(source.threads) > 1
+
+
+def test_failed_symbol_does_not_block_the_others():
+    source = Markets({"A-USD": market(change_1h=0.05), "B-USD": market(change_1h=0.05)}, fail={"B-USD"})
+    agent = make_agent(source, ["A-USD", "B-USD"])
+    try:
+        executed = agent.step()
+    finally:
+        agent.close()
+
+    assert [m["symbol"] for m in agent.last_markets] == ["A-USD"]
+    assert [(a["type"], a["symbol"]) for a in executed] == [("buy", "A-USD")]
+
+
+def test_sells_run_before_buys():
+    source = Markets({"A-USD": market(change_1h=0.05), "B-USD": market(change_1h=-0.05)})
+    agent = make_agent(source, ["A-USD", "B-USD"])
+    agent.portfolio.apply_trade({"type": "buy", "symbol": "B-USD", "qty": 2, "price": 10.0})
+    try:
+        executed = agent.step()
+    finally:
+        agent.close()
+
+    assert [(a["type"], a["symbol"]) for a in executed] == [("sell", "B-USD"), ("buy", "A-USD")]
+    assert "B-USD" not in agent.portfolio.positions
+    assert agent.portfolio.positions["A-USD"] > 0
+
+
+def test_all_buys_are_checked_against_the_same_book():
+    symbols = [f"T{i}-USD" for i in range(5)]
+    source = Markets({s: market(change_1h=0.05) for s in symbols})
+    # 1% do caixa por compra na estratégia; 2% de exposição bruta deixa passar só duas
+    agent = make_agent(source, symbols, MAX_GROSS_EXPOSURE_PCT="0.02", MAX_NET_EXPOSURE_PCT="0")
+    try:
+        executed = agent.step()
+    finally:
+        agent.close()
+
+    assert [a["symbol"] for a in executed] == symbols[:2]
+    assert agent.portfolio.position_value <= 0.02 * 1000 + 1e-9
+
+
+def test_step_only_fetches_the_requested_group():
+    source = Markets({s: market() for s in ("A-USD", "B-USD", "C-USD")})
+    agent = make_agent(source, [], SYMBOL_GROUPS="majors=A-USD,B-USD;memes=C-USD")
+    try:
+        assert agent.symbols == ["A-USD", "B-USD", "C-USD"]
+        agent.step(agent.symbol_groups["memes"])
+    finally:
+        agent.close()
+
+    assert source.calls == ["C-USD"]
+
+
+def test_batch_source_is_called_once():
+    class Batch:
+        def __init__(self):
+            self.calls = []
+
+        def get_market_snapshots(self, symbols):
+            self.calls.append(list(symbols))
+            return [dict(market(), symbol=s) for s in symbols]
+
+    source = Batch()
+    agent = make_agent(source, ["A-USD", "B-USD"])
+    try:
+        agent.step()
+    finally:
+        agent.close()
+
+    assert source.calls == [["A-USD", "B-USD"]]
+    assert agent._pool is None
+
+
+def test_step_raises_when_every_symbol_fails():
+    source = Markets({"A-USD": market(), "B-USD": market()}, fail={"A-USD", "B-USD"})
+    agent = make_agent(source, ["A-USD", "B-USD"])
+    try:
+        with pytest.raises(ConnectionError):
+            agent.step()
+    finally:
+        agent.close()
+
+
+@pytest.mark.parametrize("snapshot", [{}, {"price": None}, {"price": 0}, {"price": "n/a"}])
+def test_snapshot_without_price_is_a_failure(snapshot):
+    source = Markets({"A-USD": snapshot, "B-USD": market(change_1h=0.05)})
+    agent = make_agent(source, ["A-USD", "B-USD"])
+    try:
+        assert [a["symbol"] for a in agent.step()] == ["B-USD"]
+        assert [m["symbol"] for m in agent.last_markets] == ["B-USD"]
+        with pytest.raises(ValueError, match="A-USD"):
+            agent.step(["A-USD"])
+    finally:
+        agent.close()
+
+
+def test_breaker_opens_when_the_group_keeps_failing():
+    class Clock:
+        now = 1000.0
+
+        def time(self):
+            return self.now
+
+    source = Markets({"A-USD": market(), "B-USD": market()}, fail={"A-USD", "B-USD"})
+    agent = Agent(env={"SYMBOLS": "A-USD,B-USD", "BREAKER_FAILURES": "2", "BREAKER_RESET": "30"},
+                  data_source=source, clock=Clock())
+    scheduler, breakers = agent._build_scheduler()
+    breaker = breakers["default"]
+    try:
+        agent._run_group("default", scheduler, breaker)
+        assert breaker.allow()
+        agent._run_group("default", scheduler, breaker)
+    finally:
+        agent.close()
+
+    assert not breaker.allow()
+    assert scheduler.next_due() == ("default", 30)
+
+
+@pytest.mark.parametrize("groups,expected", [
+    ("majors=SOL-USD,JUP-USD;memes=BONK-USD", {"majors": ["SOL-USD", "JUP-USD"], "memes": ["BONK-USD"]}),
+    ("SOL-USD;=BONK-USD", {"group1": ["SOL-USD"], "group2": ["BONK-USD"]}),
+    ("vazio=;a=X", {"a": ["X"]}),
+])
+def test_symbol_groups_parsing(groups, expected):
+    assert Agent._parse_symbol_groups(groups) == expected
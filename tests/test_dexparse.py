@@ -0,0 +1,127 @@
+"""Parser seletivo da DexScreener: mesmo resultado que o parser completo."""
+import json
+
+import pytest
+
+import dexparse
+from benchmarks.payloads import load_sample, scaled_bytes
+from conftest import dex_body, dex_pair
+
+
+def compact(data, ensure_ascii=True) -> bytes:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=ensure_ascii).encode()
+
+
+def assert_same(body):
+    rows = dexparse.parse_selective(body)
+    assert rows == dexparse.parse_full(body)
+    assert dexparse.parse_pairs(body) == rows
+    return rows
+
+
+def test_recorded_fixture_matches_full_parser():
+    sample = load_sample()
+    rows = assert_same(compact(sample))
+    solana = [p for p in sample["pairs"] if p["chainId"] == "solana"]
+    assert len(rows) == len(solana) > 0
+    assert len(sample["pairs"]) > len(solana)  # a amostra também tem outras chains
+
+
+def test_scaled_fixture_matches_full_parser():
+    assert len(assert_same(scaled_bytes(1000, seed=3))) > 0
+
+
+@pytest.mark.parametrize("drop", [
+    ("liquidity",), ("volume",), ("priceChange",), ("priceUsd",),
+    ("liquidity", "volume", "priceChange", "priceUsd"),
+])
+def test_missing_fields_match(drop):
+    pair = dex_pair("a", liquidity=1000, volume_24h=500, change_24h=2.5, price=0.1)
+    for field in drop:
+        del pair[field]
+    rows = assert_same(dex_body(dex_pair("b", 10, 20, 3), pair, dex_pair("c", 30, 40, -1)))
+    assert [r[0] for r in rows] == ["b", "a", "c"]
+
+
+def test_missing_base_token_name_matches():
+    pair = dex_pair("a")
+    del pair["baseToken"]["name"]
+    assert assert_same(dex_body(pair))[0][2] == "Unknown"
+
+
+@pytest.mark.parametrize("field,value", [
+    ("liquidity", None), ("volume", None), ("priceChange", None), ("priceUsd", None),
+    ("liquidity", {"usd": None}), ("volume", {"h24": None}), ("priceChange", {"h24": None}),
+    ("liquidity", {}),
+])
+def test_null_values_match(field, value):
+    pair = dex_pair("a", liquidity=1000, volume_24h=500, change_24h=2.5)
+    pair[field] = value
+    row, = assert_same(dex_body(pair))
+    assert row[0] == "a"
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+@pytest.mark.parametrize("name,symbol", [
+    ('Say "gm"', "GM"),
+    ("back\\slash", "BS"),
+    ("Café ☕", "CAFÉ"),
+    ("🐶 Dog", "🐶"),
+    ("tab\there", "TAB"),
+])
+def test_escaped_and_unicode_strings_match(name, symbol, ensure_ascii):
+    pair = dex_pair("a", liquidity=1, symbol=symbol)
+    pair["baseToken"]["name"] = name
+    rows = assert_same(compact({"pairs": [dex_pair("b"), pair, dex_pair("c")]}, ensure_ascii))
+    assert [r[0] for r in rows] == ["b", "a", "c"]
+    assert (rows[1][1], rows[1][2]) == (symbol, name)
+
+
+def test_non_solana_pairs_are_skipped():
+    pairs = [dex_pair("e1", chain="ethereum"), dex_pair("s1"), dex_pair("b1", chain="bsc"), dex_pair("s2")]
+    assert [r[0] for r in assert_same(dex_body(*pairs))] == ["s1", "s2"]
+    assert assert_same(dex_body(dex_pair("e1", chain="ethereum"))) == []
+
+
+def test_chain_name_prefix_is_not_solana():
+    assert assert_same(dex_body(dex_pair("x", chain="solanatest"), dex_pair("s"))) == \
+        [dexparse.pair_row(dex_pair("s"))]
+
+
+def test_fields_out_of_order_match():
+    pair = dex_pair("a", liquidity=1000, volume_24h=500, change_24h=2.5, price=3)
+    reordered = {k: pair[k] for k in ("chainId", "dexId", "liquidity", "priceChange", "volume", "priceUsd",
+                                      "baseToken", "pairAddress")}
+    row, = assert_same(dex_body(reordered))
+    assert row == ("a", "A", "Token a", 3.0, 1000.0, 500.0, 2.5)
+
+
+def test_nested_objects_with_same_keys_match():
+    pair = dex_pair("a", liquidity=1000, volume_24h=500, change_24h=2.5)
+    pair["volume"] = {"m5": 1, "h1": 2, "h6": 3, "h24": 500}
+    pair["txns"] = {"h24": {"buys": 7, "sells": 9}}
+    pair["info"] = {"websites": [{"label": "Website", "url": "https://x"}], "socials": []}
+    pair["liquidity"] = {"usd": 1000, "base": 5, "quote": 6}
+    assert assert_same(dex_body(pair))[0][4:6] == (1000.0, 500.0)
+
+
+@pytest.mark.parametrize("body", [
+    b"",
+    b'{"schemaVersion":"1.0.0","pairs":null}',
+    b'{"schemaVersion":"1.0.0","pairs":[]}',
+])
+def test_empty_bodies(body):
+    assert dexparse.parse_pairs(body) == dexparse.parse_full(body) == []
+
+
+def test_pretty_printed_body_falls_back_to_full_parser():
+    data = json.loads(dex_body(dex_pair("a", 10), dex_pair("b", chain="base")))
+    body = json.dumps(data, indent=2).encode()
+    with pytest.raises(ValueError):
+        dexparse.parse_selective(body)
+    assert dexparse.parse_pairs(body) == dexparse.parse_full(body) == [dexparse.pair_row(data["pairs"][0])]
+
+
+def test_full_mode_skips_selective_parser(monkeypatch):
+    monkeypatch.setattr(dexparse, "parse_selective", None)
+    assert dexparse.parse_pairs(dex_body(dex_pair("a")), mode=dexparse.FULL) == [dexparse.pair_row(dex_pair("a"))]
@@ -0,0 +1,124 @@
+"""EventRing: agregados por token somados na entrada e subtraídos na saída."""
+import random
+
+import pytest
+
+from solana_trader.core.events import (
+    DROP_NEWEST,
+    LIQUIDITY_ADD,
+    LIQUIDITY_REMOVE,
+    SWAP_BUY,
+    SWAP_SELL,
+    EventRing,
+    TokenFlow,
+)
+
+
+def brute_flow(events, token, large_swap):
+    """Agregados recalculados do zero sobre os eventos que deveriam estar no ring."""
+    flow = TokenFlow()
+    for _, tok, kind, value in events:
+        if tok != token:
+            continue
+        if kind in (SWAP_BUY, SWAP_SELL):
+            if kind == SWAP_BUY:
+                flow.buy += value
+            else:
+                flow.sell += value
+            flow.swaps += 1
+            flow.large_swaps += value >= large_swap
+        elif kind == LIQUIDITY_ADD:
+            flow.liquidity += value
+        else:
+            flow.liquidity -= value
+    return flow if any(e[1] == token for e in events) else None
+
+
+def assert_flow(ring, events, tokens):
+    for token in tokens:
+        expected = brute_flow(events, token, ring.large_swap)
+        got = ring.flow(token)
+        if expected is None:
+            assert got is None, token
+            continue
+        assert got.buy == pytest.approx(expected.buy, abs=1e-9)
+        assert got.sell == pytest.approx(expected.sell, abs=1e-9)
+        assert got.liquidity == pytest.approx(expected.liquidity, abs=1e-9)
+        assert (got.swaps, got.large_swaps) == (expected.swaps, expected.large_swaps)
+
+
+def test_push_accumulates_per_token():
+    ring = EventRing(capacity=8, large_swap=50)
+    ring.push_many([(1, "A", SWAP_BUY, 10), (2, "A", SWAP_SELL, 4), (3, "A", SWAP_BUY, 60),
+                    (4, "B", LIQUIDITY_ADD, 5), (5, "B", LIQUIDITY_REMOVE, 2)])
+
+    a = ring.flow("A")
+    assert (a.buy, a.sell, a.net_flow, a.swaps, a.large_swaps) == (70, 4, 66, 3, 1)
+    assert ring.flow("B").liquidity == 3
+    assert ring.flow("B").swaps == 0
+    assert ring.flow("C") is None
+
+
+def test_expire_subtracts_and_frees_tokens():
+    ring = EventRing(capacity=8, window=10, large_swap=50)
+    ring.push_many([(100, "A", SWAP_BUY, 60), (105, "B", SWAP_SELL, 3), (112, "A", SWAP_SELL, 2)])
+
+    ring.expire(now=114)  # corta ts < 104
+    a = ring.flow("A")
+    assert (a.buy, a.sell, a.swaps, a.large_swaps) == (0, 2, 1, 0)
+    assert ring.expired == 1
+
+    ring.expire(now=200)
+    assert len(ring) == 0
+    assert ring.flow("A") is None and ring.flow("B") is None
+    assert ring.token_ids == {}
+
+
+def test_drop_oldest_evicts_and_subtracts():
+    ring = EventRing(capacity=3, window=1e9)
+    ring.push_many([(1, "A", SWAP_BUY, 1), (2, "A", SWAP_BUY, 2), (3, "B", SWAP_BUY, 4)])
+    assert ring.push(4, "B", SWAP_SELL, 1)
+
+    assert ring.evicted == 1
+    assert ring.flow("A").buy == 2
+    assert ring.flow("B").net_flow == 3
+
+
+def test_drop_newest_refuses_when_full():
+    ring = EventRing(capacity=2, window=1e9, overflow=DROP_NEWEST, high_watermark=1.0)
+    assert ring.push_many([(1, "A", SWAP_BUY, 1), (2, "A", SWAP_BUY, 2), (3, "A", SWAP_BUY, 4)]) == 2
+
+    assert ring.dropped == 1
+    assert ring.saturated
+    assert ring.flow("A").buy == 3
+
+
+def test_invalid_overflow_policy():
+    with pytest.raises(ValueError):
+        EventRing(overflow="block")
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_stream_matches_recomputed_window(seed):
+    rnd = random.Random(seed)
+    capacity, window = 32, 20.0
+    ring = EventRing(capacity=capacity, window=window, large_swap=5.0)
+    tokens = [f"T{i}" for i in range(6)]
+    live = []  # o que deveria estar no ring, do mais antigo ao mais novo
+    ts = 0.0
+    for _ in range(400):
+        ts += rnd.random() * 2
+        event = (ts, rnd.choice(tokens), rnd.choice((SWAP_BUY, SWAP_SELL, LIQUIDITY_ADD, LIQUIDITY_REMOVE)),
+                 round(rnd.random() * 10, 3))
+        ring.push(*event)
+        live.append(event)
+        if len(live) > capacity:
+            live.pop(0)
+        if rnd.random() < 0.2:
+            ring.expire(now=ts)
+            live = [e for e in live if e[0] >= ts - window]
+        assert len(ring) == len(live)
+        if rnd.random() < 0.1:
+            assert_flow(ring, live, tokens)
+    assert_flow(ring, live, tokens)
+    assert [e["timestamp"] for e in ring.recent(5)] == [e[0] for e in reversed(live[-5:])]
@@ -0,0 +1,159 @@
+"""FanoutAggregator: hedge, saída antecipada, fallback stale e fusão por prioridade."""
+import threading
+import time
+
+import pytest
+
+from solana_trader.core.data_sources.fanout import FanoutAggregator
+from solana_trader.core.data_sources.helius import Helius
+from solana_trader.core.events import SWAP_BUY, SWAP_SELL, EventRing
+
+
+class Source:
+    """Fonte programável: `delays` por chamada (a última se repete), `fail` levanta."""
+
+    def __init__(self, data, delays=(0.0,), fail=False):
+        self.data = data
+        self.delays = list(delays)
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_market_snapshot(self, symbol):
+        with self._lock:
+            n = self.calls
+            self.calls += 1
+        time.sleep(self.delays[min(n, len(self.delays) - 1)])
+        if self.fail:
+            raise RuntimeError("fonte fora do ar")
+        return dict(self.data, symbol=symbol)
+
+
+@pytest.fixture
+def make():
+    created = []
+
+    def _make(sources, **kwargs):
+        agg = FanoutAggregator(sources, **kwargs)
+        created.append(agg)
+        return agg
+
+    yield _make
+    for agg in created:
+        agg.close()
+
+
+def test_slow_request_is_hedged_and_hedge_wins(make):
+    slow_once = Source({"price": 1.0, "change_1h": 0.1}, delays=(1.0, 0.0))
+    agg = make([("a", slow_once)], budget=2.0, hedge_after=0.05, hedge_ratio=1.0)
+
+    t0 = time.perf_counter()
+    market = agg.get_market_snapshot("SOL-USD")
+
+    assert time.perf_counter() - t0 < 0.5
+    assert market["price"] == 1.0
+    assert (agg.hedges, agg.hedge_wins) == (1, 1)
+    assert slow_once.calls == 2
+
+
+def test_hedges_are_capped_by_ratio(make):
+    slow = Source({"price": 1.0, "change_1h": 0.1}, delays=(0.3,))
+    agg = make([("a", slow)], budget=2.0, hedge_after=0.05, hedge_ratio=0.0)
+
+    market = agg.get_market_snapshot("SOL-USD")
+
+    assert market["price"] == 1.0
+    assert agg.hedges == 0
+    assert slow.calls == 1
+
+
+def test_early_exit_once_required_fields_arrive(make):
+    fast = Source({"price": 2.0, "change_1h": 0.02})
+    slow = Source({"price": 3.0, "liquidity": 1e6}, delays=(0.5,))
+    agg = make([("slow", slow), ("fast", fast)], budget=2.0, hedge_ratio=0.0)
+
+    t0 = time.perf_counter()
+    market = agg.get_market_snapshot("SOL-USD")
+    assert time.perf_counter() - t0 < 0.4
+    assert market["price"] == 2.0
+    assert market["provenance"]["price"] == {"source": "fast", "stale": False, "age": 0.0}
+    assert "liquidity" not in market
+
+    time.sleep(0.6)  # a fonte lenta termina em background e vira último valor bom
+    slow.delays = [0.5]
+    market = agg.get_market_snapshot("SOL-USD")
+    assert market["liquidity"] == 1e6
+    assert market["provenance"]["liquidity"]["stale"] is True
+    # fresco vence stale, mesmo de fonte com prioridade menor
+    assert market["provenance"]["price"]["source"] == "fast"
+
+
+def test_failed_source_falls_back_to_last_good(make):
+    flaky = Source({"price": 5.0, "change_1h": 0.01})
+    agg = make([("a", flaky)], budget=0.5, hedge_ratio=0.0)
+    assert agg.get_market_snapshot("SOL-USD")["price"] == 5.0
+
+    flaky.fail = True
+    market = agg.get_market_snapshot("SOL-USD")
+    assert market["price"] == 5.0
+    assert market["provenance"]["price"]["stale"] is True
+    assert agg.errors == 1
+    assert agg.stale_served >= 1
+
+
+def test_fresh_fields_follow_source_priority(make):
+    first = Source({"price": 1.0})
+    second = Source({"price": 2.0, "change_1h": 0.3})
+    agg = make([("first", first), ("second", second)], budget=1.0, required=())
+
+    markets = agg.get_market_snapshots(["A", "B"])
+
+    assert [m["symbol"] for m in markets] == ["A", "B"]
+    assert all(m["price"] == 1.0 and m["change_1h"] == 0.3 for m in markets)
+    assert markets[0]["provenance"]["change_1h"]["source"] == "second"
+
+
+def test_helius_source_resolves_symbol_to_mint(make):
+    mint = "So11111111111111111111111111111111111111112"
+    helius = Helius(EventRing(window=1e9), mints={"SOL-USD": mint})
+    helius.ring.push_many([(time.time(), mint, SWAP_BUY, 8.0), (time.time(), mint, SWAP_SELL, 3.0)])
+    agg = make([("dex", Source({"price": 20.0, "change_1h": 0.02})), ("helius", helius)], budget=1.0, required=())
+
+    market = agg.get_market_snapshot("SOL-USD")
+
+    assert helius.get_market_snapshot("SOL-USD")["net_flow"] == 5.0
+    assert market["net_flow"] == 5.0 and market["swaps"] == 2
+    assert market["provenance"]["net_flow"]["source"] == "helius"
+    assert helius.get_market_snapshot("JUP-USD") == {}
+
+
+def test_all_sources_failing_without_last_good_raises(make):
+    down = Source({"price": 1.0, "change_1h": 0.1}, fail=True)
+    agg = make([("a", down), ("b", Source({}, fail=True))], budget=0.5, hedge_ratio=0.0)
+
+    with pytest.raises(RuntimeError, match="fora do ar"):
+        agg.get_market_snapshot("SOL-USD")
+    with pytest.raises(RuntimeError):
+        agg.get_market_snapshots(["SOL-USD", "JUP-USD"])
+
+
+def test_all_sources_timing_out_raises_timeout(make):
+    slow = Source({"price": 1.0, "change_1h": 0.1}, delays=(0.5,))
+    agg = make([("a", slow)], budget=0.05, hedge_ratio=0.0)
+
+    with pytest.raises(TimeoutError):
+        agg.get_market_snapshot("SOL-USD")
+
+
+def test_symbol_without_required_fields_is_left_out(make):
+    class Partial(Source):
+        def get_market_snapshot(self, symbol):
+            data = super().get_market_snapshot(symbol)
+            return data if symbol == "SOL-USD" else {"volume": 10.0}
+
+    agg = make([("a", Partial({"price": 1.0, "change_1h": 0.1}))], budget=0.5)
+
+    markets = agg.get_market_snapshots(["SOL-USD", "JUP-USD"])
+    assert [m["symbol"] for m in markets] == ["SOL-USD"]
+    with pytest.raises(ValueError, match="campos obrigatórios"):
+        agg.get_market_snapshot("JUP-USD")
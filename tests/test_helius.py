@@ -0,0 +1,54 @@
+"""Helius: eventos do ring (por mint) chegando nos snapshots (por símbolo) e na Strategy."""
+import time
+
+from solana_trader.core.agent import Agent
+from solana_trader.core.data_sources.helius import Helius, parse_mints
+from solana_trader.core.events import SWAP_BUY, SWAP_SELL, EventRing
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
+BONK_MINT = "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263"
+
+
+def test_parse_mints():
+    assert parse_mints("SOL-USD:abc, BONK-USD : def,lixo,:x") == {"SOL-USD": "abc", "BONK-USD": "def"}
+    assert Helius.from_env({"BIRDEYE_ADDRESSES": "SOL-USD:abc"}).mints == {"SOL-USD": "abc"}
+    assert Helius.from_env({"HELIUS_MINTS": "SOL-USD:m", "BIRDEYE_ADDRESSES": "SOL-USD:abc"}).mints == {"SOL-USD": "m"}
+
+
+def test_annotate_resolves_symbol_to_mint():
+    helius = Helius(EventRing(window=1e9), mints={"SOL-USD": SOL_MINT})
+    helius.ring.push_many([(time.time(), SOL_MINT, SWAP_BUY, 3.0), (time.time(), BONK_MINT, SWAP_SELL, 1.0)])
+    markets = [{"symbol": "SOL-USD", "price": 20.0}, {"symbol": "BONK", "address": BONK_MINT}, {"symbol": "JUP-USD"}]
+
+    helius.annotate(markets)
+
+    assert markets[0]["net_flow"] == 3.0 and markets[0]["swaps"] == 1
+    assert markets[1]["net_flow"] == -1.0  # address da fonte vence o mapa
+    assert "net_flow" not in markets[2]
+
+
+def _agent(helius):
+    env = {"SYMBOLS": "SOL-USD", "STRATEGY_THRESHOLD": "0.01", "MAX_DAILY_LOSS_PCT": "0"}
+    agent = Agent(env=env)  # fonte padrão: DexScreener stub, change_1h = 1.5%
+    agent.events = helius
+    agent._annotate_events = True
+    return agent
+
+
+def test_net_flow_from_events_reaches_decide():
+    helius = Helius(EventRing(window=1e9), mints={"SOL-USD": SOL_MINT})
+    agent = _agent(helius)
+    seen = []
+    decide = agent.strategy.decide
+    agent.strategy.decide = lambda market, portfolio: seen.append(dict(market)) or decide(market, portfolio)
+
+    # saída líquida on-chain: a alta do preço não basta para comprar
+    helius.ring.push_many([(time.time(), SOL_MINT, SWAP_SELL, 40.0), (time.time(), SOL_MINT, SWAP_BUY, 5.0)])
+    assert agent.step() == []
+    assert seen[-1]["net_flow"] == -35.0
+
+    # fluxo vira de entrada: compra
+    helius.ring.push(time.time(), SOL_MINT, SWAP_BUY, 50.0)
+    executed = agent.step()
+    assert seen[-1]["net_flow"] == 15.0
+    assert [a["type"] for a in executed] == ["buy"]
@@ -0,0 +1,117 @@
+"""IndicatorEngine: warm-up vetorizado == tick a tick, e ambos == recálculo da janela."""
+import math
+
+import numpy as np
+import pytest
+
+from solana_trader.core.indicators import IndicatorEngine
+from solana_trader.core.strategy import Strategy
+
+FIELDS = ("ema", "volatility", "vwap", "volume_z", "rsi")
+
+
+def series(n, seed=1):
+    rng = np.random.default_rng(seed)
+    prices = 20 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    volumes = rng.lognormal(10, 1, n)
+    volumes[::7] = np.nan  # snapshots sem volume
+    return prices, volumes
+
+
+def assert_same(a, b, rel=1e-7):
+    assert (a.samples, a.ready) == (b.samples, b.ready)
+    for field in FIELDS:
+        x, y = getattr(a, field), getattr(b, field)
+        assert (math.isnan(x) and math.isnan(y)) or x == pytest.approx(y, rel=rel, abs=1e-9), field
+
+
+@pytest.mark.parametrize("n", [1, 2, 5, 14, 15, 59, 60, 61, 500, 5000])
+def test_warm_up_matches_tick_by_tick(n):
+    prices, volumes = series(n)
+    ticked, warmed = IndicatorEngine(), IndicatorEngine()
+    for price, volume in zip(prices, volumes):
+        a = ticked.update("S", price, volume)
+    b = warmed.warm_up("S", prices, volumes)
+    assert_same(a, b)
+
+    # depois do warm-up, os dois seguem iguais
+    for price in prices[:80]:
+        a = ticked.update("S", price, 5.0)
+        b = warmed.update("S", price, 5.0)
+    assert_same(a, b)
+
+
+def test_window_indicators_match_recomputation():
+    prices, volumes = series(700, seed=3)
+    engine = IndicatorEngine(window=60)
+    for price, volume in zip(prices, volumes):
+        ind = engine.update("S", price, volume)
+
+    returns = np.diff(np.log(prices))[-60:]
+    vols = np.nan_to_num(volumes[-60:])
+    assert ind.ready and ind.samples == 700
+    assert ind.volatility == pytest.approx(returns.std(ddof=1), rel=1e-9)
+    assert ind.vwap == pytest.approx((prices[-60:] * vols).sum() / vols.sum(), rel=1e-9)
+    assert ind.volume_z == pytest.approx((vols[-1] - vols.mean()) / vols.std(ddof=1), rel=1e-6)
+
+    ema = prices[0]
+    for price in prices[1:]:
+        ema += 2 / 21 * (price - ema)
+    assert ind.ema == pytest.approx(ema, rel=1e-12)
+
+
+def test_invalid_ticks_are_skipped():
+    prices = np.array([10.0, np.nan, 11.0, 0.0, -1.0, np.inf, 12.0])
+    ticked = IndicatorEngine()
+    for price in prices:
+        ticked.update("S", price)
+    assert ticked.get("S").samples == 3
+    assert_same(ticked.get("S"), IndicatorEngine().warm_up("S", prices))
+    assert IndicatorEngine().warm_up("S", [np.nan, 0.0]) is None
+
+
+def test_missing_price_is_skipped():
+    engine = IndicatorEngine()
+    assert engine.update("S", None) is None
+    assert engine.update("S", 10.0, 5.0).samples == 1
+    assert engine.update("S", None, 5.0).samples == 1
+    assert engine.update("S", math.inf).samples == 1
+    assert engine.update_many([{"symbol": "S"}, {"symbol": "S", "price": None, "volume": 1}]) == {
+        "S": engine.get("S")}
+    assert engine.get("S").samples == 1
+
+
+@pytest.mark.parametrize("price", [None, 0, -1.0, math.nan, math.inf])
+def test_strategy_holds_without_a_valid_price(price):
+    class Book:
+        cash = 1000.0
+        positions = {"SOL-USD": 2.0}
+
+    strategy = Strategy({})
+    for change in (0.05, -0.05):
+        market = {"symbol": "SOL-USD", "price": price, "change_1h": change}
+        assert strategy.decide(market, Book()) == {"type": None}
+    assert strategy.decide({"symbol": "SOL-USD", "change_1h": 0.05}, Book()) == {"type": None}
+
+
+def test_strategy_warm_up_reads_recorded_history():
+    class Store:
+        def __init__(self, prices, volumes):
+            self.data = {"price": prices, "volume_24h": volumes}
+            self.reads = []
+
+        def read(self, symbol, start=None):
+            self.reads.append((symbol, start))
+            return self.data if symbol == "SOL-USD" else {"price": np.array([]), "volume_24h": np.array([])}
+
+    prices, volumes = series(120)
+    strategy = Strategy({"INDICATOR_WINDOW": "60"})
+    store = Store(prices, volumes)
+    strategy.warm_up(store, ["SOL-USD", "JUP-USD"], start=123.0)
+
+    ticked = IndicatorEngine(window=60)
+    for price, volume in zip(prices, volumes):
+        expected = ticked.update("S", price, volume)
+    assert_same(strategy.indicators.get("SOL-USD"), expected)
+    assert "JUP-USD" not in strategy.indicators
+    assert store.reads == [("SOL-USD", 123.0), ("JUP-USD", 123.0)]
@@ -0,0 +1,110 @@
+"""Journal + snapshots do portfólio: replay, truncamento de linha cortada e restart."""
+import os
+
+import pytest
+
+from solana_trader.core.journal import Journal, StateStore
+
+
+def buy(symbol="SOL", qty=1.0, price=10.0):
+    return {"type": "buy", "symbol": symbol, "qty": qty, "price": price}
+
+
+def sell(symbol="SOL", qty=1.0, price=10.0):
+    return {"type": "sell", "symbol": symbol, "qty": qty, "price": price}
+
+
+def write_journal(root, trades, rotate_every=None):
+    journal = Journal(str(root))
+    journal.open(1)
+    for i, trade in enumerate(trades, 1):
+        journal.append(trade)
+        if rotate_every and i % rotate_every == 0:
+            journal.rotate()
+    journal.close()
+    return journal
+
+
+def test_replay_returns_records_after_seq(tmp_path):
+    trades = [buy(qty=i) for i in range(1, 11)]
+    write_journal(tmp_path, trades, rotate_every=3)
+
+    journal = Journal(str(tmp_path))
+    assert len(journal.segments()) == 4
+    assert [seq for seq, _ in journal.replay(0)] == list(range(1, 11))
+
+    journal = Journal(str(tmp_path))
+    replayed = list(journal.replay(7))
+    assert [seq for seq, _ in replayed] == [8, 9, 10]
+    assert [t["qty"] for _, t in replayed] == [8, 9, 10]
+    assert journal.next_seq == 11
+
+
+def test_replay_truncates_partial_last_line(tmp_path):
+    write_journal(tmp_path, [buy(), buy(), buy()])
+    _, path = Journal(str(tmp_path)).segments()[-1]
+    size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b'{"seq": 4, "trade": {"type": "bu')
+
+    journal = Journal(str(tmp_path))
+    assert [seq for seq, _ in journal.replay(0)] == [1, 2, 3]
+    assert os.path.getsize(path) == size
+    assert journal.next_seq == 4
+
+
+def test_corruption_before_last_segment_is_an_error(tmp_path):
+    write_journal(tmp_path, [buy() for _ in range(4)], rotate_every=2)
+    _, first = Journal(str(tmp_path)).segments()[0]
+    with open(first, "ab") as f:
+        f.write(b"lixo\n")
+
+    with pytest.raises(ValueError):
+        list(Journal(str(tmp_path)).replay(0))
+
+
+def test_state_store_restart_matches_live_state(tmp_path):
+    store = StateStore(str(tmp_path), snapshot_every=4, sync_interval=0.01)
+    portfolio = store.load(starting_cash=1000.0)
+    trades = [buy("SOL", 2, 10), buy("JUP", 5, 1), sell("SOL", 1, 12), buy("SOL", 1, 11),
+              buy("WIF", 10, 0.5), sell("JUP", 5, 1.5), buy("JUP", 2, 1.2)]
+    for trade in trades:
+        assert store.apply_trade(trade)
+    expected = portfolio.to_state()
+    store.close(snapshot=False)
+
+    restored = StateStore(str(tmp_path))
+    again = restored.load()
+    try:
+        assert again.to_state() == expected
+        assert restored.trades_total == len(trades)
+        assert restored.replayed == len(trades) % 4  # só o que veio depois do último snapshot
+    finally:
+        restored.close()
+
+
+def test_state_store_drops_torn_write_on_restart(tmp_path):
+    store = StateStore(str(tmp_path), snapshot_every=100, sync_interval=0.01)
+    store.load(starting_cash=1000.0)
+    store.apply_trade(buy("SOL", 1, 10))
+    store.apply_trade(buy("SOL", 1, 10))
+    store.close(snapshot=False)
+    _, path = Journal(str(tmp_path)).segments()[-1]
+    with open(path, "ab") as f:
+        f.write(b'{"seq": 3, "tra')
+
+    restored = StateStore(str(tmp_path))
+    portfolio = restored.load()
+    try:
+        assert restored.trades_total == 2
+        assert portfolio.positions == {"SOL": 2.0}
+        assert restored.apply_trade(buy("SOL", 1, 10))
+    finally:
+        restored.close()
+
+    final = StateStore(str(tmp_path))
+    try:
+        assert final.load().positions == {"SOL": 3.0}
+        assert final.trades_total == 3
+    finally:
+        final.close()
@@ -0,0 +1,101 @@
+"""TradeLedger: snapshot e fsync na thread de fundo, restart a partir do log."""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import ledger as ledger_module
+from ledger import LOG_FILE, SNAPSHOT_FILE, TradeLedger
+from trader import TradeResult
+
+
+def trade(action="buy", token="TokenX", amount=10.0, success=True):
+    return TradeResult(success, action, token, amount, "sig", "ok", {"mode": "paper"})
+
+
+def wait_until(cond, timeout=2.0):
+    deadline = time.time() + timeout
+    while not cond() and time.time() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+
+def test_in_memory_ledger_tracks_net_usd():
+    ledger = TradeLedger(None)
+    assert ledger.record(trade("buy", amount=30))
+    assert ledger.record(trade("sell", amount=10))
+    assert not ledger.record(trade(success=False))
+    assert not ledger.record(trade("hold"))
+    assert ledger.open_positions == {"TokenX": 20.0}
+    assert ledger.trades_total == 2
+    ledger.record(trade("sell", amount=25))
+    assert ledger.open_positions == {}
+    ledger.close()
+
+
+def test_snapshot_is_written_off_the_recording_thread(tmp_path, monkeypatch):
+    fsyncs = []
+    real_fsync = os.fsync
+
+    def tracking_fsync(fd):
+        fsyncs.append(threading.current_thread().name)
+        real_fsync(fd)
+
+    monkeypatch.setattr(ledger_module.os, "fsync", tracking_fsync)
+    ledger = TradeLedger(str(tmp_path), snapshot_every=3, sync_interval=10)
+    try:
+        for _ in range(3):
+            ledger.record(trade())
+        assert wait_until(lambda: (tmp_path / SNAPSHOT_FILE).exists())
+        snap = json.loads((tmp_path / SNAPSHOT_FILE).read_text())
+        assert snap["trades_total"] == 3
+        assert snap["offset"] == os.path.getsize(tmp_path / LOG_FILE)
+        assert fsyncs and set(fsyncs) == {"ledger-sync"}
+    finally:
+        ledger.close()
+
+
+def test_log_is_synced_periodically(tmp_path, monkeypatch):
+    synced = threading.Event()
+    monkeypatch.setattr(ledger_module.os, "fsync", lambda fd: synced.set())
+    ledger = TradeLedger(str(tmp_path), snapshot_every=100, sync_interval=0.05)
+    try:
+        ledger.record(trade())
+        assert synced.wait(1)
+        assert not (tmp_path / SNAPSHOT_FILE).exists()
+    finally:
+        ledger.close()
+
+
+def test_restart_replays_log_after_snapshot(tmp_path):
+    ledger = TradeLedger(str(tmp_path), snapshot_every=2)
+    ledger.record(trade("buy", "A", 10))
+    ledger.record(trade("buy", "B", 5))
+    assert wait_until(lambda: (tmp_path / SNAPSHOT_FILE).exists())
+    ledger.record(trade("sell", "A", 4))  # só no log: o processo "cai" sem close()
+    with open(tmp_path / LOG_FILE, "ab") as f:
+        f.write(b'{"ts": 1, "action": "bu')  # linha cortada no meio
+
+    restarted = TradeLedger(str(tmp_path))
+    try:
+        assert restarted.open_positions == {"A": 6.0, "B": 5.0}
+        assert restarted.trades_total == 3
+        assert [e["token"] for e in restarted.recent] == ["A", "B", "A"]
+        assert (tmp_path / LOG_FILE).read_bytes().endswith(b"\n")
+    finally:
+        restarted.close()
+        ledger._stop.set()
+
+
+def test_close_writes_final_snapshot(tmp_path):
+    ledger = TradeLedger(str(tmp_path), snapshot_every=100)
+    ledger.record(trade(amount=7))
+    ledger.close()
+    assert ledger._thread is None
+    snap = json.loads((tmp_path / SNAPSHOT_FILE).read_text())
+    assert snap["positions"] == {"TokenX": 7.0}
+    assert snap["offset"] == os.path.getsize(tmp_path / LOG_FILE)
+    ledger.close()  # idempotente
+    assert not ledger.record(trade(success=False))
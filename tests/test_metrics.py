@@ -0,0 +1,92 @@
+"""Registry de métricas e endpoint /metrics no formato texto do Prometheus."""
+import urllib.error
+import urllib.request
+
+import pytest
+
+from metrics import Registry, start_http_server
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+@pytest.fixture
+def server(registry):
+    srv = start_http_server(0, registry=registry)
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_counter_and_labelled_gauge(registry):
+    scans = registry.counter("scans_total", "Scans")
+    scans.inc()
+    scans.inc(2)
+    interval = registry.gauge("interval_seconds", "Intervalo", ("group",))
+    interval.labels("memes").set(5)
+    interval.labels('a"b').set(2.5)
+
+    assert registry.render().splitlines() == [
+        "# HELP scans_total Scans",
+        "# TYPE scans_total counter",
+        "scans_total 3",
+        "# HELP interval_seconds Intervalo",
+        "# TYPE interval_seconds gauge",
+        'interval_seconds{group="a\\"b"} 2.5',
+        'interval_seconds{group="memes"} 5',
+    ]
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    stage = registry.histogram("stage_seconds", "Etapas", ("stage",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        stage.labels("fetch").observe(value)
+
+    lines = [l for l in registry.render().splitlines() if not l.startswith("#")]
+    assert lines == [
+        'stage_seconds_bucket{stage="fetch",le="0.1"} 2',
+        'stage_seconds_bucket{stage="fetch",le="1"} 3',
+        'stage_seconds_bucket{stage="fetch",le="+Inf"} 4',
+        'stage_seconds_sum{stage="fetch"} 3.65',
+        'stage_seconds_count{stage="fetch"} 4',
+    ]
+
+
+def test_registering_twice_returns_the_same_metric(registry):
+    assert registry.counter("x_total", "x") is registry.counter("x_total", "x")
+    with pytest.raises(ValueError):
+        registry.gauge("x_total", "x")
+    with pytest.raises(ValueError):
+        registry.gauge("y", "y", ("a", "b")).labels("só um")
+
+
+def test_callbacks_are_read_at_collection_time(registry):
+    depth = [3]
+    registry.gauge_callback("queue_depth", "Fila", lambda: depth[0])
+    registry.counter_callback("broken_total", "Quebrado", lambda: 1 / 0)
+    assert "queue_depth 3" in registry.render()
+    depth[0] = 7
+    text = registry.render()
+    assert "queue_depth 7" in text
+    assert text.endswith("# TYPE broken_total counter\n")  # sem amostra, sem derrubar o resto
+
+
+def test_metrics_endpoint_serves_the_registry(registry, server):
+    registry.counter("scans_total", "Scans").inc()
+    with urllib.request.urlopen(server + "/metrics?x=1") as resp:
+        assert resp.status == 200
+        assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        body = resp.read().decode()
+    assert "scans_total 1" in body
+
+    registry.counter("scans_total", "Scans").inc()
+    with urllib.request.urlopen(server + "/metrics") as resp:
+        assert "scans_total 2" in resp.read().decode()
+
+
+def test_other_paths_are_not_found(server):
+    with pytest.raises(urllib.error.HTTPError) as info:
+        urllib.request.urlopen(server + "/")
+    assert info.value.code == 404
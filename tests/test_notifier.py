@@ -0,0 +1,135 @@
+"""TelegramOutbox: token buckets, retry_after, coalescência e ordem por chat."""
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+
+from notifier import TelegramOutbox, TokenBucket, split_message
+
+
+class RetryAfter(Exception):
+    def __init__(self, seconds):
+        super().__init__(f"flood control: {seconds}")
+        self.retry_after = seconds
+
+
+class FakeBot:
+    """Registra (chat_id, texto, instante); `failures` são levantadas em ordem antes de aceitar."""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.sent = []
+        self.attempts = []
+
+    async def send_message(self, chat_id, text):
+        now = time.monotonic()
+        self.attempts.append(now)
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((chat_id, text, now))
+
+
+def deliver(outbox, messages, drain_timeout=5):
+    async def run():
+        outbox.start()
+        for chat_id, text in messages:
+            outbox.send(chat_id, text)
+        await outbox.stop(drain_timeout)
+
+    asyncio.run(run())
+
+
+def test_token_bucket_spaces_reservations():
+    bucket = TokenBucket(rate=10, burst=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.01)
+    assert waits[3] == pytest.approx(0.2, abs=0.01)
+
+
+def test_token_bucket_block_holds_for_the_given_time():
+    bucket = TokenBucket(rate=1, burst=1)
+    bucket.block(3)
+    assert bucket.reserve() == pytest.approx(4, abs=0.01)
+
+
+def test_split_message_breaks_on_lines():
+    assert split_message("aaa\nbbb\nccc", 8) == ["aaa\nbbb\n", "ccc"]
+    assert split_message("x" * 10, 4) == ["xxxx", "xxxx", "xx"]
+
+
+def test_per_chat_rate_is_respected():
+    bot = FakeBot()
+    outbox = TelegramOutbox(bot, chat_rate=20, max_chars=5)
+    deliver(outbox, [(1, f"m{i}") for i in range(4)])
+
+    times = [t for _, _, t in bot.sent]
+    assert [text for _, text, _ in bot.sent] == ["m0", "m1", "m2", "m3"]
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert min(gaps) >= 0.04  # 20/s por chat, com folga para o relógio
+
+
+def test_chats_do_not_wait_for_each_other():
+    bot = FakeBot()
+    outbox = TelegramOutbox(bot, chat_rate=1, max_chars=5)
+    t0 = time.monotonic()
+    deliver(outbox, [(chat, "oi") for chat in range(5)])
+
+    assert sorted(chat for chat, _, _ in bot.sent) == ["0", "1", "2", "3", "4"]
+    assert max(t for _, _, t in bot.sent) - t0 < 0.5
+
+
+def test_group_chats_use_the_group_rate():
+    outbox = TelegramOutbox(FakeBot(), chat_rate=1, group_rate=0.5)
+    assert outbox._bucket_for("-100").rate == 0.5
+    assert outbox._bucket_for("42").rate == 1
+
+
+def test_pending_messages_for_a_chat_are_merged():
+    bot = FakeBot()
+    outbox = TelegramOutbox(bot, max_chars=12)
+    for text in ("um", "dois", "três", "quatro"):
+        outbox.send(7, text)
+    assert outbox.pending() == 2 and outbox.merged == 2
+    deliver(outbox, [])
+
+    assert [text for _, text, _ in bot.sent] == ["um\n\ndois", "três\n\nquatro"]
+
+
+def test_retry_after_is_honoured_before_retrying():
+    bot = FakeBot(failures=[RetryAfter(0.3)])
+    outbox = TelegramOutbox(bot, chat_rate=100)
+    deliver(outbox, [(1, "oi")])
+
+    assert [text for _, text, _ in bot.sent] == ["oi"]
+    assert bot.attempts[1] - bot.attempts[0] >= 0.28
+    assert outbox.retries == 1 and outbox.sent == 1 and outbox.failed == 0
+
+
+def test_retry_after_as_timedelta():
+    bot = FakeBot(failures=[RetryAfter(timedelta(milliseconds=200))])
+    outbox = TelegramOutbox(bot, chat_rate=100)
+    deliver(outbox, [(1, "oi")])
+
+    assert bot.attempts[1] - bot.attempts[0] >= 0.18
+    assert outbox.sent == 1
+
+
+def test_retry_after_on_one_chat_does_not_block_others():
+    bot = FakeBot(failures=[RetryAfter(0.5)])
+    outbox = TelegramOutbox(bot, chat_rate=100)
+    deliver(outbox, [(1, "primeiro"), (2, "segundo")])
+
+    order = [chat for chat, _, _ in bot.sent]
+    assert order == ["2", "1"]
+
+
+def test_message_is_dropped_after_max_retries():
+    bot = FakeBot(failures=[RetryAfter(0.01)] * 3)
+    outbox = TelegramOutbox(bot, chat_rate=1000, max_retries=3)
+    deliver(outbox, [(1, "perdida"), (1, "x" * 4000)])
+
+    assert len(bot.attempts) == 3 + 2  # a segunda, grande demais para juntar, foi dividida
+    assert outbox.failed == 1 and outbox.retries == 2
+    assert [len(text) for _, text, _ in bot.sent] == [3500, 500]
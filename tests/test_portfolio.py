@@ -0,0 +1,86 @@
+"""Portfolio incremental: agregados em O(1) batem com o recálculo do livro."""
+import random
+
+import pytest
+
+from solana_trader.core.portfolio import Portfolio
+
+
+def recomputed(portfolio):
+    """equity e PnL não realizado calculados do zero a partir das posições."""
+    value = sum(qty * portfolio.prices[sym] for sym, qty in portfolio.positions.items())
+    return portfolio.cash + value, value - sum(portfolio.cost_basis.values())
+
+
+def test_mark_to_market_follows_price_updates():
+    p = Portfolio(1000)
+    assert p.apply_trade({"type": "buy", "symbol": "SOL", "qty": 2, "price": 100})
+    assert (p.cash, p.equity, p.unrealized_pnl) == (800, 1000, 0)
+
+    p.update_prices([{"symbol": "SOL", "price": 110}, {"symbol": "JUP", "price": 1}, {"symbol": "X"}])
+    assert p.equity == 1020 and p.unrealized_pnl == 20
+    assert p.exposure("SOL") == 220 and p.exposure("JUP") == 0
+    assert p.prices == {"SOL": 110, "JUP": 1}
+
+
+def test_partial_and_full_sell_realize_pnl():
+    p = Portfolio(1000)
+    p.apply_trade({"type": "buy", "symbol": "SOL", "qty": 4, "price": 50})
+    p.apply_trade({"type": "sell", "symbol": "SOL", "qty": 1, "price": 60})
+    assert p.realized_pnl == pytest.approx(10)
+    assert p.cost_basis["SOL"] == pytest.approx(150)
+    assert p.unrealized_pnl == pytest.approx(30)
+
+    p.apply_trade({"type": "sell", "symbol": "SOL", "qty": 10, "price": 40})  # vende só o que tem
+    assert p.positions == {} and p.cost_basis == {}
+    assert p.realized_pnl == pytest.approx(-20)
+    assert (p.position_value, p.unrealized_pnl) == (0, 0)
+    assert p.cash == pytest.approx(980)
+
+
+def test_buy_beyond_cash_is_refused():
+    p = Portfolio(100)
+    assert not p.apply_trade({"type": "buy", "symbol": "SOL", "qty": 2, "price": 60})
+    assert not p.apply_trade({"type": "hold", "symbol": "SOL"})
+    assert (p.cash, p.positions, p.prices) == (100, {}, {})
+
+
+def test_total_value_with_lookup_matches_index():
+    p = Portfolio(1000)
+    p.apply_trade({"type": "buy", "symbol": "SOL", "qty": 1, "price": 100})
+    assert p.total_value() == p.equity == 1000
+    assert p.total_value(lambda sym: 150) == 1050
+
+
+def test_state_round_trip_keeps_aggregates():
+    p = Portfolio(1000)
+    p.apply_trade({"type": "buy", "symbol": "SOL", "qty": 3, "price": 20})
+    p.update_price("SOL", 25)
+    q = Portfolio.from_state(p.to_state())
+    assert (q.cash, q.positions, q.prices, q.cost_basis) == (p.cash, p.positions, p.prices, p.cost_basis)
+    assert (q.equity, q.unrealized_pnl) == (p.equity, p.unrealized_pnl)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_ticks_and_fills_match_recomputation(seed):
+    rng = random.Random(seed)
+    symbols = ["A", "B", "C", "D"]
+    p = Portfolio(10_000)
+    for _ in range(2000):
+        sym = rng.choice(symbols)
+        price = rng.uniform(0.5, 50)
+        roll = rng.random()
+        if roll < 0.5:
+            p.update_price(sym, price)
+        elif roll < 0.8:
+            p.apply_trade({"type": "buy", "symbol": sym, "qty": rng.uniform(0, 5), "price": price})
+        else:
+            p.apply_trade({"type": "sell", "symbol": sym, "qty": rng.uniform(0, 5), "price": price})
+
+        equity, unrealized = recomputed(p)
+        assert p.equity == pytest.approx(equity, rel=1e-9, abs=1e-6)
+        assert p.unrealized_pnl == pytest.approx(unrealized, rel=1e-9, abs=1e-6)
+
+    drift = p.equity
+    p.resync()
+    assert p.equity == pytest.approx(drift, rel=1e-9)
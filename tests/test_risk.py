@@ -0,0 +1,139 @@
+"""RiskManager: `check_batch` == `check` ordem a ordem (aplicando cada fill), e limites."""
+import copy
+import random
+
+import pytest
+
+from solana_trader.core.portfolio import Portfolio
+from solana_trader.core.risk import RiskManager
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+def buy(symbol, qty, price=1.0):
+    return {"type": "buy", "symbol": symbol, "qty": qty, "price": price}
+
+
+def sell(symbol, qty, price=1.0):
+    return {"type": "sell", "symbol": symbol, "qty": qty, "price": price}
+
+
+def random_case(rnd):
+    symbols = [f"T{i}" for i in range(rnd.randint(1, 8))]
+    portfolio = Portfolio(rnd.choice([100, 1000, 10000]))
+    for s in symbols:
+        if rnd.random() < 0.5:
+            portfolio.apply_trade(buy(s, rnd.uniform(0, 30), rnd.uniform(1, 5)))
+    env = {key: str(rnd.choice(values)) for key, values in {
+        "MAX_POSITION_PCT": [0, 0.05, 0.5],
+        "MAX_TOKEN_EXPOSURE_PCT": [0, 0.1, 0.3],
+        "MAX_GROSS_EXPOSURE_PCT": [0, 0.5, 1],
+        "MAX_NET_EXPOSURE_PCT": [0, 0.4, 1],
+        "MAX_LIQUIDITY_PCT": [0, 0.01],
+    }.items()}
+    markets = [{"symbol": s, "price": portfolio.prices.get(s, 2.0), "liquidity": rnd.choice([0, 500, 50000])}
+               for s in symbols]
+    for market in markets:
+        portfolio.update_price(market["symbol"], market["price"])
+    actions = []
+    for _ in range(rnd.randint(1, 12)):
+        s = rnd.choice(symbols)
+        kind = rnd.choice(["buy", "buy", "sell"])
+        actions.append({"type": kind, "symbol": s, "price": portfolio.prices[s], "qty": rnd.uniform(0, 50)})
+    # mesma ordem do Agent.step: vendas primeiro, depois por símbolo
+    actions.sort(key=lambda a: (a["type"] != "sell", a["symbol"]))
+    return env, markets, portfolio, actions
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_batch_matches_sequential_checks(seed):
+    rnd = random.Random(seed)
+    for _ in range(200):
+        env, markets, portfolio, actions = random_case(rnd)
+        batch_risk, seq_risk = RiskManager(env, Clock()), RiskManager(env, Clock())
+        batch_risk.observe(markets)
+        seq_risk.observe(markets)
+        batch_pf, seq_pf = copy.deepcopy(portfolio), copy.deepcopy(portfolio)
+
+        batched = batch_risk.check_batch(copy.deepcopy(actions), batch_pf)
+        sequential = []
+        for action in copy.deepcopy(actions):
+            checked = seq_risk.check(action, seq_pf)
+            sequential.append(checked and dict(checked))
+            if checked:
+                assert seq_pf.apply_trade(checked)  # ordem aprovada sempre cabe no caixa
+
+        assert len(batched) == len(actions)
+        for got, expected in zip(batched, sequential):
+            assert (got["qty"] if got else 0) == pytest.approx(expected["qty"] if expected else 0, abs=1e-6)
+        # o lote aprovado sempre cabe no portfólio
+        for checked in batched:
+            if checked:
+                assert batch_pf.apply_trade(checked)
+
+
+def test_rounded_qty_never_costs_more_than_the_cash_left():
+    # 27.519017939999998 / 2 arredondado para 1e-8 dá um qty cujo custo passa do caixa por um ulp
+    portfolio = Portfolio(100)
+    portfolio.apply_trade(buy("A", 36.24049103, 2.0))
+    risk = RiskManager({"MAX_POSITION_PCT": "0", "MAX_TOKEN_EXPOSURE_PCT": "0", "MAX_LIQUIDITY_PCT": "0"}, Clock())
+
+    single = risk.check(buy("A", 45, 2.0), portfolio)
+    batched = risk.check_batch([buy("A", 45, 2.0), buy("B", 1, 2.0)], copy.deepcopy(portfolio))[0]
+
+    for checked in (single, batched):
+        assert checked["qty"] * 2.0 <= portfolio.cash
+    assert portfolio.apply_trade(single)
+
+
+def test_orders_of_one_token_share_its_headroom():
+    portfolio = Portfolio(1000)
+    risk = RiskManager({"MAX_POSITION_PCT": "0.15", "MAX_TOKEN_EXPOSURE_PCT": "0.2", "MAX_LIQUIDITY_PCT": "0"}, Clock())
+
+    out = risk.check_batch([buy("A", 150), buy("B", 50), buy("A", 150)], portfolio)
+
+    assert [a["qty"] for a in out] == [150, 50, 50]  # A: 150 + 50 = 20% do equity
+
+
+def test_sells_free_cash_for_buys_in_the_same_batch():
+    portfolio = Portfolio(100)
+    portfolio.apply_trade(buy("A", 100))
+    risk = RiskManager({"MAX_POSITION_PCT": "0", "MAX_TOKEN_EXPOSURE_PCT": "0", "MAX_LIQUIDITY_PCT": "0"}, Clock())
+
+    out = risk.check_batch([sell("A", 40), buy("B", 60), buy("C", 60)], portfolio)
+
+    assert [a and a["qty"] for a in out] == [40, 40, None]
+    assert risk.check_batch([sell("Z", 1)], portfolio) == [None]  # sem posição
+
+
+def test_liquidity_cap_uses_observed_pools():
+    risk = RiskManager({"MAX_POSITION_PCT": "0", "MAX_TOKEN_EXPOSURE_PCT": "0", "MAX_LIQUIDITY_PCT": "0.01"}, Clock())
+    risk.observe([{"symbol": "A", "liquidity": 2000}, {"symbol": "B"}])
+
+    out = risk.check_batch([buy("A", 100), buy("B", 100)], Portfolio(1000))
+
+    assert [a["qty"] for a in out] == [20, 100]
+
+
+def test_daily_loss_halts_buys_until_next_day():
+    clock = Clock()
+    portfolio = Portfolio(1000)
+    portfolio.apply_trade(buy("A", 20, 10))
+    risk = RiskManager({"MAX_DAILY_LOSS_PCT": "0.05"}, clock)
+    assert risk.check_batch([buy("B", 10)], portfolio)[0] is not None
+
+    portfolio.update_price("A", 7)  # equity 1000 -> 940
+    out = risk.check_batch([buy("B", 10), sell("A", 1, 7)], portfolio)
+    assert out[0] is None and out[1]["qty"] == 1
+    assert risk.halted
+    assert risk.check(buy("B", 10), portfolio) is None
+
+    clock.now += 86400
+    assert risk.check_batch([buy("B", 10)], portfolio)[0] is not None
+    assert not risk.halted
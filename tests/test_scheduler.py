@@ -0,0 +1,95 @@
+"""Scheduler adaptativo e circuit breaker.
+
+O código vive em solana_trader/core/scheduler.py; project-root/scheduler.py
+carrega esse arquivo, então os testes de comportamento rodam pelos dois
+caminhos de import.
+"""
+import inspect
+import os
+
+import pytest
+
+import scheduler as watcher_scheduler
+from solana_trader.core import scheduler as agent_scheduler
+
+MODULES = pytest.mark.parametrize("mod", [watcher_scheduler, agent_scheduler], ids=["project-root", "solana_trader"])
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_watcher_loads_the_agent_scheduler_file():
+    for name in ("AdaptiveScheduler", "CircuitBreaker", "QuotaTracker"):
+        source = inspect.getsourcefile(getattr(watcher_scheduler, name))
+        assert os.path.samefile(source, agent_scheduler.__file__)
+    assert (watcher_scheduler.CLOSED, watcher_scheduler.OPEN, watcher_scheduler.HALF_OPEN) == \
+        (agent_scheduler.CLOSED, agent_scheduler.OPEN, agent_scheduler.HALF_OPEN)
+
+
+@MODULES
+def test_breaker_opens_doubles_and_closes(mod):
+    clock = Clock()
+    breaker = mod.CircuitBreaker(failure_threshold=3, reset_timeout=10, max_timeout=25, clock=clock)
+
+    assert [breaker.record_failure() for _ in range(3)] == [False, False, True]
+    assert breaker.state == mod.OPEN and not breaker.allow()
+    assert breaker.retry_in() == 10
+
+    clock.now += 10
+    assert breaker.allow() and breaker.state == mod.HALF_OPEN
+    assert breaker.record_failure()  # falha no half-open reabre direto, com espera dobrada
+    assert breaker.timeout == 20
+
+    clock.now += 20
+    assert breaker.allow()
+    assert breaker.record_failure()
+    assert breaker.timeout == 25  # limitado por max_timeout
+
+    clock.now += 25
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == mod.CLOSED and breaker.trips == 0
+    assert not breaker.record_failure()
+
+
+@MODULES
+def test_interval_follows_pressure(mod):
+    clock = Clock()
+    sched = mod.AdaptiveScheduler(10, 640, 100, volatility_ref=0.02, churn_ref=0.5, smoothing=1.0, clock=clock)
+    sched.add_group("g")
+
+    assert sched.observe("g", {"a": 1.0, "b": 2.0}) == 640  # primeiro poll: sem referência
+    clock.now += 100
+    assert sched.observe("g", {"a": 1.0, "b": 2.0}) == 640  # mercado parado: intervalo máximo
+    clock.now += 100
+    assert sched.observe("g", {"a": 1.01, "b": 2.02}) == pytest.approx(80)  # pressão 0.5: meio termo geométrico
+    clock.now += 100
+    assert sched.observe("g", {"a": 1.01, "b": 2.02}, changes=2) == 10  # churn 1 >= ref: mínimo
+
+
+@MODULES
+def test_quota_floor_and_wait(mod):
+    clock = Clock()
+    sched = mod.AdaptiveScheduler(1, 600, 1, quota=10, quota_window=60, headroom=1.0, smoothing=1.0, clock=clock)
+    sched.add_group("a")
+    sched.add_group("b")
+
+    # 5 chamadas por poll, 5 por minuto de quota por grupo: no mínimo 60s
+    assert sched.observe("a", {"x": 1.0}, changes=1, calls=5) == 60
+    sched.observe("b", {"x": 1.0}, changes=1, calls=5)
+    sched.schedule("b", 0)
+    assert sched.due_at("b") == clock.now + 60  # janela esgotada: espera a quota liberar
+    assert sched.next_due()[0] == "a"
+
+
+@MODULES
+def test_invalid_intervals(mod):
+    with pytest.raises(ValueError):
+        mod.AdaptiveScheduler(0, 10)
+    with pytest.raises(ValueError):
+        mod.AdaptiveScheduler(20, 10)
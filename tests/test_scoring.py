@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+import scoring
+from agent import SolanaTradingAgent
+from token_table import TokenInfo
+
+
+def _token(i, liquidity, volume_24h, change_24h):
+    return TokenInfo(f"addr{i}", f"T{i}", f"Token {i}", 1.0, liquidity, volume_24h, change_24h)
+
+
+@pytest.fixture
+def tokens():
+    rng = np.random.default_rng(7)
+    return [
+        _token(i, float(rng.choice([0, 60_000])), float(rng.choice([0, 200_000])), float(rng.normal(0, 30)))
+        for i in range(200)
+    ]
+
+
+def test_score_one_matches_columns(tokens):
+    scores, actions = scoring.score_columns(
+        [t.liquidity for t in tokens], [t.volume_24h for t in tokens], [t.change_24h for t in tokens]
+    )
+    for t, score, action in zip(tokens, scores, actions):
+        assert scoring.score_one(t.liquidity, t.volume_24h, t.change_24h)[:2] == (
+            int(score), scoring.ACTION_NAMES[int(action)])
+
+
+def test_score_tokens_is_top_k_of_score_token(tokens):
+    agent = SolanaTradingAgent(queries=["x"], token_addresses=[])
+    scalar = sorted((agent.score_token(t) for t in tokens), key=lambda s: -s.score)[:10]
+    batch = agent.score_tokens(tokens, top_k=10)
+    assert [(s.token.address, s.score, s.action, s.reasons) for s in batch] == [
+        (s.token.address, s.score, s.action, s.reasons) for s in scalar
+    ]
+
+
+def test_top_k_indices_stable_ties():
+    scores = np.array([5, 9, 5, 9, 1, 5])
+    assert scoring.top_k_indices(scores, 3).tolist() == [1, 3, 0]
+    assert scoring.top_k_indices(scores, 10).tolist() == [1, 3, 0, 2, 5, 4]
+    assert scoring.top_k_indices(scores, 0).tolist() == []
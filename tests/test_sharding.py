@@ -0,0 +1,146 @@
+"""Scan particionado: mesmo top-k do scan num processo só, limit global."""
+import random
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+import sharding
+from agent import SolanaTradingAgent
+from conftest import FakeCache, dex_body, dex_pair
+
+QUERIES = ["sol", "bonk", "jup", "wif", "pyth"]
+ADDRESSES = [f"addr{i:02d}" for i in range(40)]
+
+
+def universe(seed=0):
+    """Respostas por URL; alguns tokens aparecem em mais de uma consulta."""
+    rnd = random.Random(seed)
+
+    def pair(address):
+        return dex_pair(address, liquidity=rnd.choice([5e3, 3e4, 2e5, 1e6]),
+                        volume_24h=rnd.choice([1e3, 6e4, 5e5]), change_24h=rnd.uniform(-30, 30),
+                        price=rnd.uniform(0.01, 10))
+
+    by_query = {}
+    for i, query in enumerate(QUERIES):
+        pairs = [pair(f"q{i}-{j}") for j in range(12)] + [pair(f"shared{j}") for j in range(3)]
+        pairs.append(dex_pair(f"eth{i}", 1e7, 1e7, 50, chain="ethereum"))
+        by_query[query] = pairs
+    by_address = {a: pair(a) for a in ADDRESSES}
+    return by_query, by_address
+
+
+def bodies_for(data, queries, addresses):
+    """Corpos por URL para um agente com essas consultas e endereços."""
+    by_query, by_address = data
+    agent = SolanaTradingAgent(queries=list(queries), token_addresses=list(addresses), cache=FakeCache())
+    urls = agent._discovery_urls()
+    bodies = {url: dex_body(*by_query[q]) for url, q in zip(urls, queries)}
+    for url in urls[len(queries):]:
+        batch = url.rsplit("/", 1)[1].split(",")
+        bodies[url] = dex_body(*[by_address[a] for a in batch])
+    return bodies
+
+
+@pytest.fixture
+def scanner(monkeypatch):
+    """ShardedScanner com threads no lugar de processos e agentes sobre FakeCache."""
+    data = universe()
+    workers = {}
+    for shard in sharding.split_sources(QUERIES, ADDRESSES, 3):
+        workers[shard] = SolanaTradingAgent(queries=list(shard[0]), token_addresses=list(shard[1]),
+                                            cache=FakeCache(bodies_for(data, *shard)), shards=1)
+    monkeypatch.setattr(sharding, "_worker_agents", workers)
+    scanner = sharding.ShardedScanner(3)
+    scanner._pool = ThreadPoolExecutor(3)
+    yield scanner, bodies_for(data, QUERIES, ADDRESSES)
+    scanner.close()
+
+
+def assert_same_top_k(got, expected):
+    assert [s.score for s in got] == [s.score for s in expected]
+    if not expected:
+        return
+    cutoff = expected[-1].score
+    # acima do corte os tokens são os mesmos; no corte, empates podem sair em outra ordem
+    assert {s.token.address for s in got if s.score > cutoff} == \
+        {s.token.address for s in expected if s.score > cutoff}
+
+
+@pytest.mark.parametrize("top_k", [1, 5, 20])
+def test_sharded_top_k_matches_single_process(scanner, top_k):
+    scanner, bodies = scanner
+    single = SolanaTradingAgent(queries=QUERIES, token_addresses=ADDRESSES, cache=FakeCache(bodies), shards=1)
+
+    expected = single.scan(None, top_k)
+    got = scanner.scan(QUERIES, ADDRESSES, None, top_k)
+
+    assert len(got) == top_k
+    assert_same_top_k(got, expected)
+
+
+def test_limit_applies_to_the_whole_scan(scanner, monkeypatch):
+    scanner, _ = scanner
+    seen = []
+    real_merge = sharding.merge_shards
+
+    def spy(results, top_k, limit=None):
+        seen.append([len(r) for r in results])
+        return real_merge(results, top_k, limit)
+
+    monkeypatch.setattr(sharding, "merge_shards", spy)
+    got = scanner.scan(QUERIES, ADDRESSES, 7, 50)
+
+    assert len(got) == 7  # 7 tokens no total, não 7 por shard
+    assert seen == [[7, 7, 7]]
+
+
+def make_cand(address, score, liquidity=1.0):
+    return (address, address.upper(), address, 1.0, liquidity, 0.0, 0.0, score)
+
+
+def test_merge_interleaves_shards_before_limit():
+    a = [make_cand("a1", 1), make_cand("a2", 9), make_cand("a3", 8)]
+    b = [make_cand("b1", 5), make_cand("b2", 7)]
+    # ordem intercalada: a1 b1 a2 b2 a3 -> os 3 primeiros distintos são a1, b1, a2
+    assert [c[0] for c in sharding.merge_shards([a, b], 10, limit=3)] == ["a2", "b1", "a1"]
+    assert [c[0] for c in sharding.merge_shards([a, b], 2)] == ["a2", "a3"]
+
+
+def test_merge_dedups_by_liquidity_and_keeps_position():
+    a = [make_cand("x", 3, liquidity=10), make_cand("y", 3)]
+    b = [make_cand("x", 9, liquidity=100), make_cand("z", 3)]
+    merged = sharding.merge_shards([a, b], 10, limit=3)
+    assert [(c[0], c[7]) for c in merged] == [("x", 9), ("y", 3), ("z", 3)]
+    # token repetido não conta duas vezes para o limit
+    assert [c[0] for c in sharding.merge_shards([a, b], 10, limit=2)] == ["x", "y"]
+
+
+def test_split_sources_is_stable_and_complete():
+    shards = sharding.split_sources(QUERIES, ADDRESSES + ADDRESSES[:3], 3)
+    assert shards == sharding.split_sources(QUERIES, ADDRESSES, 3)
+    assert sorted(q for s in shards for q in s[0]) == sorted(QUERIES)
+    assert sorted(a for s in shards for a in s[1]) == sorted(ADDRESSES)
+    assert sharding.split_sources(["sol"], [], 4) == [(("sol",), ())]
+
+
+def test_scan_once_closes_the_agent(monkeypatch):
+    import agent
+    import cli
+
+    closed = []
+
+    class Agent:
+        def scan(self, limit, top_k):
+            raise RuntimeError("sem rede")
+
+        def close(self):
+            closed.append(True)
+
+    monkeypatch.setattr(agent, "SolanaTradingAgent", Agent)
+    args = SimpleNamespace(limit=10, top_k=3, json=False, notify=False)
+    assert cli.cmd_scan_once(args) == 1
+    Agent.scan = lambda self, limit, top_k: []
+    assert cli.cmd_scan_once(args) == 0
+    assert closed == [True, True]
@@ -0,0 +1,81 @@
+"""DeltaTracker: eventos por token, com histerese de score e de saída do top-k."""
+from agent import TradingSignal
+from signal_delta import ACTION, ENTERED, EXITED, SCORE, DeltaTracker
+from token_table import TokenInfo
+
+
+def sig(address, score, action="buy"):
+    token = TokenInfo(address, address.upper(), address, 1.0, 100_000.0, 50_000.0, 1.0)
+    return TradingSignal(token, score, action, [])
+
+
+def kinds(deltas):
+    return [(d.kind, d.signal.token.address) for d in deltas]
+
+
+def test_new_tokens_enter_once():
+    tracker = DeltaTracker()
+    assert kinds(tracker.update([sig("a", 50), sig("b", 40), sig("a", 50)])) == [(ENTERED, "a"), (ENTERED, "b")]
+    assert tracker.update([sig("a", 50), sig("b", 40)]) == []
+    assert len(tracker) == 2
+
+
+def test_reordering_is_not_a_change():
+    tracker = DeltaTracker()
+    tracker.update([sig("a", 50), sig("b", 49)])
+    assert tracker.update([sig("b", 51), sig("a", 48)]) == []
+
+
+def test_score_band_is_measured_from_the_last_notice():
+    tracker = DeltaTracker(score_band=10)
+    tracker.update([sig("a", 50)])
+    # deriva lenta: nenhum passo chega à banda, mas o acumulado sim
+    assert tracker.update([sig("a", 54)]) == []
+    assert tracker.update([sig("a", 58)]) == []
+    deltas = tracker.update([sig("a", 61)])
+    assert kinds(deltas) == [(SCORE, "a")]
+    assert deltas[0].previous_score == 50
+    # a referência passa a ser 61: voltar a 55 não avisa
+    assert tracker.update([sig("a", 55)]) == []
+    assert kinds(tracker.update([sig("a", 51)])) == [(SCORE, "a")]
+
+
+def test_action_change_wins_over_score():
+    tracker = DeltaTracker(score_band=10)
+    tracker.update([sig("a", 50, "hold")])
+    deltas = tracker.update([sig("a", 75, "buy")])
+    assert kinds(deltas) == [(ACTION, "a")]
+    assert (deltas[0].previous_action, deltas[0].previous_score) == ("hold", 50)
+    assert tracker.update([sig("a", 75, "buy")]) == []
+
+
+def test_flicker_at_the_edge_does_not_exit():
+    tracker = DeltaTracker(exit_cycles=2)
+    tracker.update([sig("a", 50), sig("b", 20)])
+    assert tracker.update([sig("a", 50)]) == []  # b sumiu por um ciclo
+    assert tracker.update([sig("a", 50), sig("b", 21)]) == []  # e voltou: sem saída + entrada
+
+
+def test_exit_after_exit_cycles_carries_last_signal():
+    tracker = DeltaTracker(exit_cycles=2)
+    tracker.update([sig("a", 50), sig("b", 20)])
+    tracker.update([sig("a", 50), sig("b", 22)])
+    assert tracker.update([sig("a", 50)]) == []
+    deltas = tracker.update([sig("a", 50)])
+    assert kinds(deltas) == [(EXITED, "b")]
+    assert deltas[0].signal.score == 22 and deltas[0].previous_score == 20
+    assert len(tracker) == 1
+    assert kinds(tracker.update([sig("a", 50), sig("b", 30)])) == [(ENTERED, "b")]
+
+
+def test_exit_cycles_is_at_least_one():
+    tracker = DeltaTracker(exit_cycles=0)
+    tracker.update([sig("a", 50)])
+    assert kinds(tracker.update([])) == [(EXITED, "a")]
+
+
+def test_reset_forgets_state():
+    tracker = DeltaTracker()
+    tracker.update([sig("a", 50)])
+    tracker.reset()
+    assert kinds(tracker.update([sig("a", 50)])) == [(ENTERED, "a")]
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from solana_trader.core.store import SnapshotStore
+
+
+def _fill(store, n, symbols=("SOL-USD", "BONK-USD"), start=0.0):
+    for i in range(n):
+        store.append({"symbol": symbols[i % len(symbols)], "timestamp": start + i, "price": float(i),
+                      "change_1h": 0.01})
+
+
+def test_read_by_symbol_and_range(tmp_path):
+    store = SnapshotStore(str(tmp_path), segment_rows=16)
+    _fill(store, 100)
+    data = store.read("SOL-USD", 10, 20)
+    assert data["ts"].tolist() == [10.0, 12.0, 14.0, 16.0, 18.0]
+    assert data["price"].tolist() == data["ts"].tolist()
+    assert np.isnan(data["liquidity"]).all()  # campo não gravado
+
+
+def test_compact_keeps_contents(tmp_path):
+    store = SnapshotStore(str(tmp_path), segment_rows=16)
+    _fill(store, 100)
+    before = store.read("BONK-USD")["ts"].tolist()
+    store.rotate()
+    store.compact()
+    assert store.read("BONK-USD")["ts"].tolist() == before
+    assert sum(m["compacted"] for m in store.manifest["segments"]) == 1
+
+
+def test_readonly_store_next_to_live_recorder(tmp_path):
+    live = SnapshotStore(str(tmp_path), segment_rows=1000)
+    _fill(live, 10)
+    live.flush()  # segmento ativo, não selado
+
+    reader = SnapshotStore(str(tmp_path), readonly=True)
+    assert reader._active is None
+    assert reader.read("SOL-USD")["ts"].tolist() == [0.0, 2.0, 4.0, 6.0, 8.0]
+    with pytest.raises(ValueError):
+        reader.append({"symbol": "SOL-USD", "timestamp": 99.0, "price": 1.0})
+    with pytest.raises(ValueError):
+        reader.compact()
+    reader.close()  # não publica nada
+
+    _fill(live, 4, start=10.0)
+    live.flush()
+    reader.refresh()
+    assert reader.read("SOL-USD")["ts"].tolist()[-2:] == [10.0, 12.0]
+    assert live.read("SOL-USD")["ts"].tolist() == reader.read("SOL-USD")["ts"].tolist()
+    live.close()
+
+
+def test_readonly_does_not_create_directory(tmp_path):
+    SnapshotStore(str(tmp_path / "missing"), readonly=True)
+    assert not (tmp_path / "missing").exists()
+
+
+def test_append_columns_matches_row_appends(tmp_path):
+    rows = SnapshotStore(str(tmp_path / "rows"), segment_rows=16)
+    cols = SnapshotStore(str(tmp_path / "cols"), segment_rows=16)
+    symbols = ["SOL-USD", "BONK-USD", "JUP-USD"]
+    for cycle in range(15):  # 45 linhas: atravessa dois segmentos cheios
+        ts = [100.0 + cycle] * 3
+        prices = [cycle + 0.1 * i for i in range(3)]
+        for t, sym, price in zip(ts, symbols, prices):
+            rows.append({"symbol": sym, "timestamp": t, "price": price, "liquidity": 5.0})
+        cols.append_columns(ts, symbols, price=prices, liquidity=[5.0] * 3)
+
+    assert [m["count"] for m in cols.manifest["segments"]] == [16, 16, 13]
+    for sym in symbols:
+        a, b = rows.read(sym, 103, 110), cols.read(sym, 103, 110)
+        assert a["ts"].tolist() == b["ts"].tolist() and len(a["ts"]) == 7
+        assert a["price"].tolist() == b["price"].tolist()
+        assert b["liquidity"].tolist() == [5.0] * 7
+        assert np.isnan(b["change_1h"]).all()
+
+
+def test_append_columns_out_of_order_still_reads_sorted(tmp_path):
+    store = SnapshotStore(str(tmp_path), segment_rows=100)
+    store.append_columns([5.0, 6.0], ["A", "A"], price=[5.0, 6.0])
+    store.append_columns([1.0, 3.0], ["A", "A"], price=[1.0, 3.0])
+    store.append_columns([], [])
+    assert store.read("A")["price"].tolist() == [1.0, 3.0, 5.0, 6.0]
+    assert store.read("A", 2, 6)["ts"].tolist() == [3.0, 5.0]
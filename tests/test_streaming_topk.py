@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import scoring
+
+
+def _oracle(history, k):
+    """top-k de lote único sobre o último score de cada linha, na ordem de primeira chegada."""
+    final = {}
+    for rows, scores in history:
+        for row, score in zip(rows, scores):
+            final[row] = score
+    rows = np.array(list(final), dtype=np.intp)
+    scores = np.array(list(final.values()))
+    longs = [(int(rows[i]), int(scores[i])) for i in scoring.top_k_indices(scores, k)]
+    shorts = [(int(rows[i]), int(scores[i])) for i in scoring.top_k_indices(-scores, k)]
+    return longs, shorts
+
+
+def test_retained_row_whose_score_drops():
+    top = scoring.StreamingTopK(1)
+    top.push(np.array([0, 1]), np.array([10, 5]))
+    assert top.longs() == [(0, 10)]
+    top.push(np.array([0]), np.array([1]))
+    assert top.longs() == [(1, 5)]
+    assert top.shorts() == [(0, 1)]
+
+
+def test_retained_row_whose_score_rises():
+    top = scoring.StreamingTopK(2)
+    top.push(np.array([0, 1, 2]), np.array([3, 5, 4]))
+    top.push(np.array([2]), np.array([9]))
+    assert top.longs() == [(2, 9), (1, 5)]
+
+
+def test_tie_keeps_first_arrival():
+    top = scoring.StreamingTopK(1)
+    top.push(np.array([0]), np.array([1]))
+    top.push(np.array([1]), np.array([5]))
+    top.push(np.array([0]), np.array([5]))  # empata com 1, mas chegou antes
+    assert top.longs() == [(0, 5)]
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_matches_single_batch_selection(seed):
+    rng = np.random.default_rng(seed)
+    k = int(rng.integers(1, 6))
+    top = scoring.StreamingTopK(k)
+    history = []
+    for _ in range(int(rng.integers(1, 12))):
+        m = int(rng.integers(1, 15))
+        rows = rng.integers(0, 25, m)  # linhas repetidas entre e dentro dos lotes
+        scores = rng.integers(-30, 50, m)
+        top.push(rows, scores)
+        history.append((rows.tolist(), scores.tolist()))
+        assert (top.longs(), top.shorts()) == _oracle(history, k)
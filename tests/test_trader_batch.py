@@ -0,0 +1,40 @@
+"""`Trader.submit_batch`: validação, compensação e valores normalizados."""
+from trader import Order, PaperTrader
+
+
+def test_string_amounts_are_netted_as_floats():
+    batch = PaperTrader().submit_batch([Order("buy", "X", "10"), Order("sell", "X", "4")])
+
+    assert batch.success
+    assert batch.executed == 1
+    assert batch.netted == 1
+    buy, sell = batch.results
+    assert buy.action == "buy" and buy.amount == 6.0
+    assert sell.amount == 4.0
+    assert isinstance(sell.amount, float)
+
+
+def test_opposite_orders_cancel_out():
+    batch = PaperTrader().submit_batch([Order("buy", "X", 5), Order("sell", "X", "5.0"), Order("buy", "Y", 1)])
+
+    assert batch.executed == 1
+    assert [r.extra.get("batch") for r in batch.results[:2]] == ["netted", "netted"]
+    assert [r.amount for r in batch.results[:2]] == [5.0, 5.0]
+    assert batch.results[2].token == "Y"
+
+
+def test_invalid_orders_are_reported_not_executed():
+    orders = [
+        Order("hold", "X", 1),
+        Order("buy", "", 1),
+        Order("buy", "X", "abc"),
+        Order("buy", "X", float("nan")),
+        Order("sell", "X", -3),
+        Order("buy", "X", True),
+        Order("buy", "X", None),
+    ]
+    batch = PaperTrader().submit_batch(orders)
+
+    assert batch.executed == 0
+    assert not any(r.success for r in batch.results)
+    assert all(r.extra == {"batch": "invalid"} for r in batch.results)
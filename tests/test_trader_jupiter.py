@@ -0,0 +1,142 @@
+"""SolanaTrader contra um Jupiter de mentira (servidor aiohttp local, dry-run)."""
+import time
+
+import pytest
+from aiohttp import web
+
+from conftest import LocalServer
+from trader import USDC_DECIMALS, USDC_MINT, SolanaTrader
+
+TOKEN = "TokenMint111"
+
+
+class MockJupiter(LocalServer):
+    """/quote e /swap mínimos; `impact` controla o price impact devolvido."""
+
+    def __init__(self):
+        super().__init__()
+        self.quotes = []  # params de cada /quote recebido
+        self.swaps = 0
+        self.impact = 0.001
+
+    async def _quote(self, request):
+        params = dict(request.query)
+        self.quotes.append(params)
+        return web.json_response({
+            "inputMint": params["inputMint"],
+            "outputMint": params["outputMint"],
+            "inAmount": params["amount"],
+            "outAmount": str(int(params["amount"]) * 2),
+            "otherAmountThreshold": str(int(params["amount"]) * 2 * 995 // 1000),
+            "swapMode": params["swapMode"],
+            "priceImpactPct": str(self.impact),
+        })
+
+    async def _swap(self, request):
+        self.swaps += 1
+        await request.json()
+        return web.json_response({"swapTransaction": "AAAA"})
+
+    def routes(self, app):
+        app.router.add_get("/quote", self._quote)
+        app.router.add_post("/swap", self._swap)
+
+    def amounts(self):
+        return [int(q["amount"]) / 10 ** USDC_DECIMALS for q in self.quotes]
+
+
+@pytest.fixture
+def jupiter():
+    server = MockJupiter().start()
+    yield server
+    server.stop()
+
+
+def make_trader(jupiter, **kwargs):
+    kwargs.setdefault("quote_ttl", 10)
+    kwargs.setdefault("prefetch_amount_usd", 100)
+    return SolanaTrader(api_url=jupiter.url, rpc_url=jupiter.url + "/rpc", dry_run=True,
+                        max_price_impact_pct=1.0, **kwargs)
+
+
+def test_buy_uses_prefetched_quote(jupiter):
+    trader = make_trader(jupiter, prefetch_amount_usd="50,100")
+    try:
+        trader._run(trader.prefetch_async([TOKEN, TOKEN]))
+        assert sorted(jupiter.amounts()) == [50.0, 100.0]
+
+        res = trader.buy(TOKEN, 50)
+        assert res.success, res.message
+        assert len(jupiter.quotes) == 2  # veio do cache
+        assert jupiter.swaps == 1
+        assert res.extra["in_amount"] == str(50 * 10 ** USDC_DECIMALS)
+        assert jupiter.quotes[0]["inputMint"] == USDC_MINT
+        assert jupiter.quotes[0]["swapMode"] == "ExactIn"
+    finally:
+        trader.close()
+
+
+def test_prefetch_covers_sizes_actually_traded(jupiter):
+    trader = make_trader(jupiter)
+    try:
+        assert trader.buy(TOKEN, 37.5).success
+        assert jupiter.amounts() == [37.5]
+
+        trader._run(trader.prefetch_async(["Other222"]))
+        assert sorted(jupiter.amounts()[1:]) == [37.5, 100.0]
+
+        n = len(jupiter.quotes)
+        assert trader.buy("Other222", 37.5).success
+        assert len(jupiter.quotes) == n
+    finally:
+        trader.close()
+
+
+def test_expired_quote_is_fetched_again(jupiter):
+    trader = make_trader(jupiter, quote_ttl=0.05)
+    try:
+        trader._run(trader.prefetch_async([TOKEN]))
+        assert len(jupiter.quotes) == 1
+        time.sleep(0.1)
+
+        res = trader.buy(TOKEN, 100)
+        assert res.success, res.message
+        assert len(jupiter.quotes) == 2
+        assert res.extra["quote_age_s"] < 0.05
+    finally:
+        trader.close()
+
+
+def test_price_impact_above_limit_is_rejected(jupiter):
+    trader = make_trader(jupiter)
+    try:
+        trader._run(trader.prefetch_async([TOKEN]))
+        jupiter.impact = 0.05  # 5% > limite de 1%
+
+        res = trader.buy(TOKEN, 100)
+        # a cotação do cache (impacto baixo) passa; piora o cache e tenta de novo
+        assert res.success
+        trader.client.quotes._entries.clear()
+        res = trader.buy(TOKEN, 100)
+        assert not res.success
+        assert "Price impact" in res.message
+        # cotação nova, recusada, refeita uma vez sem cache antes de desistir
+        assert len(jupiter.quotes) == 3
+        assert jupiter.swaps == 1
+    finally:
+        trader.close()
+
+
+def test_stale_high_impact_quote_is_refreshed(jupiter):
+    trader = make_trader(jupiter)
+    try:
+        jupiter.impact = 0.05
+        trader._run(trader.prefetch_async([TOKEN]))
+        jupiter.impact = 0.001
+
+        res = trader.buy(TOKEN, 100)
+        assert res.success, res.message
+        assert len(jupiter.quotes) == 2
+        assert res.extra["price_impact_pct"] == pytest.approx(0.1)
+    finally:
+        trader.close()
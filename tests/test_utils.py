@@ -0,0 +1,86 @@
+"""SingleFlight: chamadas concorrentes com a mesma chave viram uma execução."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils import SingleFlight
+
+
+class Slow:
+    def __init__(self, delay=0.1, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = []
+        self.threads = set()
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return f"resultado{args}"
+
+
+def test_concurrent_calls_share_one_execution():
+    flight, fn = SingleFlight(), Slow()
+
+    async def run():
+        return await asyncio.gather(*(flight.run("k", fn, 1, 2) for _ in range(5))), threading.get_ident()
+
+    results, loop_thread = asyncio.run(run())
+    assert results == ["resultado(1, 2)"] * 5
+    assert fn.calls == [(1, 2)]
+    assert loop_thread not in fn.threads  # não trava o event loop
+    assert not flight._inflight
+
+
+def test_different_keys_run_separately():
+    flight, fn = SingleFlight(), Slow()
+
+    async def run():
+        return await asyncio.gather(flight.run("a", fn, "a"), flight.run("b", fn, "b"))
+
+    assert asyncio.run(run()) == ["resultado('a',)", "resultado('b',)"]
+    assert sorted(fn.calls) == [("a",), ("b",)]
+
+
+def test_finished_call_is_not_reused():
+    flight, fn = SingleFlight(), Slow(delay=0)
+
+    async def run():
+        await flight.run("k", fn)
+        await flight.run("k", fn)
+
+    asyncio.run(run())
+    assert len(fn.calls) == 2
+
+
+def test_error_reaches_every_waiter_and_clears_the_key():
+    flight, fn = SingleFlight(), Slow(error=ValueError("falhou"))
+
+    async def run():
+        return await asyncio.gather(*(flight.run("k", fn) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [type(r) for r in results] == [ValueError] * 3
+    assert len(fn.calls) == 1
+    assert not flight._inflight
+
+
+def test_cancelled_waiter_does_not_cancel_the_others():
+    flight, fn = SingleFlight(), Slow(delay=0.2)
+
+    async def run():
+        first = asyncio.ensure_future(flight.run("k", fn))
+        second = asyncio.ensure_future(flight.run("k", fn))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "resultado()"
+    assert len(fn.calls) == 1
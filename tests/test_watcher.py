@@ -0,0 +1,144 @@
+"""Watcher: mensagens (também usadas pelo `scan-once --notify` da CLI) e ciclo de scan."""
+from agent import TradingSignal
+from token_table import TokenInfo
+from watcher import _compose_signal_message
+
+
+def signal(symbol, score, action):
+    return TradingSignal(TokenInfo(symbol.lower(), symbol, symbol, 1.0, 1e6, 1e6, 0.0), score, action, [])
+
+
+def test_signal_message_lists_every_action():
+    msg = _compose_signal_message([
+        signal("AAA", 60, "buy"),
+        signal("BBB", -40, "sell"),
+        signal("CCC", 10, "hold"),
+        signal("DDD", 45, "buy"),
+    ])
+
+    assert "4 Oportunidades" in msg
+    for symbol in ("AAA", "BBB", "CCC", "DDD"):
+        assert f"- {symbol}: score=" in msg
+    buy, sell, hold = (msg.index(t) for t in ("Compra", "Venda", "Observar"))
+    assert buy < msg.index("AAA") < msg.index("DDD") < sell < msg.index("BBB") < hold < msg.index("CCC")
+
+
+def test_signal_message_skips_empty_sections():
+    msg = _compose_signal_message([signal("AAA", 60, "BUY")])
+
+    assert "AAA: score=60" in msg
+    assert "Venda" not in msg and "Observar" not in msg
+
+
+class _StaticAgent:
+    def __init__(self, signals):
+        self.signals = signals
+
+    def scan(self, limit, top_k):
+        return self.signals
+
+
+class _RecordingTrader:
+    def __init__(self):
+        self.prefetched = []
+
+    def prefetch(self, addresses):
+        self.prefetched.append(list(addresses))
+
+
+def test_run_scan_prefetches_every_signal_even_without_changes(monkeypatch):
+    import asyncio
+
+    import watcher
+
+    trader = _RecordingTrader()
+    monkeypatch.setattr(watcher, "trader", trader)
+    signals = [signal("AAA", 60, "buy"), signal("BBB", -40, "sell")]
+    group = watcher.WatchGroup("test", _StaticAgent(signals))
+
+    _, deltas = asyncio.run(watcher._run_scan(group))
+    assert deltas
+    _, deltas = asyncio.run(watcher._run_scan(group))
+    assert not deltas  # nada a avisar...
+
+    # ... mas as cotações do top-k atual continuam quentes
+    assert trader.prefetched == [["aaa", "bbb"], ["aaa", "bbb"]]
+
+
+def test_poll_counts_a_total_fetch_failure_on_the_breaker(monkeypatch):
+    import asyncio
+
+    import watcher
+    from agent import SolanaTradingAgent
+    from conftest import FakeCache
+    from scheduler import AdaptiveScheduler
+
+    agent = SolanaTradingAgent(queries=["x", "y"], token_addresses=[], cache=FakeCache(default=ConnectionError("fora")))
+    group = watcher.WatchGroup("test", agent)
+    group.breaker.failure_threshold = 2
+    sched = AdaptiveScheduler(1, 100, 10)
+    sched.add_group("test")
+    monkeypatch.setattr(watcher, "scheduler", sched)
+    monkeypatch.setattr(watcher, "trader", _RecordingTrader())
+
+    asyncio.run(watcher._poll(group))
+    assert group.breaker.failures == 1
+    asyncio.run(watcher._poll(group))
+    assert group.breaker.state == "open"
+
+
+def test_poll_records_the_cycle_universe(monkeypatch, tmp_path):
+    import asyncio
+
+    import watcher
+    from agent import SolanaTradingAgent
+    from conftest import FakeCache, dex_body, dex_pair
+    from scheduler import AdaptiveScheduler
+    from utils import load_shared
+
+    store = load_shared("store").SnapshotStore(str(tmp_path))
+    body = dex_body(dex_pair("a", 1e5, 2e5, 3.0, price=1.5), dex_pair("b", 1e4, 0.0, -2.0, price=0.2),
+                    dex_pair("c", 1e6, 1e6, 1.0, chain="ethereum"))
+    agent = SolanaTradingAgent(queries=["x"], token_addresses=[], cache=FakeCache(default=body))
+    group = watcher.WatchGroup("test", agent)
+    sched = AdaptiveScheduler(1, 100, 10)
+    sched.add_group("test")
+    monkeypatch.setattr(watcher, "scheduler", sched)
+    monkeypatch.setattr(watcher, "trader", _RecordingTrader())
+    monkeypatch.setattr(watcher, "recorder", store)
+
+    asyncio.run(watcher._poll(group))
+    asyncio.run(watcher._poll(group))
+    store.flush()
+
+    reader = load_shared("store").SnapshotStore(str(tmp_path), readonly=True)
+    assert sorted(reader.symbols) == ["a", "b"]
+    a = reader.read("a")
+    assert len(a["ts"]) == 2
+    assert a["price"].tolist() == [1.5, 1.5]
+    assert a["liquidity"].tolist() == [1e5, 1e5] and a["change_24h"].tolist() == [3.0, 3.0]
+
+
+def test_record_failure_does_not_break_the_cycle(monkeypatch):
+    import asyncio
+
+    import watcher
+    from agent import SolanaTradingAgent
+    from conftest import FakeCache, dex_body, dex_pair
+    from scheduler import AdaptiveScheduler
+
+    class BrokenStore:
+        def append_columns(self, *args, **kwargs):
+            raise OSError("disco cheio")
+
+    agent = SolanaTradingAgent(queries=["x"], token_addresses=[], cache=FakeCache(default=dex_body(dex_pair("a", 1e5))))
+    group = watcher.WatchGroup("test", agent)
+    sched = AdaptiveScheduler(1, 100, 10)
+    sched.add_group("test")
+    monkeypatch.setattr(watcher, "scheduler", sched)
+    monkeypatch.setattr(watcher, "trader", _RecordingTrader())
+    monkeypatch.setattr(watcher, "recorder", BrokenStore())
+
+    asyncio.run(watcher._poll(group))
+    assert group.breaker.failures == 0
+    assert sched.due_at("test") > 0